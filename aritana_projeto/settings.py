@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -49,10 +49,12 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Deve vir logo após SecurityMiddleware
+    'embarcacoes.middleware.TempoRequisicaoMiddleware',  # Server-Timing e log de tempos
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'embarcacoes.middleware.PerfilamentoMiddleware',  # cProfile sob demanda (staff) ou por amostragem
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -61,7 +63,7 @@ ROOT_URLCONF = 'aritana_projeto.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'embarcacoes.template_backends.DjangoTemplatesMedidos',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -74,18 +76,94 @@ TEMPLATES = [
     },
 ]
 
+# Header Server-Timing com o detalhamento do tempo de cada requisição
+ARITANA_SERVER_TIMING = config('ARITANA_SERVER_TIMING', default=True, cast=bool)
+
+# Gravação/reprodução do tráfego com a API externa (ver embarcacoes/gravacao_api.py)
+# API_GRAVACAO_MODO: '' (desligado), 'gravar' ou 'reproduzir'
+ARITANA_API_GRAVACAO = {
+    'modo': config('API_GRAVACAO_MODO', default=''),
+    'arquivo': config('API_GRAVACAO_ARQUIVO', default=str(BASE_DIR / 'gravacoes' / 'api.jsonl')),
+    'max_corpo': config('API_GRAVACAO_MAX_CORPO', default=1_000_000, cast=int),  # bytes por resposta
+    'escala_latencia': config('API_GRAVACAO_ESCALA_LATENCIA', default=1.0, cast=float),
+}
+
+# Métricas Prometheus (/metrics): com CACHE_BACKEND=redis cada worker soma seus deltas
+# em um hash do Redis a cada 'intervalo_envio' segundos (em segundo plano), agregando os
+# workers; com o LocMemCache os totais ficam na memória de cada processo.
+# Os endpoints de métricas respondem só a staff logado, a 'Authorization: Bearer <token>'
+# ou aos IPs de 'ips_permitidos' (REMOTE_ADDR; atrás de proxy, prefira o token)
+ARITANA_METRICAS = {
+    'intervalo_envio': config('METRICAS_INTERVALO_ENVIO', default=5, cast=int),
+    'token': config('METRICAS_TOKEN', default=''),
+    'ips_permitidos': config('METRICAS_IPS_PERMITIDOS', default='', cast=Csv()),
+    'max_horas_jobs': config('METRICAS_MAX_HORAS_JOBS', default=24 * 7, cast=int),
+}
+
+# Perfilamento sob demanda (ver embarcacoes/perfilamento.py): staff envia o header
+# 'X-Aritana-Perfil: 1' ou '?perfil=1'; 'amostragem' é a fração de requisições
+# perfiladas automaticamente (0 = nenhuma)
+ARITANA_PERFIL = {
+    'habilitado': config('PERFIL_HABILITADO', default=True, cast=bool),
+    'amostragem': config('PERFIL_AMOSTRAGEM', default=0.0, cast=float),
+    'top': 40,            # funções guardadas, por tempo acumulado
+    'max_queries': 50,    # queries mais lentas guardadas
+    'retencao': config('PERFIL_RETENCAO', default=200, cast=int),  # perfis mantidos no banco
+}
+
 WSGI_APPLICATION = 'aritana_projeto.wsgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_PROFILE=sqlite        -> SQLite ajustado para leitores concorrentes (padrão)
+# DB_PROFILE=sqlite-basico -> SQLite com a configuração padrão do Django (para comparação)
+# DB_PROFILE=postgres      -> PostgreSQL com conexões persistentes (multi-worker)
+DB_PROFILE = config('DB_PROFILE', default='sqlite')
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=600, cast=int)
+
+if DB_PROFILE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('POSTGRES_DB', default='aritana'),
+            'USER': config('POSTGRES_USER', default='aritana'),
+            'PASSWORD': config('POSTGRES_PASSWORD', default=''),
+            'HOST': config('POSTGRES_HOST', default='127.0.0.1'),
+            'PORT': config('POSTGRES_PORT', default='5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+elif DB_PROFILE == 'sqlite-basico':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'OPTIONS': {
+                'timeout': 20,  # segundos aguardando o lock de escrita
+            },
+        }
+    }
+    # PRAGMAs aplicados a cada nova conexão (ver embarcacoes/db.py)
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',        # leitores não bloqueiam o escritor
+        'synchronous': 'NORMAL',      # seguro com WAL e bem mais rápido que FULL
+        'busy_timeout': 20000,        # ms
+        'mmap_size': 134217728,       # 128MB de leitura via mmap
+        'cache_size': -20000,         # ~20MB de cache de páginas
+        'temp_store': 'MEMORY',
     }
-}
 
 
 # Password validation
@@ -128,9 +206,36 @@ STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
 
-# Configuração do WhiteNoise para servir arquivos estáticos em produção
-# Usando CompressedStaticFilesStorage (mais simples e compatível)
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
+# Bundles de CSS/JS por página (ver embarcacoes/assets.py). Em produção os templates
+# usam os bundles montados por 'manage.py montar_assets'; em DEBUG, os arquivos de origem
+_JS_COMUM = ['js/async-processing.js', 'js/dashboard.js', 'js/ui-improvements.js', 'js/mobile-improvements.js']
+ARITANA_ASSETS = {
+    'diretorio': BASE_DIR / 'build' / 'static',
+    'usar_bundles': config('ASSETS_BUNDLES', default=not DEBUG, cast=bool),
+    'bundles': {
+        'css/vendor.bundle.css': ['css/bootstrap.min.css', 'css/font-awesome.min.css', 'css/font-awesome-fix.css'],
+        'css/base.bundle.css': ['css/premium-styles.css', 'css/base.css'],
+        'css/historico.bundle.css': ['css/historico.css'],
+        'css/upload.bundle.css': ['css/upload.css'],
+        'css/upload-teste.bundle.css': ['css/upload-teste.css'],
+        'js/vendor.bundle.js': ['js/bootstrap.bundle.min.js'],
+        # Mesma ordem de execução de antes: scripts inline da página e depois os 'defer'
+        'js/base.bundle.js': ['js/base.js', *_JS_COMUM],
+        'js/dashboard.bundle.js': ['js/base.js', 'js/dashboard-pagina.js', *_JS_COMUM],
+        'js/upload.bundle.js': ['js/base.js', 'js/upload-pagina.js', *_JS_COMUM],
+        # O histórico não carrega o dashboard.js
+        'js/historico.bundle.js': [
+            'js/base.js', 'js/historico-optimized.js', 'js/historico-pagina.js',
+            'js/async-processing.js', 'js/ui-improvements.js', 'js/mobile-improvements.js',
+        ],
+    },
+}
+if ARITANA_ASSETS['diretorio'].is_dir():
+    STATICFILES_DIRS.append(ARITANA_ASSETS['diretorio'])
+
+# WhiteNoise: nomes com hash do conteúdo (servidos com Cache-Control immutable)
+# e versões .gz/.br pré-comprimidas, geradas no collectstatic
+STATICFILES_STORAGE = 'embarcacoes.assets.ArmazenamentoEstatico'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -151,6 +256,33 @@ ARITANA_API_KEY = config('ARITANA_API_KEY', default='minha-chave-super-secreta')
 # Configurações da API FastAPI de Processamento de Imagens
 FASTAPI_YOLO_URL = config('FASTAPI_YOLO_URL', default='https://backend-segura-production.up.railway.app')
 
+# Circuit breaker das chamadas à API externa (ver embarcacoes/circuit_breaker.py)
+ARITANA_CIRCUIT_BREAKER = {
+    'janela': 60,           # segundos por janela de contagem
+    'min_chamadas': 5,      # chamadas mínimas antes de avaliar
+    'taxa_erro': 0.5,       # abre com 50% de falhas
+    'latencia_lenta': 3.0,  # chamada lenta a partir de 3s
+    'taxa_lentas': 0.8,     # abre com 80% de chamadas lentas
+    'tempo_aberto': config('CIRCUIT_BREAKER_TEMPO_ABERTO', default=30, cast=int),
+    'endpoints': {
+        # Upload de imagens grandes é naturalmente lento
+        'upload': {'latencia_lenta': 60.0},
+    },
+}
+
+# Timeouts adaptativos por endpoint: p99 × fator, limitado entre piso e teto (segundos)
+ARITANA_TIMEOUTS = {
+    'embarcacoes': {'padrao': 5, 'piso': 2, 'teto': 10},
+    'jobs': {'padrao': 15, 'piso': 3, 'teto': 15},
+    'resultado': {'padrao': 15, 'piso': 3, 'teto': 15},
+    # 3 minutos para imagens grandes (até 20MB); piso alto pois depende do tamanho
+    'upload': {'padrao': 180, 'piso': 60, 'teto': 180},
+}
+# Retries limitados a ~20% das requisições, mesmo durante quedas da API
+ARITANA_RETRY_BUDGET = {'proporcao': 0.2, 'minimo': 3, 'maximo': 10}
+# Duplica GETs que passam do p95 da latência observada (hedged requests)
+ARITANA_HEDGE_REQUESTS = config('ARITANA_HEDGE_REQUESTS', default=False, cast=bool)
+
 # File Upload Settings - Configurações robustas para arquivos grandes
 DATA_UPLOAD_MAX_MEMORY_SIZE = 25 * 1024 * 1024  # 25MB (margem de segurança)
 FILE_UPLOAD_MAX_MEMORY_SIZE = 25 * 1024 * 1024  # 25MB
@@ -161,15 +293,67 @@ FILE_UPLOAD_HANDLERS = [
 ]
 
 # Cache Configuration
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
-        'TIMEOUT': 300,  # 5 minutos
-        'OPTIONS': {
-            'MAX_ENTRIES': 1000,
+# CACHE_BACKEND=locmem   -> cache em memória por processo (padrão, desenvolvimento)
+# CACHE_BACKEND=redis    -> cache compartilhado entre workers via REDIS_URL
+# CACHE_BACKEND=fakeredis -> Redis em memória (requer `pip install fakeredis`), útil em testes
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+REDIS_URL = config('REDIS_URL', default='redis://127.0.0.1:6379/1')
+# Prefixo por ambiente para que dev/staging/produção possam dividir o mesmo Redis
+ARITANA_ENV = config('ARITANA_ENV', default='dev' if DEBUG else 'prod')
+CACHE_KEY_PREFIX = config('CACHE_KEY_PREFIX', default=f'aritana:{ARITANA_ENV}')
+
+if CACHE_BACKEND in ('redis', 'fakeredis'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'embarcacoes.cache_backends.RedisComFallbackCache',
+            'LOCATION': REDIS_URL,
+            'TIMEOUT': 300,  # 5 minutos
+            'KEY_PREFIX': CACHE_KEY_PREFIX,
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+                # Comprime valores grandes como 'historico_frota' e 'frota'
+                'COMPRESSOR': 'django_redis.compressors.zlib.ZlibCompressor',
+                'SOCKET_CONNECT_TIMEOUT': 1,
+                'SOCKET_TIMEOUT': 1,
+                # Segundos em memória local antes de tentar o Redis novamente
+                'FALLBACK_RETRY_INTERVAL': config('CACHE_FALLBACK_RETRY_INTERVAL', default=30, cast=int),
+                'FALLBACK_MAX_ENTRIES': 1000,
+            }
         }
     }
+    if CACHE_BACKEND == 'fakeredis':
+        import fakeredis
+        CACHES['default']['OPTIONS']['CONNECTION_POOL_KWARGS'] = {
+            'connection_class': fakeredis.FakeConnection,
+        }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unique-snowflake',
+            'TIMEOUT': 300,  # 5 minutos
+            'KEY_PREFIX': CACHE_KEY_PREFIX,
+            'OPTIONS': {
+                'MAX_ENTRIES': 1000,
+            }
+        }
+    }
+
+# Cache L1 em memória do processo na frente do cache compartilhado (ver embarcacoes/cache_camadas.py)
+CACHE_L1_MAX_ITENS = config('CACHE_L1_MAX_ITENS', default=32, cast=int)
+CACHE_L1_TTL = config('CACHE_L1_TTL', default=5, cast=int)  # segundos
+
+# Aquecimento dos caches (ver embarcacoes/aquecimento.py): 'manage.py aquecer_cache' ou,
+# com na_inicializacao, em cada worker ao carregar o wsgi.py; /pronto/ responde 503 até terminar
+ARITANA_AQUECIMENTO = {
+    'na_inicializacao': config('AQUECIMENTO_NA_INICIALIZACAO', default=not DEBUG, cast=bool),
+    'paginas_historico': config('AQUECIMENTO_PAGINAS_HISTORICO', default=3, cast=int),
+    # Host e esquema públicos, usados nas URLs absolutas guardadas no cache do histórico
+    'url_base': config(
+        'AQUECIMENTO_URL_BASE',
+        default='http://localhost:8000' if DEBUG else 'https://aritana-production.up.railway.app',
+    ),
+    'timeout': config('AQUECIMENTO_TIMEOUT', default=120, cast=int),  # segundos até liberar o /pronto/ mesmo assim
 }
 
 # Configuração de Logging simplificada
@@ -177,30 +361,23 @@ LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'handlers': {
-        'console': {
-            'class': 'logging.StreamHandler',
-        },
-        'file': {
-            'class': 'logging.FileHandler',
-            'filename': BASE_DIR / 'logs' / 'django.log',
-            'formatter': 'verbose',
-        },
-    },
-    'formatters': {
-        'verbose': {
-            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
-            'style': '{',
+        # JSON por linha, escrito por uma thread de fundo (ver embarcacoes/registro_logs.py)
+        'fila': {
+            'class': 'embarcacoes.registro_logs.FilaLogHandler',
+            'arquivo': BASE_DIR / 'logs' / 'django.log',
+            'console': True,
+            'tamanho_fila': config('LOG_TAMANHO_FILA', default=10000, cast=int),
+            'max_mensagem': config('LOG_MAX_MENSAGEM', default=2000, cast=int),  # caracteres
         },
     },
     'loggers': {
         'embarcacoes': {
-            'handlers': ['console', 'file'],
             'level': 'INFO',
             'propagate': True,
         },
     },
     'root': {
-        'handlers': ['console'],
+        'handlers': ['fila'],
     },
 }
 
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'aritana_projeto.settings')
 
 application = get_wsgi_application()
+
+# Aquece os caches deste worker em segundo plano (ARITANA_AQUECIMENTO)
+from embarcacoes.aquecimento import iniciar_aquecimento  # noqa: E402
+
+iniciar_aquecimento()
@@ -1,10 +1,18 @@
 from django.contrib import admin
-from .models import Embarcacao, ImagemEmbarcacao, AnaliseRegional
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+from .models import Embarcacao, ImagemEmbarcacao, AnaliseRegional, PerfilRequisicao, StatusAnalise
 
 
 @admin.register(Embarcacao)
 class EmbarcacaoAdmin(admin.ModelAdmin):
-    list_display = ['nome', 'tipo', 'latitude', 'longitude', 'data_registro', 'ativa']
+    list_display = [
+        'nome', 'tipo', 'latitude', 'longitude', 'data_registro', 'ativa',
+        'total_imagens', 'imagens_analisadas', 'imagens_em_processamento', 'imagens_com_erro',
+    ]
     list_filter = ['tipo', 'ativa', 'data_registro']
     search_fields = ['nome', 'descricao']
     list_editable = ['ativa']
@@ -22,26 +30,51 @@ class EmbarcacaoAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+    
+    def get_queryset(self, request):
+        # Contagens de imagens em uma única consulta agrupada (evita 7 consultas por linha)
+        return super().get_queryset(request).com_contagem_imagens()
+    
+    @admin.display(description='Imagens', ordering='qtd_imagens')
+    def total_imagens(self, obj):
+        return obj.total_imagens
+    
+    @admin.display(description='Analisadas', ordering=f'qtd_imagens_{StatusAnalise.ANALISADA}')
+    def imagens_analisadas(self, obj):
+        return obj.get_imagens_por_status()[StatusAnalise.ANALISADA]
+    
+    @admin.display(description='Em processamento')
+    def imagens_em_processamento(self, obj):
+        por_status = obj.get_imagens_por_status()
+        return por_status[StatusAnalise.PENDENTE] + por_status[StatusAnalise.PROCESSANDO]
+    
+    @admin.display(description='Com erro', ordering=f'qtd_imagens_{StatusAnalise.ERRO}')
+    def imagens_com_erro(self, obj):
+        return obj.get_imagens_por_status()[StatusAnalise.ERRO]
 
 
 @admin.register(ImagemEmbarcacao)
 class ImagemEmbarcacaoAdmin(admin.ModelAdmin):
-    list_display = ['embarcacao', 'titulo', 'status_analise', 'data_upload']
-    list_filter = ['status_analise', 'data_upload']
+    list_display = ['embarcacao', 'titulo', 'status_analise', 'classificacao', 'confiabilidade', 'data_upload']
+    list_filter = ['status_analise', 'classificacao', 'regiao', 'data_upload']
     search_fields = ['titulo', 'embarcacao__nome']
-    readonly_fields = ['data_upload']
+    readonly_fields = ['data_upload', 'data_encaminhamento', 'data_inicio_backend', 'data_conclusao', 'data_resultado']
     
     fieldsets = (
         ('Informações da Imagem', {
-            'fields': ('embarcacao', 'imagem', 'titulo', 'descricao')
+            'fields': ('embarcacao', 'imagem', 'titulo', 'descricao', 'regiao')
         }),
         ('Análise', {
-            'fields': ('status_analise',)
+            'fields': ('status_analise', 'classificacao', 'confiabilidade', 'imagem_processada_url')
         }),
         ('Dados do Sistema', {
             'fields': ('data_upload',),
             'classes': ('collapse',)
         }),
+        ('Ciclo de Vida do Job', {
+            'fields': ('data_encaminhamento', 'data_inicio_backend', 'data_conclusao', 'data_resultado'),
+            'classes': ('collapse',)
+        }),
     )
 
 
@@ -74,4 +107,100 @@ class AnaliseRegionalAdmin(admin.ModelAdmin):
     
     def percentual_legal(self, obj):
         return f"{obj.percentual_legal:.1f}%"
-    percentual_legal.short_description = "% Legal"
\ No newline at end of file
+    percentual_legal.short_description = "% Legal"
+
+
+@admin.register(PerfilRequisicao)
+class PerfilRequisicaoAdmin(admin.ModelAdmin):
+    list_display = ['criado_em', 'metodo', 'caminho', 'view', 'status', 'duracao_ms', 'db_queries', 'db_ms', 'motivo']
+    list_filter = ['motivo', 'view', 'status', 'criado_em']
+    search_fields = ['caminho', 'view']
+    date_hierarchy = 'criado_em'
+    
+    fieldsets = (
+        ('Requisição', {
+            'fields': ('criado_em', 'metodo', 'caminho', 'view', 'status', 'motivo', 'download')
+        }),
+        ('Tempos', {
+            'fields': ('duracao_ms', 'db_ms', 'db_queries', 'upstream_formatado')
+        }),
+        ('Funções Mais Custosas', {
+            'fields': ('funcoes_formatadas',)
+        }),
+        ('Queries Mais Lentas', {
+            'fields': ('queries_formatadas',)
+        }),
+        ('Relatório pstats', {
+            'fields': ('relatorio_formatado',),
+            'classes': ('collapse',)
+        }),
+    )
+    readonly_fields = [
+        'criado_em', 'metodo', 'caminho', 'view', 'status', 'motivo', 'download',
+        'duracao_ms', 'db_ms', 'db_queries', 'upstream_formatado',
+        'funcoes_formatadas', 'queries_formatadas', 'relatorio_formatado',
+    ]
+    
+    def get_queryset(self, request):
+        # O .prof pode ter centenas de KB; a listagem não precisa dele
+        return super().get_queryset(request).defer('dados', 'relatorio')
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def get_urls(self):
+        return [
+            path(
+                '<int:pk>/download/',
+                self.admin_site.admin_view(self.baixar_perfil),
+                name='embarcacoes_perfilrequisicao_download',
+            ),
+        ] + super().get_urls()
+    
+    def baixar_perfil(self, request, pk):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        perfil = get_object_or_404(PerfilRequisicao, pk=pk)
+        response = HttpResponse(bytes(perfil.dados), content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="perfil_{perfil.pk}.prof"'
+        return response
+    
+    @admin.display(description='Download')
+    def download(self, obj):
+        url = reverse('admin:embarcacoes_perfilrequisicao_download', args=[obj.pk])
+        return format_html('<a href="{}">perfil_{}.prof</a> (abra com snakeviz ou pstats)', url, obj.pk)
+    
+    @admin.display(description='API externa')
+    def upstream_formatado(self, obj):
+        if not obj.upstream:
+            return '-'
+        return format_html_join(
+            ', ', '{}: {} chamada(s), {} ms',
+            ((nome, dados['chamadas'], dados['ms']) for nome, dados in obj.upstream.items()),
+        )
+    
+    @admin.display(description='Funções')
+    def funcoes_formatadas(self, obj):
+        linhas = format_html_join(
+            '', '<tr><td>{}</td><td>{}</td><td>{}</td><td><code>{}</code></td></tr>',
+            ((f['acumulado_ms'], f['proprio_ms'], f['chamadas'], f['funcao']) for f in obj.funcoes),
+        )
+        return format_html(
+            '<table><tr><th>Acumulado (ms)</th><th>Próprio (ms)</th><th>Chamadas</th><th>Função</th></tr>{}</table>',
+            linhas,
+        )
+    
+    @admin.display(description='Queries')
+    def queries_formatadas(self, obj):
+        linhas = format_html_join(
+            '', '<tr><td>{}</td><td><code>{}</code></td></tr>',
+            ((q['ms'], q['sql']) for q in obj.queries),
+        )
+        return format_html('<table><tr><th>ms</th><th>SQL</th></tr>{}</table>', linhas)
+    
+    @admin.display(description='Relatório')
+    def relatorio_formatado(self, obj):
+        return format_html('<pre>{}</pre>', obj.relatorio)
@@ -0,0 +1,83 @@
+"""
+Relatório do ciclo de vida dos jobs de análise
+
+Usa os instantes gravados em ImagemEmbarcacao para separar o tempo de um job
+em etapas (envio ao backend, fila, inferência, busca do resultado) e calcula
+percentis e vazão por hora e por região, para dimensionar o backend.
+"""
+from collections import defaultdict
+
+from django.utils import timezone
+
+from .latencia import percentil
+from .models import ImagemEmbarcacao, StatusAnalise
+
+# etapa -> (instante inicial, instante final)
+ETAPAS = {
+    'envio': ('data_upload', 'data_encaminhamento'),
+    'fila': ('data_encaminhamento', 'data_inicio_backend'),
+    'inferencia': ('data_inicio_backend', 'data_conclusao'),
+    'busca_resultado': ('data_conclusao', 'data_resultado'),
+    'total': ('data_upload', 'data_conclusao'),
+}
+
+CAMPOS = [
+    'data_upload', 'data_encaminhamento', 'data_inicio_backend',
+    'data_conclusao', 'data_resultado', 'status_analise', 'regiao',
+]
+
+SEM_REGIAO = '(sem região)'
+
+
+def percentis(valores):
+    """n, p50, p90, p99 e máximo (em segundos) de uma lista de durações"""
+    if not valores:
+        return {'n': 0, 'p50': None, 'p90': None, 'p99': None, 'max': None}
+    return {
+        'n': len(valores),
+        **{f'p{q}': round(percentil(valores, q), 3) for q in (50, 90, 99)},
+        'max': round(max(valores), 3),
+    }
+
+
+def relatorio_ciclo_jobs(horas=24):
+    """Percentis por etapa e vazão por hora/região dos jobs concluídos nas últimas 'horas'"""
+    desde = timezone.now() - timezone.timedelta(hours=horas)
+    jobs = ImagemEmbarcacao.objects.filter(data_conclusao__gte=desde).values(*CAMPOS).order_by()
+
+    duracoes = defaultdict(list)
+    por_hora = defaultdict(lambda: {'concluidos': 0, 'erros': 0})
+    por_regiao = defaultdict(lambda: {'concluidos': 0, 'erros': 0, 'total': []})
+
+    for job in jobs.iterator():
+        for etapa, (inicio, fim) in ETAPAS.items():
+            if job[inicio] and job[fim]:
+                duracoes[etapa].append((job[fim] - job[inicio]).total_seconds())
+
+        erro = job['status_analise'] == StatusAnalise.ERRO
+        hora = timezone.localtime(job['data_conclusao']).replace(minute=0, second=0, microsecond=0)
+        regiao = por_regiao[job['regiao'] or SEM_REGIAO]
+        for grupo in (por_hora[hora], regiao):
+            grupo['erros' if erro else 'concluidos'] += 1
+        if not erro and job['data_upload']:
+            regiao['total'].append((job['data_conclusao'] - job['data_upload']).total_seconds())
+
+    return {
+        'horas': horas,
+        'desde': desde.isoformat(),
+        'etapas': {etapa: percentis(duracoes[etapa]) for etapa in ETAPAS},
+        'por_hora': [
+            {'hora': hora.isoformat(), **contagem}
+            for hora, contagem in sorted(por_hora.items())
+        ],
+        'por_regiao': [
+            {
+                'regiao': regiao,
+                'concluidos': dados['concluidos'],
+                'erros': dados['erros'],
+                'por_hora': round((dados['concluidos'] + dados['erros']) / horas, 2),
+                'total': percentis(dados['total']),
+            }
+            for regiao, dados in sorted(por_regiao.items())
+        ],
+    }
@@ -9,9 +9,27 @@ from django.conf import settings
 from django.core.cache import cache
 from django.utils import timezone
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FuturesTimeout
+
+from .cache_camadas import cache_quente
+from .circuit_breaker import CircuitoAberto, criar_circuitos
+from .frota import FrotaCompacta
+from .gravacao_api import criar_sessao
+from .instrumentacao import registrar_upstream
+from .latencia import atraso_backoff, criar_monitor_latencia, criar_orcamento_retry
+from .metricas import medir_metodo_api, metodo_api_atual, metricas
+from .registro_logs import resumir
 
 logger = logging.getLogger(__name__)
 
+# Cópia da frota mantida por mais tempo para servir durante quedas da API
+CHAVE_CONTINGENCIA = 'frota_contingencia'
+TEMPO_CONTINGENCIA = 24 * 60 * 60
+
+# Threads para requisições duplicadas (hedged requests) de GETs lentos
+_executor_hedge = ThreadPoolExecutor(max_workers=8, thread_name_prefix='aritana-hedge')
+
 
 class AritanaAPIClient:
     """
@@ -27,44 +45,149 @@ class AritanaAPIClient:
             "Authorization": f"Bearer {settings.ARITANA_API_KEY}",
             "Content-Type": "application/json"
         }
-        self.timeout = 5  # Reduzido para 5 segundos
         self.max_retries = 2
-        logger.info(f"Cliente API inicializado - URL: {self.base_url}")
+        # Um circuit breaker por endpoint externo (o /ping fica de fora)
+        self.circuitos = criar_circuitos(['embarcacoes', 'upload', 'jobs', 'resultado'])
+        # Timeouts derivados da latência observada e orçamento global de retries
+        self.latencias = criar_monitor_latencia()
+        self.orcamento_retry = criar_orcamento_retry()
+        self.hedge_habilitado = getattr(settings, 'ARITANA_HEDGE_REQUESTS', False)
+        # Conexões reaproveitadas entre chamadas; grava/reproduz o tráfego se configurado
+        self.session = criar_sessao()
+        logger.info("Cliente API inicializado - URL: %s", self.base_url)
     
-    def _make_request(self, url, retries=0, method='GET', **kwargs):
-        """Faz requisição com retry automático"""
+    @staticmethod
+    def _falha_do_servidor(erro):
+        """Timeouts, falhas de conexão e respostas 5xx indicam backend com problema"""
+        resposta = getattr(erro, 'response', None)
+        return resposta is None or resposta.status_code >= 500
+    
+    def _requisitar(self, circuito, method, url, **kwargs):
+        """
+        Executa a requisição HTTP através do circuit breaker do endpoint
+        
+        Lança CircuitoAberto (uma RequestException) sem tocar a rede se o
+        circuito estiver aberto, para que os chamadores caiam no cache.
+        Sem 'timeout' explícito, usa o timeout adaptativo do endpoint.
+        """
+        breaker = self.circuitos[circuito]
+        if not breaker.permitir():
+            raise CircuitoAberto(f"Circuito '{circuito}' aberto - chamada para {url} ignorada")
+        
+        kwargs.setdefault('timeout', self.latencias.timeout(circuito))
+        inicio = time.monotonic()
         try:
-            if method.upper() == 'GET':
-                response = requests.get(url, headers=self.headers, timeout=self.timeout)
-            elif method.upper() == 'POST':
-                response = requests.post(url, headers=self.headers, timeout=self.timeout, **kwargs)
+            if method == 'GET' and self.hedge_habilitado:
+                response = self._requisitar_com_hedge(circuito, method, url, **kwargs)
             else:
-                response = requests.request(method, url, headers=self.headers, timeout=self.timeout, **kwargs)
-            
+                response = self.session.request(method, url, **kwargs)
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.Timeout:
-            if retries < self.max_retries:
-                logger.warning(f"Timeout na requisição, tentando novamente ({retries + 1}/{self.max_retries})")
-                time.sleep(1)  # Aguarda 1 segundo antes de tentar novamente
-                return self._make_request(url, retries + 1, method, **kwargs)
+        except requests.exceptions.RequestException as e:
+            duracao = time.monotonic() - inicio
+            if self._falha_do_servidor(e):
+                breaker.registrar_falha(duracao)
             else:
-                logger.error(f"Timeout após {self.max_retries} tentativas")
+                breaker.registrar_sucesso(duracao)
+            # Timeout entra na janela como amostra censurada (a latência real é
+            # pelo menos a duração): sem ela o p99 nunca sobe e o timeout não se adapta
+            if getattr(e, 'response', None) is not None or isinstance(e, requests.exceptions.Timeout):
+                self.latencias.registrar(circuito, duracao)
+            self._registrar_chamada(circuito, duracao, 'erro')
+            raise
+        
+        duracao = time.monotonic() - inicio
+        breaker.registrar_sucesso(duracao)
+        self.latencias.registrar(circuito, duracao)
+        self._registrar_chamada(circuito, duracao, 'ok')
+        return response
+    
+    @staticmethod
+    def _registrar_chamada(circuito, duracao, resultado):
+        """Registra a chamada no Server-Timing da requisição e nas métricas"""
+        registrar_upstream(circuito, duracao)
+        metricas.observar(
+            'aritana_upstream_duration_seconds', duracao,
+            metodo=metodo_api_atual(), endpoint=circuito, resultado=resultado,
+        )
+    
+    def _requisitar_com_hedge(self, circuito, method, url, **kwargs):
+        """
+        Envia uma segunda requisição idêntica se a primeira passar do p95
+        
+        Só deve ser usado em requisições idempotentes (GET). A cópia consome
+        o orçamento de retries e vence a resposta que chegar primeiro.
+        """
+        p95 = self.latencias.percentil(circuito, 95)
+        primeira = _executor_hedge.submit(self.session.request, method, url, **kwargs)
+        if p95 is None:
+            return primeira.result()
+        
+        try:
+            return primeira.result(timeout=p95)
+        except FuturesTimeout:
+            pass
+        
+        if not self.orcamento_retry.retirar():
+            return primeira.result()
+        
+        logger.info("Requisição para %s passou do p95 (%.2fs) - enviando requisição duplicada", url, p95)
+        pendentes = {primeira, _executor_hedge.submit(self.session.request, method, url, **kwargs)}
+        erro = None
+        while pendentes:
+            prontas, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+            for futura in prontas:
+                try:
+                    return futura.result()
+                except requests.exceptions.RequestException as e:
+                    erro = e
+        raise erro
+    
+    def _make_request(self, url, method='GET', circuito='embarcacoes', **kwargs):
+        """Faz requisição com retry (backoff exponencial com jitter e orçamento global)"""
+        self.orcamento_retry.depositar()
+        for tentativa in range(self.max_retries + 1):
+            try:
+                response = self._requisitar(
+                    circuito, method.upper(), url,
+                    headers=self.headers, **kwargs
+                )
+                return response.json()
+            except CircuitoAberto as e:
+                logger.warning("%s", e)
                 return None
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Erro na requisição: {str(e)}")
-            return None
+            except requests.exceptions.RequestException as e:
+                if not self._falha_do_servidor(e) or tentativa == self.max_retries:
+                    logger.error("Erro na requisição após %d tentativa(s): %s", tentativa + 1, e)
+                    return None
+                if not self.orcamento_retry.retirar():
+                    logger.warning("Orçamento de retries esgotado - desistindo: %s", e)
+                    return None
+                atraso = atraso_backoff(tentativa)
+                logger.warning(
+                    "Falha na requisição (%s), tentando novamente em %.2fs (%d/%d)",
+                    e, atraso, tentativa + 1, self.max_retries,
+                )
+                time.sleep(atraso)
+    
+    def status_latencias(self):
+        """Percentis de latência e timeout atual de cada endpoint"""
+        return self.latencias.resumo()
+    
+    def status_circuitos(self):
+        """Estado atual dos circuit breakers de cada endpoint"""
+        return [breaker.status() for breaker in self.circuitos.values()]
 
+    @medir_metodo_api
     def get_dados_embarcacoes(self):
         """
         Busca dados das embarcações da API externa com cache
         
         Returns:
-            dict: Dados das embarcações ou None se erro
+            dict: {'embarcacoes': FrotaCompacta} ou None se erro
         """
         # Verificar cache primeiro
-        cache_key = 'dados_embarcacoes'
-        dados_cache = cache.get(cache_key)
+        cache_key = 'frota'
+        dados_cache = cache_quente.get(cache_key)
         if dados_cache:
             logger.info("Retornando dados do cache")
             return dados_cache
@@ -74,34 +197,44 @@ class AritanaAPIClient:
         
         try:
             # Buscar primeira página (limit=100)
-            logger.info(f"Buscando dados de embarcações: {endpoint}")
+            logger.info("Buscando dados de embarcações: %s", endpoint)
             dados_pagina1 = self._make_request(f"{self.base_url}{endpoint}?limit=100")
             
             if dados_pagina1 is None:
-                return None
+                return self._dados_contingencia()
                 
             todas_embarcacoes.extend(dados_pagina1)
-            logger.info(f"Primeira página: {len(dados_pagina1)} embarcações")
+            logger.info("Primeira página: %d embarcações", len(dados_pagina1))
             
             # Buscar segunda página se necessário
             if len(dados_pagina1) == 100:
                 dados_pagina2 = self._make_request(f"{self.base_url}{endpoint}?skip=100&limit=100")
                 if dados_pagina2:
                     todas_embarcacoes.extend(dados_pagina2)
-                    logger.info(f"Segunda página: {len(dados_pagina2)} embarcações")
+                    logger.info("Segunda página: %d embarcações", len(dados_pagina2))
             
-            # Retornar no formato esperado
-            dados = {'embarcacoes': todas_embarcacoes}
+            # Retornar no formato esperado, com a frota guardada por colunas
+            dados = {'embarcacoes': FrotaCompacta(todas_embarcacoes)}
             
             # Cachear por 10 minutos (aumentado para melhor performance)
-            cache.set(cache_key, dados, 600)
-            logger.info(f"Total de embarcações carregadas: {len(todas_embarcacoes)}")
+            cache_quente.set(cache_key, dados, 600)
+            # Cópia de longa duração servida enquanto a API estiver fora
+            cache.set(CHAVE_CONTINGENCIA, dados, TEMPO_CONTINGENCIA)
+            logger.info("Total de embarcações carregadas: %d", len(todas_embarcacoes))
             return dados
             
         except Exception as e:
-            logger.error(f"Erro ao buscar dados de embarcações: {str(e)}")
-            return None
+            logger.error("Erro ao buscar dados de embarcações: %s", e)
+            return self._dados_contingencia()
+    
+    def _dados_contingencia(self):
+        """Última frota obtida com sucesso, usada quando a API não responde"""
+        dados = cache.get(CHAVE_CONTINGENCIA)
+        if dados:
+            logger.warning("API indisponível - servindo última cópia conhecida das embarcações")
+        return dados
     
+    @medir_metodo_api
     def enviar_imagem_para_analise(self, imagem_data, titulo=None, descricao=None, regiao=None, localidade=None, latitude=None, longitude=None, data_foto=None):
         """Envia imagem para análise na API FastAPI com YOLO"""
         # URL da nova API FastAPI de processamento de imagens
@@ -124,40 +257,45 @@ class AritanaAPIClient:
                 'descricao': descricao or '',
             }
             
-            logger.info(f"Dados para API YOLO: {data}")
+            logger.info("Dados para API YOLO: %s", resumir(data))
             
             headers = {"Authorization": f"Bearer {settings.ARITANA_API_KEY}"}
             
-            response = requests.post(
+            response = self._requisitar(
+                'upload', 'POST',
                 f"{fastapi_url}{endpoint}",
                 files=files,
                 data=data,
                 headers=headers,
-                timeout=180  # 3 minutos para imagens grandes (até 20MB)
             )
-            response.raise_for_status()
             
             resultado = response.json()
-            logger.info(f"Resposta da API: {resultado}")
+            logger.info("Resposta da API: %s", resumir(resultado))
             
             # A API pode retornar 'id' ou 'job_id' - normalizar
             if 'id' in resultado and 'job_id' not in resultado:
                 resultado['job_id'] = str(resultado['id'])
-                logger.info(f"Convertendo 'id' para 'job_id': {resultado['job_id']}")
+                logger.info("Convertendo 'id' para 'job_id': %s", resultado['job_id'])
             
-            # Invalidar cache após nova análise
-            cache.delete('dados_embarcacoes')
-            cache.delete('estatisticas_regionais')
+            # Invalidar cache após nova análise (em todos os workers)
+            cache_quente.invalidar()
             
-            logger.info(f"Imagem enviada para processamento. Job ID: {resultado.get('job_id')}")
+            logger.info("Imagem enviada para processamento. Job ID: %s", resultado.get('job_id'))
             return resultado
             
         except requests.exceptions.RequestException as e:
-            logger.error(f"Erro ao enviar imagem para análise: {e}")
+            logger.error("Erro ao enviar imagem para análise: %s", e)
             return None
     
+    @medir_metodo_api
     def verificar_status_job(self, job_id, status_url=None):
-        """Verifica o status de um job de processamento usando URL da API"""
+        """
+        Verifica o status de um job de processamento usando URL da API
+
+        Retorna None se a consulta falhar. Com o circuito 'jobs' aberto lança
+        CircuitoAberto: o backend nem foi consultado, e o chamador não deve
+        contar isso como tentativa do job.
+        """
         try:
             headers = {"Authorization": f"Bearer {settings.ARITANA_API_KEY}"}
             
@@ -165,25 +303,27 @@ class AritanaAPIClient:
             if status_url:
                 # Corrigir http:// para https:// (a API retorna http mas deveria ser https)
                 url = status_url.replace('http://', 'https://')
-                logger.info(f"Usando status_url da API (corrigido para HTTPS): {url}")
+                logger.info("Usando status_url da API (corrigido para HTTPS): %s", url)
             else:
                 fastapi_url = getattr(settings, 'FASTAPI_YOLO_URL', 'https://backend-segura-production.up.railway.app')
                 url = f"{fastapi_url}/jobs/{job_id}"
-                logger.info(f"Construindo URL manualmente: {url}")
+                logger.info("Construindo URL manualmente: %s", url)
             
-            response = requests.get(
+            response = self._requisitar(
+                'jobs', 'GET',
                 url,
                 headers=headers,
-                timeout=15
             )
-            response.raise_for_status()
             
             return response.json()
             
+        except CircuitoAberto:
+            raise
         except requests.exceptions.RequestException as e:
-            logger.error(f"Erro ao verificar status do job {job_id}: {e}")
+            logger.error("Erro ao verificar status do job %s: %s", job_id, e)
             return None
     
+    @medir_metodo_api
     def obter_resultado_processamento(self, resource_id):
         """Obtém o resultado final do processamento"""
         fastapi_url = getattr(settings, 'FASTAPI_YOLO_URL', 'https://backend-segura-production.up.railway.app')
@@ -192,29 +332,28 @@ class AritanaAPIClient:
         try:
             headers = {"Authorization": f"Bearer {settings.ARITANA_API_KEY}"}
             
-            response = requests.get(
+            response = self._requisitar(
+                'resultado', 'GET',
                 f"{fastapi_url}{endpoint}",
                 headers=headers,
-                timeout=15
             )
-            response.raise_for_status()
             
             resultado = response.json()
-            logger.info(f"Resultado do processamento (ID {resource_id}): {resultado}")
+            logger.info("Resultado do processamento (ID %s): %s", resource_id, resumir(resultado))
             
             # A API retorna sempre uma lista - pegar primeiro item
             if isinstance(resultado, list):
                 if len(resultado) > 0:
                     return resultado[0]
                 else:
-                    logger.warning(f"API retornou lista vazia para resource_id={resource_id}")
+                    logger.warning("API retornou lista vazia para resource_id=%s", resource_id)
                     return None
             
             # Se retornou objeto único, retornar diretamente
             return resultado
             
         except requests.exceptions.RequestException as e:
-            logger.error(f"Erro ao obter resultado do processamento {resource_id}: {e}")
+            logger.error("Erro ao obter resultado do processamento %s: %s", resource_id, e)
             return None
     
     def verificar_saude_api(self):
@@ -228,7 +367,7 @@ class AritanaAPIClient:
         endpoint = '/ping'
         
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{fastapi_url}{endpoint}",
                 timeout=5  # Timeout curto para health check
             )
@@ -245,21 +384,22 @@ class AritanaAPIClient:
                 
                 return is_healthy
             else:
-                logger.warning(f"[AVISO] API FastAPI retornou status {response.status_code}")
+                logger.warning("[AVISO] API FastAPI retornou status %s", response.status_code)
                 return False
             
         except requests.exceptions.Timeout:
             logger.error("[ERRO] Timeout ao verificar saude da API FastAPI")
             return False
         except requests.exceptions.RequestException as e:
-            logger.error(f"[ERRO] Erro ao verificar saude da API FastAPI: {e}")
+            logger.error("[ERRO] Erro ao verificar saude da API FastAPI: %s", e)
             return False
     
+    @medir_metodo_api
     def get_estatisticas_regionais(self):
         """Busca estatísticas regionais da API externa com cache"""
         # Verificar cache primeiro
         cache_key = 'estatisticas_regionais'
-        estatisticas_cache = cache.get(cache_key)
+        estatisticas_cache = cache_quente.get(cache_key)
         if estatisticas_cache:
             logger.info("Retornando estatísticas do cache")
             return estatisticas_cache
@@ -271,20 +411,19 @@ class AritanaAPIClient:
         if not dados_embarcacoes or 'embarcacoes' not in dados_embarcacoes:
             return None
         
-        embarcacoes = dados_embarcacoes['embarcacoes']
+        frota = dados_embarcacoes['embarcacoes']
         
-        # Calcular estatísticas (API usa 'classificacao' com 'c')
-        legais = len([e for e in embarcacoes if e.get('classificacao', '').lower() == 'legal'])
-        ilegais = len([e for e in embarcacoes if e.get('classificacao', '').lower() == 'ilegal'])
+        # Calcular estatísticas (API usa 'classificacao' com 'c'), direto nas colunas
+        classificacoes = [c.lower() for c in frota.coluna('classificacao', '')]
+        legais = classificacoes.count('legal')
+        ilegais = classificacoes.count('ilegal')
         
         # Agrupar por região
         regioes = {}
-        for embarcacao in embarcacoes:
-            regiao = embarcacao.get('regiao', 'Desconhecida')
+        for regiao, classificacao in zip(frota.coluna('regiao', 'Desconhecida'), classificacoes):
             if regiao not in regioes:
                 regioes[regiao] = {'legais': 0, 'ilegais': 0}
             
-            classificacao = embarcacao.get('classificacao', '').lower()
             if classificacao == 'legal':
                 regioes[regiao]['legais'] += 1
             elif classificacao == 'ilegal':
@@ -304,8 +443,8 @@ class AritanaAPIClient:
         }
         
         # Cachear por 5 minutos
-        cache.set(cache_key, estatisticas, 300)
-        logger.info(f"Estatísticas calculadas: {estatisticas}")
+        cache_quente.set(cache_key, estatisticas, 300)
+        logger.info("Estatísticas calculadas: %s", resumir(estatisticas))
         return estatisticas
 
 
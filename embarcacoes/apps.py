@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete
 
 
 class EmbarcacoesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'embarcacoes'
+
+    def ready(self):
+        from .db import configurar_conexao
+        connection_created.connect(configurar_conexao, dispatch_uid='embarcacoes_configurar_conexao')
+
+        from .historico_delta import registrar_remocao
+        from .models import ImagemEmbarcacao
+        post_delete.connect(registrar_remocao, sender=ImagemEmbarcacao, dispatch_uid='embarcacoes_registrar_remocao')
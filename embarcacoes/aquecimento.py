@@ -0,0 +1,146 @@
+"""
+Aquecimento dos caches após deploy ou reinício
+
+Sem aquecimento, os primeiros visitantes do dashboard, do histórico e do mapa
+pagam a busca da frota na API externa e a montagem dos payloads com os caches
+vazios. aquecer() faz essas requisições antes do tráfego, chamando as
+próprias views (RequestFactory, sem middleware), e mede cada etapa:
+
+- frota e estatísticas regionais da API (cache do api_client);
+- respostas do mapa, dos gráficos e do /api/cache/ já serializadas;
+- dashboard, com as contagens da frota no fragmento em cache;
+- histórico mesclado com os uploads locais e as primeiras páginas do
+  /api/historico/.
+
+O comando 'aquecer_cache' roda as etapas em um processo à parte e preenche o
+L2 compartilhado. Com ARITANA_AQUECIMENTO['na_inicializacao'], cada worker se
+aquece em segundo plano ao carregar o wsgi.py (L1, templates compilados,
+conexões) e o /pronto/ responde 503 até terminar.
+"""
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import connections
+from django.test import RequestFactory
+
+from .api_client import api_client
+
+logger = logging.getLogger(__name__)
+
+# Estado do aquecimento neste processo; 'desativado' conta como pronto
+_estado = {'situacao': 'desativado', 'inicio': None, 'fim': None, 'etapas': []}
+_lock = threading.Lock()
+
+
+def configuracao():
+    return getattr(settings, 'ARITANA_AQUECIMENTO', {})
+
+
+def _requisicao(caminho):
+    """
+    GET com o host e o esquema públicos: o histórico em cache guarda URLs
+    absolutas das imagens montadas a partir da requisição
+    """
+    url_base = urlsplit(configuracao().get('url_base', 'http://localhost:8000'))
+    fabrica = RequestFactory(HTTP_HOST=url_base.netloc, HTTP_X_FORWARDED_PROTO=url_base.scheme)
+    return fabrica.get(caminho, secure=url_base.scheme == 'https')
+
+
+def _etapas(paginas_historico):
+    """(nome, função) na ordem de execução; a função devolve True se deu certo"""
+    from . import views
+
+    def view(funcao, caminho):
+        return lambda: funcao(_requisicao(caminho)).status_code < 400
+
+    etapas = [
+        ('frota', lambda: api_client.get_dados_embarcacoes() is not None),
+        ('estatisticas', lambda: api_client.get_estatisticas_regionais() is not None),
+        ('mapa', view(views.dados_mapa_json, '/api/mapa/')),
+        ('graficos', view(views.dados_graficos_json, '/api/graficos/')),
+        ('cache_navegacao', view(views.dados_cache_json, '/api/cache/')),
+        ('dashboard', view(views.dashboard, '/dashboard/')),
+        ('historico', view(views.historico, '/historico/')),
+    ]
+    for pagina in range(1, paginas_historico + 1):
+        etapas.append((
+            f'historico_pagina_{pagina}',
+            view(views.historico_ajax, f'/api/historico/?page={pagina}&page_size=20'),
+        ))
+    return etapas
+
+
+def aquecer(paginas_historico=None):
+    """
+    Executa todas as etapas, mesmo se alguma falhar, e devolve a lista de
+    {'etapa', 'segundos', 'ok', 'erro'}
+    """
+    if paginas_historico is None:
+        paginas_historico = configuracao().get('paginas_historico', 3)
+
+    resultados = []
+    for nome, executar in _etapas(paginas_historico):
+        inicio = time.perf_counter()
+        erro = None
+        try:
+            ok = executar()
+        except Exception as e:
+            ok = False
+            erro = str(e)
+        segundos = round(time.perf_counter() - inicio, 3)
+
+        resultados.append({'etapa': nome, 'segundos': segundos, 'ok': ok, 'erro': erro})
+        logger.info("Aquecimento: %s em %.3fs (%s)", nome, segundos, 'ok' if ok else 'falhou', extra={'dados': {
+            'evento': 'aquecimento',
+            'etapa': nome,
+            'segundos': segundos,
+            'ok': ok,
+            'erro': erro,
+        }})
+    return resultados
+
+
+def _aquecer_em_segundo_plano():
+    try:
+        etapas = aquecer()
+    except Exception as e:
+        logger.error("Falha no aquecimento dos caches: %s", e)
+        etapas = []
+    finally:
+        connections.close_all()  # conexões desta thread
+
+    # Falhas não seguram o worker fora do balanceador: as views já lidam com
+    # a API fora do ar (contingência ou dados vazios)
+    with _lock:
+        _estado.update(situacao='pronto', fim=time.time(), etapas=etapas)
+    falhas = sum(not etapa['ok'] for etapa in etapas)
+    logger.info("Aquecimento concluído em %.2fs (%d etapas, %d falhas)",
+                _estado['fim'] - _estado['inicio'], len(etapas), falhas)
+
+
+def iniciar_aquecimento():
+    """Chamado pelo wsgi.py: aquece este worker em segundo plano, se habilitado"""
+    if not configuracao().get('na_inicializacao', False):
+        return
+    with _lock:
+        if _estado['situacao'] != 'desativado':
+            return
+        _estado.update(situacao='aquecendo', inicio=time.time())
+    threading.Thread(target=_aquecer_em_segundo_plano, name='aquecimento-cache', daemon=True).start()
+
+
+def estado_aquecimento():
+    """
+    Estado para o /pronto/. Um aquecimento que passa do timeout libera o
+    worker mesmo assim, para uma API externa travada não derrubar o site
+    """
+    with _lock:
+        estado = dict(_estado)
+    decorrido = time.time() - estado['inicio'] if estado['inicio'] else 0
+    if estado['situacao'] == 'aquecendo' and decorrido > configuracao().get('timeout', 120):
+        estado['situacao'] = 'expirado'
+    estado['pronto'] = estado['situacao'] != 'aquecendo'
+    return estado
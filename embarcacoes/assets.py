@@ -0,0 +1,84 @@
+"""
+Pipeline de arquivos estáticos
+
+Os templates incluem CSS/JS com {% assets_css %} / {% assets_js %}
+(templatetags/assets.py), pelo nome de um bundle de ARITANA_ASSETS['bundles']:
+
+- em desenvolvimento (usar_bundles=False) cada arquivo de origem do bundle
+  é incluído separadamente, sem build;
+- em produção o comando montar_assets concatena e minifica cada bundle em
+  ARITANA_ASSETS['diretorio'], e o collectstatic (ArmazenamentoEstatico)
+  grava os arquivos com o hash do conteúdo no nome, mais as versões .gz e
+  .br. O WhiteNoise serve os nomes com hash com Cache-Control immutable.
+
+Os scripts de um bundle rodam na ordem da lista, como rodariam scripts
+'defer' separados.
+"""
+import logging
+from pathlib import Path
+
+import rcssmin
+import rjsmin
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+logger = logging.getLogger(__name__)
+
+
+def configuracao():
+    return getattr(settings, 'ARITANA_ASSETS', {})
+
+
+def usar_bundles():
+    return configuracao().get('usar_bundles', False)
+
+
+def arquivos_do_bundle(nome):
+    """Arquivos de origem do bundle, na ordem de execução"""
+    try:
+        return configuracao()['bundles'][nome]
+    except KeyError:
+        raise ValueError(f'Bundle de assets desconhecido: {nome}')
+
+
+def minificar(nome, conteudo):
+    """Minifica CSS ou JS conforme a extensão, preservando comentários /*! de licença */"""
+    if nome.endswith('.css'):
+        return rcssmin.cssmin(conteudo, keep_bang_comments=True)
+    return rjsmin.jsmin(conteudo, keep_bang_comments=True)
+
+
+def montar_bundle(nome):
+    """Conteúdo minificado do bundle, a partir dos arquivos de origem achados pelos finders"""
+    partes = []
+    for origem in arquivos_do_bundle(nome):
+        caminho = finders.find(origem)
+        if caminho is None:
+            raise FileNotFoundError(f'Arquivo {origem} do bundle {nome} não encontrado nos diretórios estáticos')
+        partes.append(minificar(nome, Path(caminho).read_text(encoding='utf-8')))
+    # ';' isola scripts que terminam sem ponto e vírgula
+    return ('\n' if nome.endswith('.css') else '\n;\n').join(partes)
+
+
+class ArmazenamentoEstatico(CompressedManifestStaticFilesStorage):
+    """
+    Nomes com hash e .gz/.br do WhiteNoise, mantendo sem hash as referências
+    a arquivos inexistentes em vez de abortar o collectstatic: os @font-face
+    de ../webfonts/ do font-awesome.min.css (substituídos pelo
+    font-awesome-fix.css) e os sourceMappingURL de bibliotecas sem o .map
+
+    Sem manifest (collectstatic não rodou, ex.: testes) as URLs saem sem hash
+    em vez de derrubar a página.
+    """
+
+    manifest_strict = False
+
+    def hashed_name(self, name, content=None, filename=None):
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            if content is not None:
+                raise
+            logger.debug("Arquivo estático sem hash (inexistente ou sem manifest): %s", name)
+            return name
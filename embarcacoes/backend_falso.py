@@ -0,0 +1,265 @@
+"""
+Backend falso da API de inferência, para testes de carga e de falhas locais
+
+Implementa os endpoints usados pelo AritanaAPIClient:
+
+- GET  /embarcacoes?skip=&limit=   frota paginada
+- GET  /embarcacoes?id=N           lista com o registro N (ou vazia)
+- POST /embarcacoes                upload multipart; enfileira um job
+- GET  /jobs/<id>                  status/progresso do job
+- GET  /ping                       {"message": "pong"}
+
+Os jobs são processados por 'workers' threads com tempo de inferência
+sorteado; a fila tem tamanho máximo e, cheia, o upload responde 503. Cada
+requisição sofre a latência configurada e pode falhar (503) ou ter a conexão
+derrubada conforme as taxas informadas.
+
+O upload não devolve status_url: o cliente trocaria http:// por https://,
+então ele monta /jobs/<id> a partir de FASTAPI_YOLO_URL.
+"""
+import json
+import logging
+import math
+import queue
+import random
+import threading
+import time
+import uuid
+from datetime import timedelta
+from email.parser import BytesParser
+from email.policy import default as politica_email
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from django.utils import timezone
+
+from .models import Regiao
+
+logger = logging.getLogger(__name__)
+
+# PNG 1x1 servido em /imagens/ para as miniaturas do histórico
+PNG_1X1 = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082'
+)
+
+
+def criar_distribuicao(especificacao, rng):
+    """
+    Converte 'tipo:param[:param]' em uma função que sorteia segundos
+
+    fixa:0.05 | uniforme:0.01:0.2 | normal:media:desvio |
+    lognormal:mediana:sigma | exponencial:media
+    """
+    tipo, *params = especificacao.split(':')
+    valores = [float(p) for p in params]
+    if tipo == 'fixa':
+        return lambda: valores[0]
+    if tipo == 'uniforme':
+        return lambda: rng.uniform(valores[0], valores[1])
+    if tipo == 'normal':
+        return lambda: max(0.0, rng.gauss(valores[0], valores[1]))
+    if tipo == 'lognormal':
+        return lambda: rng.lognormvariate(math.log(valores[0]), valores[1])
+    if tipo == 'exponencial':
+        return lambda: rng.expovariate(1 / valores[0])
+    raise ValueError(f"Distribuição desconhecida: {especificacao}")
+
+
+class BackendFalso:
+    """Estado do backend: frota, jobs e fila de inferência"""
+
+    def __init__(self, frota=250, latencia='fixa:0', latencia_upload='fixa:0',
+                 tempo_inferencia='uniforme:2:8', workers=2, fila_maxima=50,
+                 taxa_erro=0.0, taxa_queda=0.0, taxa_falha_job=0.0, semente=None):
+        self.rng = random.Random(semente)
+        self.latencia = criar_distribuicao(latencia, self.rng)
+        self.latencia_upload = criar_distribuicao(latencia_upload, self.rng)
+        self.tempo_inferencia = criar_distribuicao(tempo_inferencia, self.rng)
+        self.taxa_erro = taxa_erro
+        self.taxa_queda = taxa_queda
+        self.taxa_falha_job = taxa_falha_job
+        self.url_base = ''
+
+        self._lock = threading.Lock()
+        self._frota = {}
+        self._jobs = {}
+        self._fila = queue.Queue(maxsize=fila_maxima)
+        for _ in range(frota):
+            self._criar_registro({})
+        for _ in range(workers):
+            threading.Thread(target=self._processar_fila, daemon=True).start()
+
+    def _criar_registro(self, campos):
+        with self._lock:
+            novo_id = len(self._frota) + 1
+            regiao = campos.get('regiao') or self.rng.choice(Regiao.labels)
+            # Frota inicial com datas espalhadas nos últimos 90 dias; uploads com a data atual
+            cadastro = timezone.now()
+            if not campos:
+                cadastro -= timedelta(minutes=self.rng.randint(0, 60 * 24 * 90))
+            registro = {
+                'id': novo_id,
+                'titulo': campos.get('titulo') or f'Embarcação {novo_id}',
+                'descricao': campos.get('descricao', ''),
+                'localidade': campos.get('localidade') or regiao,
+                'regiao': regiao,
+                'classificacao': self.rng.choice(['legal', 'legal', 'legal', 'ilegal']),
+                'confianca': round(self.rng.uniform(55, 99), 2),
+                'latitude': float(campos.get('latitude') or round(self.rng.uniform(-1.6, -1.1), 6)),
+                'longitude': float(campos.get('longitude') or round(self.rng.uniform(-48.6, -48.3), 6)),
+                'data_foto': campos.get('data_foto') or timezone.now().isoformat(),
+                'data_cadastro': cadastro.isoformat(),
+            }
+            self._frota[novo_id] = registro
+            return registro
+
+    def _processar_fila(self):
+        while True:
+            job_id = self._fila.get()
+            duracao = self.tempo_inferencia()
+            with self._lock:
+                job = self._jobs[job_id]
+                job.update(status='running', inicio=time.monotonic(), duracao=duracao, message='Processando')
+            time.sleep(duracao)
+            if self.rng.random() < self.taxa_falha_job:
+                with self._lock:
+                    job.update(status='failed', message='Falha simulada na inferência')
+            else:
+                registro = self._criar_registro(job['campos'])
+                with self._lock:
+                    job.update(status='succeeded', resource_id=registro['id'], message='Concluído')
+            self._fila.task_done()
+
+    def _com_imagens(self, registro):
+        return {
+            **registro,
+            'imagem': f"{self.url_base}/imagens/{registro['id']}.png",
+            'imagem_processada': f"{self.url_base}/imagens/{registro['id']}_processada.png",
+        }
+
+    def listar(self, skip, limit):
+        with self._lock:
+            ids = sorted(self._frota)[skip:skip + limit]
+            return [self._com_imagens(self._frota[i]) for i in ids]
+
+    def buscar(self, resource_id):
+        with self._lock:
+            registro = self._frota.get(resource_id)
+            return [self._com_imagens(registro)] if registro else []
+
+    def enfileirar(self, campos):
+        """Cria o job; retorna None se a fila estiver cheia"""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {'status': 'queued', 'campos': campos, 'message': 'Na fila'}
+        try:
+            self._fila.put_nowait(job_id)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job_id]
+            return None
+        return job_id
+
+    def status_job(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            progresso = {'queued': 0, 'succeeded': 100, 'failed': 100}.get(job['status'])
+            if progresso is None:
+                decorrido = time.monotonic() - job['inicio']
+                progresso = min(99, int(decorrido / max(job['duracao'], 0.001) * 100))
+            return {
+                'job_id': job_id,
+                'status': job['status'],
+                'progress': progresso,
+                'message': job['message'],
+                'resource_id': job.get('resource_id'),
+                'fila': self._fila.qsize(),
+            }
+
+
+def criar_handler(backend):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, formato, *args):
+            logger.debug(formato % args)
+
+        def _responder(self, status, dados, content_type='application/json'):
+            corpo = dados if isinstance(dados, bytes) else json.dumps(dados).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def _caos(self, latencia):
+            """Aplica latência e falhas sorteadas; retorna True se já respondeu"""
+            time.sleep(latencia())
+            sorteio = backend.rng.random()
+            if sorteio < backend.taxa_queda:
+                self.close_connection = True
+                return True
+            if sorteio < backend.taxa_queda + backend.taxa_erro:
+                self._responder(503, {'detail': 'Erro simulado'})
+                return True
+            return False
+
+        def do_GET(self):
+            partes = urlsplit(self.path)
+            query = parse_qs(partes.query)
+
+            if partes.path.startswith('/imagens/'):
+                return self._responder(200, PNG_1X1, 'image/png')
+            if self._caos(backend.latencia):
+                return
+            if partes.path == '/ping':
+                return self._responder(200, {'message': 'pong'})
+            if partes.path == '/embarcacoes':
+                if 'id' in query:
+                    return self._responder(200, backend.buscar(int(query['id'][0])))
+                skip = int(query.get('skip', ['0'])[0])
+                limit = int(query.get('limit', ['100'])[0])
+                return self._responder(200, backend.listar(skip, limit))
+            if partes.path.startswith('/jobs/'):
+                status = backend.status_job(partes.path.rsplit('/', 1)[-1])
+                if status is None:
+                    return self._responder(404, {'detail': 'Job não encontrado'})
+                return self._responder(200, status)
+            self._responder(404, {'detail': 'Não encontrado'})
+
+        def do_POST(self):
+            corpo = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            if self._caos(backend.latencia_upload):
+                return
+            if urlsplit(self.path).path != '/embarcacoes':
+                return self._responder(404, {'detail': 'Não encontrado'})
+
+            mensagem = BytesParser(policy=politica_email).parsebytes(
+                f"Content-Type: {self.headers.get('Content-Type', '')}\r\n\r\n".encode() + corpo
+            )
+            campos = {
+                parte.get_param('name', header='content-disposition'): parte.get_content()
+                for parte in mensagem.iter_parts()
+                if not parte.get_filename()
+            } if mensagem.is_multipart() else {}
+
+            job_id = backend.enfileirar(campos)
+            if job_id is None:
+                return self._responder(503, {'detail': 'Fila de inferência cheia'})
+            self._responder(202, {
+                'job_id': job_id,
+                'status': 'queued',
+                'result_url': f'{backend.url_base}/jobs/{job_id}',
+            })
+
+    return Handler
+
+
+def criar_servidor(host, porta, backend):
+    servidor = ThreadingHTTPServer((host, porta), criar_handler(backend))
+    servidor.daemon_threads = True
+    backend.url_base = f'http://{host}:{servidor.server_port}'
+    return servidor
@@ -0,0 +1,111 @@
+"""
+Backends de cache do ARITANA
+
+O cache compartilhado (Redis) evita que cada worker do gunicorn/uvicorn busque
+a frota inteira separadamente e faz com que invalidações feitas por um worker
+cheguem aos demais. Se o Redis cair, o backend passa a usar um cache em
+memória local até a conexão voltar, em vez de derrubar as views.
+"""
+import logging
+import time
+
+from django.core.cache.backends.locmem import LocMemCache
+from django_redis.cache import RedisCache
+from django_redis.exceptions import ConnectionInterrupted
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+logger = logging.getLogger(__name__)
+
+ERROS_REDIS = (ConnectionInterrupted, RedisConnectionError, RedisTimeoutError)
+
+
+class RedisComFallbackCache(RedisCache):
+    """
+    RedisCache que recorre a um LocMemCache quando o Redis está indisponível
+
+    Após uma falha de conexão o Redis só volta a ser tentado depois de
+    OPTIONS['FALLBACK_RETRY_INTERVAL'] segundos, para que cada requisição
+    não pague o timeout de conexão enquanto o servidor estiver fora.
+    """
+
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        options = params.get('OPTIONS', {})
+        self._intervalo_reconexao = options.get('FALLBACK_RETRY_INTERVAL', 30)
+        self._redis_indisponivel_ate = 0
+        self._fallback = LocMemCache(f'fallback-{self.key_prefix}', {
+            'TIMEOUT': params.get('TIMEOUT', 300),
+            'KEY_PREFIX': self.key_prefix,
+            'VERSION': self.version,
+            'OPTIONS': {'MAX_ENTRIES': options.get('FALLBACK_MAX_ENTRIES', 1000)},
+        })
+
+    @property
+    def usando_fallback(self):
+        """Indica se o cache está operando em memória local"""
+        return time.monotonic() < self._redis_indisponivel_ate
+
+    def _executar(self, metodo, *args, **kwargs):
+        """Executa o método no Redis ou, se ele estiver fora, no fallback local"""
+        if self.usando_fallback:
+            return getattr(self._fallback, metodo)(*args, **kwargs)
+        try:
+            return getattr(super(), metodo)(*args, **kwargs)
+        except ERROS_REDIS as e:
+            logger.warning(
+                "Redis indisponível (%s); usando cache local por %ss",
+                e, self._intervalo_reconexao,
+            )
+            self._redis_indisponivel_ate = time.monotonic() + self._intervalo_reconexao
+            return getattr(self._fallback, metodo)(*args, **kwargs)
+
+    def get(self, key, default=None, version=None):
+        return self._executar('get', key, default=default, version=version)
+
+    def set(self, *args, **kwargs):
+        return self._executar('set', *args, **kwargs)
+
+    def add(self, *args, **kwargs):
+        return self._executar('add', *args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        return self._executar('delete', *args, **kwargs)
+
+    def get_many(self, *args, **kwargs):
+        return self._executar('get_many', *args, **kwargs)
+
+    def set_many(self, *args, **kwargs):
+        return self._executar('set_many', *args, **kwargs)
+
+    def delete_many(self, *args, **kwargs):
+        return self._executar('delete_many', *args, **kwargs)
+
+    def incr(self, *args, **kwargs):
+        return self._executar('incr', *args, **kwargs)
+
+    def decr(self, *args, **kwargs):
+        return self._executar('decr', *args, **kwargs)
+
+    def has_key(self, *args, **kwargs):
+        return self._executar('has_key', *args, **kwargs)
+
+    def touch(self, *args, **kwargs):
+        return self._executar('touch', *args, **kwargs)
+
+    def clear(self):
+        """
+        Remove apenas as chaves deste ambiente
+
+        O clear() padrão do django-redis executa FLUSHDB, o que apagaria as
+        chaves de outros ambientes que compartilham o mesmo Redis.
+        """
+        self._fallback.clear()
+        if self.usando_fallback:
+            return True
+        try:
+            super().delete_pattern('*')
+        except ERROS_REDIS as e:
+            logger.warning("Redis indisponível ao limpar cache: %s", e)
+            self._redis_indisponivel_ate = time.monotonic() + self._intervalo_reconexao
+        return True
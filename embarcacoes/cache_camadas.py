@@ -0,0 +1,168 @@
+"""
+Cache em duas camadas para os payloads mais acessados
+
+L1: LRU pequeno em memória do processo, com TTL curto, que evita
+desserializar a frota inteira a cada acesso ao dashboard/histórico/mapa.
+L2: cache compartilhado do Django (Redis ou LocMem, conforme settings).
+
+A invalidação é feita por uma chave de versão no L2: ao trocar a versão,
+todos os workers descartam suas entradas L1 e L2 antigas na próxima leitura.
+"""
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .instrumentacao import registrar_cache
+from .metricas import metricas
+
+logger = logging.getLogger(__name__)
+
+CHAVE_VERSAO = 'cache_quente_versao'
+
+
+class CacheDuasCamadas:
+    """
+    Cache L1 (LRU local) + L2 (cache do Django) com invalidação por versão
+
+    Os valores retornados são compartilhados entre requisições do mesmo
+    processo e devem ser tratados como somente leitura.
+    """
+
+    def __init__(self, max_itens=32, ttl_l1=5):
+        self.max_itens = max_itens
+        self.ttl_l1 = ttl_l1
+        self._l1 = OrderedDict()
+        self._lock = threading.Lock()
+        self._contadores = {
+            'l1': {'hits': 0, 'misses': 0, 'bytes': 0},
+            'l2': {'hits': 0, 'misses': 0, 'bytes': 0},
+        }
+
+    def versao(self):
+        """Versão atual dos dados; recriada com valor único se sumir do L2"""
+        versao = cache.get(CHAVE_VERSAO)
+        if versao is None:
+            cache.add(CHAVE_VERSAO, time.time_ns(), None)
+            versao = cache.get(CHAVE_VERSAO)
+        return versao
+
+    def _contar(self, camada, evento, tamanho=0):
+        with self._lock:
+            self._contadores[camada][evento] += 1
+            self._contadores[camada]['bytes'] += tamanho
+        metricas.incrementar(
+            'aritana_cache_requests_total',
+            camada=camada, resultado='hit' if evento == 'hits' else 'miss',
+        )
+
+    def get(self, chave, default=None):
+        """Busca no L1 e depois no L2; retorna default se não achar"""
+        versao = self.versao()
+        agora = time.monotonic()
+
+        with self._lock:
+            entrada = self._l1.get(chave)
+            if entrada and entrada[0] == versao and entrada[1] > agora:
+                self._l1.move_to_end(chave)
+            else:
+                entrada = None
+                self._l1.pop(chave, None)
+
+        if entrada:
+            self._contar('l1', 'hits', entrada[3])
+            registrar_cache(True)
+            return entrada[2]
+        self._contar('l1', 'misses')
+
+        dados = cache.get(f'{chave}:v{versao}')
+        registrar_cache(dados is not None)
+        if dados is None:
+            self._contar('l2', 'misses')
+            return default
+
+        self._contar('l2', 'hits', len(dados))
+        valor = pickle.loads(dados)
+        self._guardar_l1(chave, versao, valor, len(dados))
+        return valor
+
+    def set(self, chave, valor, timeout=300):
+        """Grava o valor nas duas camadas sob a versão atual"""
+        versao = self.versao()
+        dados = pickle.dumps(valor, pickle.HIGHEST_PROTOCOL)
+        cache.set(f'{chave}:v{versao}', dados, timeout)
+        self._guardar_l1(chave, versao, valor, len(dados))
+
+    def _guardar_l1(self, chave, versao, valor, tamanho):
+        expira_em = time.monotonic() + self.ttl_l1
+        with self._lock:
+            self._l1[chave] = (versao, expira_em, valor, tamanho)
+            self._l1.move_to_end(chave)
+            while len(self._l1) > self.max_itens:
+                self._l1.popitem(last=False)
+
+    def invalidar(self):
+        """Troca a versão, invalidando L1 e L2 em todos os workers"""
+        cache.set(CHAVE_VERSAO, time.time_ns(), None)
+        with self._lock:
+            self._l1.clear()
+        logger.info("Cache em camadas invalidado")
+
+    def metricas(self):
+        """Contadores de hit/miss/bytes por camada deste processo"""
+        with self._lock:
+            return {
+                camada: dict(valores)
+                for camada, valores in self._contadores.items()
+            } | {'l1_itens': len(self._l1)}
+
+
+def invalidar_caches():
+    """
+    Invalida os dados derivados da frota em todos os workers
+
+    Usa a troca de versão em vez de cache.clear() para preservar chaves que
+    não dependem dos dados (estado dos circuitos, cópias de contingência).
+    Chaves versionadas fora do cache_quente devem incluir cache_quente.versao().
+    """
+    cache_quente.invalidar()
+
+
+_voos = {}
+_voos_lock = threading.Lock()
+
+
+def carregar_uma_vez(chave, carregar):
+    """
+    Single-flight: chamadas concorrentes para a mesma chave neste processo
+    esperam a primeira terminar e recebem o mesmo resultado, em vez de cada
+    uma disparar sua própria requisição à API externa.
+    """
+    with _voos_lock:
+        voo = _voos.get(chave)
+        lider = voo is None
+        if lider:
+            voo = _voos[chave] = {'evento': threading.Event(), 'resultado': None}
+
+    if not lider:
+        voo['evento'].wait()
+        return voo['resultado']
+
+    try:
+        voo['resultado'] = carregar()
+        return voo['resultado']
+    finally:
+        with _voos_lock:
+            _voos.pop(chave, None)
+        voo['evento'].set()
+
+
+# Instância global usada pelo cliente da API e pelas views
+cache_quente = CacheDuasCamadas(
+    max_itens=getattr(settings, 'CACHE_L1_MAX_ITENS', 32),
+    ttl_l1=getattr(settings, 'CACHE_L1_TTL', 5),
+)
@@ -0,0 +1,150 @@
+"""
+Circuit breaker para as chamadas à API externa do ARITANA
+
+Quando o backend está fora do ar, cada requisição ao dashboard/histórico
+ficava presa nos timeouts e retries do cliente. O circuito abre ao detectar
+muitas falhas ou respostas lentas e, enquanto estiver aberto, as chamadas
+falham imediatamente para que as views usem dados em cache.
+
+O estado fica no cache do Django, portanto é compartilhado entre os workers
+quando o backend de cache é o Redis (CACHE_BACKEND=redis).
+"""
+import logging
+import time
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+FECHADO = 'fechado'
+ABERTO = 'aberto'
+SEMI_ABERTO = 'semi_aberto'
+
+CONFIG_PADRAO = {
+    'janela': 60,             # segundos de cada janela de contagem
+    'min_chamadas': 5,        # chamadas mínimas na janela antes de avaliar
+    'taxa_erro': 0.5,         # fração de falhas que abre o circuito
+    'latencia_lenta': 3.0,    # segundos a partir dos quais a chamada é lenta
+    'taxa_lentas': 0.8,       # fração de chamadas lentas que abre o circuito
+    'tempo_aberto': 30,       # segundos até permitir uma chamada de teste
+}
+
+
+class CircuitoAberto(requests.exceptions.RequestException):
+    """Chamada recusada porque o circuito do endpoint está aberto"""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker com estados fechado/aberto/semi-aberto
+
+    - fechado: chamadas passam; falhas e lentidão são contadas por janela
+    - aberto: chamadas são recusadas até passar 'tempo_aberto'
+    - semi_aberto: um único worker faz a chamada de teste; sucesso fecha
+      o circuito e falha o reabre
+    """
+
+    def __init__(self, nome, **config):
+        self.nome = nome
+        self.config = {**CONFIG_PADRAO, **config}
+        self._prefixo = f'circuito:{nome}'
+
+    def _chave_janela(self, contador):
+        janela = int(time.time() // self.config['janela'])
+        return f'{self._prefixo}:{janela}:{contador}'
+
+    def _incrementar(self, contador):
+        chave = self._chave_janela(contador)
+        if not cache.add(chave, 1, self.config['janela'] * 2):
+            try:
+                return cache.incr(chave)
+            except ValueError:
+                cache.set(chave, 1, self.config['janela'] * 2)
+        return 1
+
+    def _ler_estado(self):
+        return cache.get(self._prefixo) or {'estado': FECHADO, 'aberto_ate': 0}
+
+    def _gravar_estado(self, estado, aberto_ate=0):
+        cache.set(self._prefixo, {'estado': estado, 'aberto_ate': aberto_ate}, None)
+
+    def permitir(self):
+        """Retorna True se a chamada pode ser feita agora"""
+        estado = self._ler_estado()
+        if estado['estado'] == FECHADO:
+            return True
+
+        if time.time() < estado['aberto_ate']:
+            return False
+
+        # Tempo de espera esgotado: apenas um worker faz a chamada de teste
+        if cache.add(f'{self._prefixo}:sonda', 1, self.config['tempo_aberto']):
+            self._gravar_estado(SEMI_ABERTO, estado['aberto_ate'])
+            logger.info("Circuito '%s' semi-aberto: enviando chamada de teste", self.nome)
+            return True
+        return False
+
+    def registrar_sucesso(self, duracao):
+        """Registra uma chamada bem-sucedida com sua duração em segundos"""
+        estado = self._ler_estado()['estado']
+        if estado != FECHADO:
+            if estado == SEMI_ABERTO:
+                self.fechar()
+            return
+        total = self._incrementar('total')
+        if duracao >= self.config['latencia_lenta']:
+            lentas = self._incrementar('lentas')
+            if total >= self.config['min_chamadas'] and lentas / total >= self.config['taxa_lentas']:
+                self.abrir(f"{lentas}/{total} chamadas lentas")
+
+    def registrar_falha(self, duracao=0):
+        """Registra uma chamada que falhou (timeout, conexão ou erro 5xx)"""
+        estado = self._ler_estado()['estado']
+        if estado != FECHADO:
+            if estado == SEMI_ABERTO:
+                self.abrir("falha na chamada de teste")
+            return
+        total = self._incrementar('total')
+        erros = self._incrementar('erros')
+        if total >= self.config['min_chamadas'] and erros / total >= self.config['taxa_erro']:
+            self.abrir(f"{erros}/{total} chamadas com erro")
+
+    def abrir(self, motivo=''):
+        self._gravar_estado(ABERTO, time.time() + self.config['tempo_aberto'])
+        cache.delete(f'{self._prefixo}:sonda')
+        logger.warning("Circuito '%s' aberto por %ss: %s", self.nome, self.config['tempo_aberto'], motivo)
+
+    def fechar(self):
+        self._gravar_estado(FECHADO)
+        cache.delete_many([
+            f'{self._prefixo}:sonda',
+            self._chave_janela('total'),
+            self._chave_janela('erros'),
+            self._chave_janela('lentas'),
+        ])
+        logger.info("Circuito '%s' fechado", self.nome)
+
+    def status(self):
+        """Resumo do estado atual para monitoramento"""
+        estado = self._ler_estado()
+        return {
+            'nome': self.nome,
+            'estado': estado['estado'],
+            'reabre_em': max(0, round(estado['aberto_ate'] - time.time())) if estado['estado'] == ABERTO else 0,
+            'chamadas': cache.get(self._chave_janela('total'), 0),
+            'erros': cache.get(self._chave_janela('erros'), 0),
+            'lentas': cache.get(self._chave_janela('lentas'), 0),
+        }
+
+
+def criar_circuitos(nomes):
+    """Cria um circuito por endpoint aplicando ARITANA_CIRCUIT_BREAKER das settings"""
+    config = getattr(settings, 'ARITANA_CIRCUIT_BREAKER', {})
+    comum = {k: v for k, v in config.items() if k in CONFIG_PADRAO}
+    por_endpoint = config.get('endpoints', {})
+    return {
+        nome: CircuitBreaker(nome, **{**comum, **por_endpoint.get(nome, {})})
+        for nome in nomes
+    }
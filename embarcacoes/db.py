@@ -0,0 +1,23 @@
+"""
+Ajustes de conexão com o banco de dados do ARITANA
+"""
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def configurar_conexao(sender, connection, **kwargs):
+    """Aplica SQLITE_PRAGMAS das settings a cada nova conexão SQLite"""
+    if connection.vendor != 'sqlite':
+        return
+
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    if not pragmas:
+        return
+
+    with connection.cursor() as cursor:
+        for nome, valor in pragmas.items():
+            cursor.execute(f'PRAGMA {nome} = {valor}')
+    logger.debug("PRAGMAs do SQLite aplicados: %s", pragmas)
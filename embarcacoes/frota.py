@@ -0,0 +1,238 @@
+"""
+Armazenamento compacto da frota em memória
+
+A API devolve cada embarcação como um dict, e a frota inteira fica no cache
+(e em cada worker, no L1). FrotaCompacta guarda os mesmos dados por coluna:
+
+- uma lista (ou array) por campo, sem repetir as chaves em cada registro;
+- campos categóricos (região, classificação...) com strings internadas, uma
+  única cópia por valor em memória e no pickle;
+- colunas só de float/int em array('d')/array('q'), 8 bytes por valor;
+- demais colunas só de texto (datas, URLs, títulos) concatenadas em uma única
+  string com um array de posições (ColunaTexto), sem um objeto str por valor.
+
+O acesso por registro é feito por RegistroFrota, uma view Mapping sobre uma
+linha: e.get('campo'), e['campo'], dict(e) e templates funcionam como antes.
+Na serialização, como_dicts() monta os dicts direto das colunas.
+"""
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+from itertools import accumulate, compress, repeat
+
+# Campos com poucos valores distintos, internados na construção
+CAMPOS_CATEGORICOS = frozenset({
+    'regiao', 'classificacao', 'localidade', 'tipo', 'origem', 'status_local', 'mensagem_status',
+})
+
+
+class _Ausente:
+    """Marca campo ausente no registro (diferente de None); pickle por referência"""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'AUSENTE'
+
+    def __reduce__(self):
+        return 'AUSENTE'
+
+
+AUSENTE = _Ausente()
+
+
+class ColunaTexto:
+    """Strings de uma coluna concatenadas, com o fim de cada uma em um array"""
+
+    __slots__ = ('_texto', '_fins')
+
+    def __init__(self, valores):
+        self._texto = ''.join(valores)
+        self._fins = array('q', accumulate(map(len, valores)))
+
+    def __len__(self):
+        return len(self._fins)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            inicio, fim, passo = indice.indices(len(self._fins))
+            if passo == 1:
+                return self._fatia(inicio, fim)
+            return [self[i] for i in range(inicio, fim, passo)]
+        if indice < 0:
+            indice += len(self._fins)
+        inicio = self._fins[indice - 1] if indice else 0
+        return self._texto[inicio:self._fins[indice]]
+
+    def _fatia(self, inicio, fim):
+        texto = self._texto
+        anterior = self._fins[inicio - 1] if inicio else 0
+        valores = []
+        for posicao in self._fins[inicio:fim]:
+            valores.append(texto[anterior:posicao])
+            anterior = posicao
+        return valores
+
+    def __iter__(self):
+        return iter(self._fatia(0, len(self._fins)))
+
+    def tolist(self):
+        return self._fatia(0, len(self._fins))
+
+
+def _compactar_coluna(valores, categorica):
+    tipos = set(map(type, valores))
+    if tipos == {float}:
+        return array('d', valores)
+    if tipos == {int} and all(-2**63 <= v < 2**63 for v in valores):
+        return array('q', valores)
+    if categorica:
+        return [sys.intern(v) if type(v) is str else v for v in valores]
+    if tipos == {str}:
+        return ColunaTexto(valores)
+    return list(valores)
+
+
+class RegistroFrota(Mapping):
+    """View somente leitura de uma linha da FrotaCompacta"""
+
+    __slots__ = ('_colunas', '_indice')
+
+    def __init__(self, colunas, indice):
+        self._colunas = colunas
+        self._indice = indice
+
+    def __getitem__(self, chave):
+        valor = self._colunas[chave][self._indice]
+        if valor is AUSENTE:
+            raise KeyError(chave)
+        return valor
+
+    def __iter__(self):
+        return (chave for chave, coluna in self._colunas.items() if coluna[self._indice] is not AUSENTE)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def como_dict(self):
+        i = self._indice
+        return {chave: coluna[i] for chave, coluna in self._colunas.items() if coluna[i] is not AUSENTE}
+
+    def __repr__(self):
+        return f'RegistroFrota({self.como_dict()!r})'
+
+
+class FrotaCompacta(Sequence):
+    """
+    Lista de embarcações guardada por colunas
+
+    Imutável: as operações (com_colunas, selecionar, ordenar_por, +) devolvem
+    uma nova frota que compartilha as colunas não alteradas.
+    """
+
+    __slots__ = ('_colunas', '_tamanho')
+
+    def __init__(self, registros=()):
+        registros = list(registros)
+        chaves = {}
+        for registro in registros:
+            chaves.update(dict.fromkeys(registro))
+        self._tamanho = len(registros)
+        self._colunas = {
+            chave: _compactar_coluna([r.get(chave, AUSENTE) for r in registros], chave in CAMPOS_CATEGORICOS)
+            for chave in chaves
+        }
+
+    @classmethod
+    def _de_colunas(cls, colunas, tamanho):
+        frota = cls.__new__(cls)
+        frota._colunas = colunas
+        frota._tamanho = tamanho
+        return frota
+
+    def __len__(self):
+        return self._tamanho
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [RegistroFrota(self._colunas, i) for i in range(*indice.indices(self._tamanho))]
+        if indice < 0:
+            indice += self._tamanho
+        if not 0 <= indice < self._tamanho:
+            raise IndexError('índice fora da frota')
+        return RegistroFrota(self._colunas, indice)
+
+    def __add__(self, outra):
+        """Concatena duas frotas; campos que só uma tem ficam AUSENTE na outra"""
+        chaves = dict.fromkeys(self._colunas) | dict.fromkeys(outra._colunas)
+        colunas = {}
+        for chave in chaves:
+            valores = list(self._colunas.get(chave) or repeat(AUSENTE, self._tamanho))
+            valores.extend(outra._colunas.get(chave) or repeat(AUSENTE, outra._tamanho))
+            colunas[chave] = _compactar_coluna(valores, chave in CAMPOS_CATEGORICOS)
+        return FrotaCompacta._de_colunas(colunas, self._tamanho + outra._tamanho)
+
+    def coluna(self, nome, default=None):
+        """Nova lista com os valores do campo; default onde o registro não o tem"""
+        valores = self._colunas.get(nome)
+        if valores is None:
+            return [default] * self._tamanho
+        if isinstance(valores, (array, ColunaTexto)):
+            return valores.tolist()
+        return [default if v is AUSENTE else v for v in valores]
+
+    def com_colunas(self, **colunas):
+        """Nova frota com os campos informados (listas do tamanho da frota) trocados/adicionados"""
+        novas = dict(self._colunas)
+        for nome, valores in colunas.items():
+            novas[nome] = _compactar_coluna(valores, nome in CAMPOS_CATEGORICOS)
+        return FrotaCompacta._de_colunas(novas, self._tamanho)
+
+    def selecionar(self, indices):
+        """Nova frota com as linhas dos índices, na ordem dada"""
+        indices = list(indices)
+        colunas = {}
+        for nome, valores in self._colunas.items():
+            if isinstance(valores, ColunaTexto):
+                valores = valores.tolist()
+                colunas[nome] = ColunaTexto([valores[i] for i in indices])
+            elif isinstance(valores, array):
+                colunas[nome] = array(valores.typecode, [valores[i] for i in indices])
+            else:
+                colunas[nome] = [valores[i] for i in indices]
+        return FrotaCompacta._de_colunas(colunas, len(indices))
+
+    def filtrar(self, mascara):
+        """Linhas em que a máscara (sequência de booleanos) é verdadeira"""
+        return self.selecionar(compress(range(self._tamanho), mascara))
+
+    def ordenar_por(self, nome, reverso=False, default=''):
+        chaves = self.coluna(nome, default)
+        return self.selecionar(sorted(range(self._tamanho), key=chaves.__getitem__, reverse=reverso))
+
+    def como_dicts(self, inicio=0, fim=None):
+        """Registros [inicio:fim] como dicts, para serialização"""
+        fim = self._tamanho if fim is None else min(fim, self._tamanho)
+        nomes = list(self._colunas)
+        fatias = [self._colunas[nome][inicio:fim] for nome in nomes]
+        registros = [dict(zip(nomes, linha)) for linha in zip(*fatias)]
+
+        # Só colunas em lista podem ter AUSENTE; removido depois, só onde aparece
+        com_ausentes = [
+            nome for nome, fatia in zip(nomes, fatias)
+            if isinstance(fatia, list) and any(valor is AUSENTE for valor in fatia)
+        ]
+        for registro in registros:
+            for nome in com_ausentes:
+                if registro[nome] is AUSENTE:
+                    del registro[nome]
+        return registros
+
+
+def para_serializacao(valor):
+    """Converte FrotaCompacta/RegistroFrota para list/dict; None se não for um deles"""
+    if isinstance(valor, FrotaCompacta):
+        return valor.como_dicts()
+    if isinstance(valor, RegistroFrota):
+        return valor.como_dict()
+    return None
@@ -0,0 +1,169 @@
+"""
+Gravação e reprodução do tráfego com a API externa
+
+Com ARITANA_API_GRAVACAO['modo'] = 'gravar', cada requisição feita pelo
+AritanaAPIClient é registrada em JSONL (método, URL, status, duração, hash e
+corpo da resposta, truncado em 'max_corpo' bytes). Com 'reproduzir', nenhuma
+requisição vai para a rede: as respostas saem desse arquivo, com a latência
+original multiplicada por 'escala_latencia' (0 = sem espera).
+
+Isso permite rodar benchmarks e testes de regressão do dashboard, histórico
+e fluxo de jobs offline, de forma determinística, com payloads reais.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from django.utils import timezone
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+GRAVAR = 'gravar'
+REPRODUZIR = 'reproduzir'
+
+
+def chave_requisicao(metodo, url):
+    """Método + caminho + query; o host fica de fora para reproduzir em qualquer URL base"""
+    partes = urlsplit(url)
+    caminho = partes.path + (f'?{partes.query}' if partes.query else '')
+    return f'{metodo.upper()} {caminho}'
+
+
+class AdaptadorGravacao(HTTPAdapter):
+    """HTTPAdapter que grava cada requisição/resposta em uma linha JSONL"""
+
+    def __init__(self, arquivo, max_corpo=1_000_000, **kwargs):
+        super().__init__(**kwargs)
+        self.arquivo = Path(arquivo)
+        self.max_corpo = max_corpo
+        self._lock = threading.Lock()
+        self.arquivo.parent.mkdir(parents=True, exist_ok=True)
+
+    def send(self, request, **kwargs):
+        inicio = time.monotonic()
+        try:
+            response = super().send(request, **kwargs)
+            corpo = response.content
+        except requests.exceptions.RequestException as e:
+            self._gravar(request, time.monotonic() - inicio, erro=type(e).__name__)
+            raise
+        self._gravar(request, time.monotonic() - inicio, response=response, corpo=corpo)
+        return response
+
+    def _gravar(self, request, duracao, response=None, corpo=b'', erro=None):
+        registro = {
+            'instante': timezone.now().isoformat(),
+            'chave': chave_requisicao(request.method, request.url),
+            'metodo': request.method,
+            'url': request.url,
+            'duracao': round(duracao, 4),
+        }
+        if erro:
+            registro['erro'] = erro
+        else:
+            registro.update({
+                'status': response.status_code,
+                'content_type': response.headers.get('Content-Type', ''),
+                'tamanho': len(corpo),
+                'corpo_sha256': hashlib.sha256(corpo).hexdigest(),
+                'corpo': corpo[:self.max_corpo].decode('utf-8', errors='replace'),
+                'corpo_truncado': len(corpo) > self.max_corpo,
+            })
+
+        linha = json.dumps(registro, ensure_ascii=False)
+        with self._lock:
+            with self.arquivo.open('a', encoding='utf-8') as f:
+                f.write(linha + '\n')
+
+
+class AdaptadorReproducao(BaseAdapter):
+    """
+    Adaptador que responde a partir de uma gravação, sem acessar a rede
+
+    Gravações com a mesma chave são servidas na ordem em que foram feitas
+    (ex.: o progresso de um job no polling); esgotadas, repete-se a última.
+    Requisições sem gravação falham com ConnectionError.
+    """
+
+    def __init__(self, arquivo, escala_latencia=1.0):
+        super().__init__()
+        self.escala_latencia = escala_latencia
+        self._gravacoes = defaultdict(list)
+        self._posicoes = defaultdict(int)
+        self._lock = threading.Lock()
+
+        with Path(arquivo).open(encoding='utf-8') as f:
+            for linha in f:
+                if linha.strip():
+                    registro = json.loads(linha)
+                    self._gravacoes[registro['chave']].append(registro)
+        logger.info(
+            "Reproduzindo %d respostas gravadas de %s", sum(map(len, self._gravacoes.values())), arquivo,
+        )
+
+    def _proxima(self, chave):
+        with self._lock:
+            gravacoes = self._gravacoes.get(chave)
+            if not gravacoes:
+                return None
+            posicao = self._posicoes[chave]
+            self._posicoes[chave] = min(posicao + 1, len(gravacoes) - 1)
+            return gravacoes[posicao]
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        chave = chave_requisicao(request.method, request.url)
+        gravacao = self._proxima(chave)
+        if gravacao is None:
+            raise requests.exceptions.ConnectionError(f"Sem gravação para {chave}", request=request)
+
+        espera = gravacao['duracao'] * self.escala_latencia
+        limite = timeout[1] if isinstance(timeout, tuple) else timeout
+        if limite is not None and espera > limite:
+            time.sleep(limite)
+            raise requests.exceptions.ReadTimeout(f"Timeout reproduzido para {chave}", request=request)
+        time.sleep(espera)
+
+        if gravacao.get('erro'):
+            erro = getattr(requests.exceptions, gravacao['erro'], requests.exceptions.ConnectionError)
+            raise erro(f"Erro reproduzido para {chave}", request=request)
+
+        response = requests.Response()
+        response.status_code = gravacao['status']
+        response.headers = CaseInsensitiveDict({'Content-Type': gravacao.get('content_type', '')})
+        response._content = gravacao['corpo'].encode('utf-8')
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.reason = 'Replay'
+        return response
+
+    def close(self):
+        pass
+
+
+def criar_sessao():
+    """Sessão HTTP do cliente da API, com gravação/reprodução conforme as settings"""
+    config = getattr(settings, 'ARITANA_API_GRAVACAO', {})
+    modo = config.get('modo', '')
+    sessao = requests.Session()
+
+    if modo == GRAVAR:
+        adaptador = AdaptadorGravacao(config['arquivo'], config.get('max_corpo', 1_000_000))
+    elif modo == REPRODUZIR:
+        adaptador = AdaptadorReproducao(config['arquivo'], config.get('escala_latencia', 1.0))
+    else:
+        return sessao
+
+    logger.warning("Tráfego da API externa em modo '%s' (%s)", modo, config['arquivo'])
+    sessao.mount('http://', adaptador)
+    sessao.mount('https://', adaptador)
+    return sessao
@@ -0,0 +1,65 @@
+"""
+Modo delta do histórico (/api/historico/?since=<token>)
+
+Cada resposta do histórico traz um token com a versão do cache_quente e o
+instante da leitura. O auto-refresh envia o token de volta e recebe só os
+uploads locais inseridos/alterados (data_atualizacao) ou apagados
+(ImagemRemovida) depois desse instante, sem refazer a mesclagem com a frota.
+
+Se a versão mudou (frota recarregada, job concluído, novo upload) ou o token
+é mais antigo que a retenção das remoções, a resposta pede recarga completa.
+"""
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ImagemEmbarcacao, ImagemRemovida
+
+logger = logging.getLogger(__name__)
+
+# Folga para transações que gravaram antes do token mas só confirmaram depois;
+# o cliente aplica as linhas repetidas sem efeito
+MARGEM_TOKEN = timedelta(seconds=2)
+
+
+def _retencao():
+    return timedelta(seconds=getattr(settings, 'HISTORICO_RETENCAO_REMOCOES', 24 * 60 * 60))
+
+
+def gerar_token(versao, instante):
+    """Token opaco '<versão do cache>.<instante em microssegundos>'"""
+    return f'{versao}.{int(instante.timestamp() * 1_000_000)}'
+
+
+def ler_token(token, versao):
+    """
+    Instante do token se ele ainda permite um delta; None se a versão do
+    cache mudou, se o token é inválido ou se é mais antigo que a retenção
+    """
+    versao_token, _, micros = token.rpartition('.')
+    if versao_token != str(versao):
+        return None
+    try:
+        instante = datetime.fromtimestamp(int(micros) / 1_000_000, dt_timezone.utc)
+    except (ValueError, OverflowError, OSError):
+        return None
+    if instante < timezone.now() - _retencao():
+        return None
+    return instante
+
+
+def alteracoes_desde(instante):
+    """Imagens gravadas e IDs de imagens apagadas desde o instante (com a margem)"""
+    limite = instante - MARGEM_TOKEN
+    imagens = ImagemEmbarcacao.objects.select_related('embarcacao').filter(data_atualizacao__gte=limite)
+    removidas = ImagemRemovida.objects.filter(data_remocao__gte=limite).values_list('imagem_id', flat=True)
+    return imagens, list(removidas)
+
+
+def registrar_remocao(sender, instance, **kwargs):
+    """post_delete de ImagemEmbarcacao: guarda a remoção e descarta as vencidas"""
+    ImagemRemovida.objects.create(imagem_id=instance.pk)
+    ImagemRemovida.objects.filter(data_remocao__lt=timezone.now() - _retencao()).delete()
+    logger.debug("Remoção da imagem #%s registrada para o histórico", instance.pk)
@@ -0,0 +1,128 @@
+"""
+Medição por requisição do tempo gasto em cada parte do ARITANA
+
+O TempoRequisicaoMiddleware cria uma MedicaoRequisicao para cada requisição
+e a deixa acessível via contextvar. O cliente da API, o cache em camadas e o
+backend de templates registram nela seus tempos, que no fim viram o header
+Server-Timing (visível no devtools do navegador) e uma linha de log em JSON.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+
+_medicao_atual = contextvars.ContextVar('medicao_requisicao', default=None)
+
+
+class MedicaoRequisicao:
+    """Tempos e contadores acumulados durante uma requisição"""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.db_tempo = 0.0
+        self.db_queries = 0
+        self.template_tempo = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.upstream = {}  # nome -> [chamadas, segundos]
+
+    def medir_query(self, execute, sql, params, many, context):
+        """Wrapper para connection.execute_wrapper()"""
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_tempo += time.perf_counter() - inicio
+            self.db_queries += 1
+
+    def registrar_upstream(self, nome, duracao):
+        chamadas = self.upstream.setdefault(nome, [0, 0.0])
+        chamadas[0] += 1
+        chamadas[1] += duracao
+
+    def tempo_atribuido(self):
+        """Soma das fases já medidas (db, upstream e templates)"""
+        return self.db_tempo + self.template_tempo + sum(duracao for _, duracao in self.upstream.values())
+
+    def total(self):
+        return time.perf_counter() - self.inicio
+
+    def server_timing(self, total):
+        """Valor do header Server-Timing (durações em ms)"""
+        partes = [
+            f'total;dur={total * 1000:.1f}',
+            f'db;dur={self.db_tempo * 1000:.1f};desc="{self.db_queries} queries"',
+        ]
+        for nome, (chamadas, duracao) in self.upstream.items():
+            partes.append(f'upstream-{nome};dur={duracao * 1000:.1f};desc="{chamadas} chamadas"')
+        if self.cache_hits or self.cache_misses:
+            partes.append(f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"')
+        if self.template_tempo:
+            partes.append(f'template;dur={self.template_tempo * 1000:.1f}')
+        return ', '.join(partes)
+
+    def resumo(self, total):
+        """Dicionário para o log estruturado (durações em ms)"""
+        return {
+            'total_ms': round(total * 1000, 1),
+            'db_ms': round(self.db_tempo * 1000, 1),
+            'db_queries': self.db_queries,
+            'upstream': {
+                nome: {'chamadas': chamadas, 'ms': round(duracao * 1000, 1)}
+                for nome, (chamadas, duracao) in self.upstream.items()
+            },
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'template_ms': round(self.template_tempo * 1000, 1),
+        }
+
+
+def iniciar_medicao():
+    """Ativa uma nova medição no contexto atual; retorna (medicao, token)"""
+    medicao = MedicaoRequisicao()
+    return medicao, _medicao_atual.set(medicao)
+
+
+def encerrar_medicao(token):
+    _medicao_atual.reset(token)
+
+
+def medicao_atual():
+    """Medição da requisição em andamento, ou None fora de uma requisição"""
+    return _medicao_atual.get()
+
+
+def registrar_upstream(nome, duracao):
+    medicao = _medicao_atual.get()
+    if medicao is not None:
+        medicao.registrar_upstream(nome, duracao)
+
+
+def registrar_cache(hit):
+    medicao = _medicao_atual.get()
+    if medicao is not None:
+        if hit:
+            medicao.cache_hits += 1
+        else:
+            medicao.cache_misses += 1
+
+
+@contextmanager
+def medir_template():
+    """
+    Acumula o tempo de renderização do bloco na medição atual
+
+    Valores preguiçosos do contexto (SimpleLazyObject) só consultam o banco ou a
+    API quando o template os usa; esse tempo já entra em db/upstream e é
+    descontado aqui, assim como o de templates renderizados dentro deste.
+    """
+    medicao = _medicao_atual.get()
+    if medicao is None:
+        yield
+        return
+    atribuido = medicao.tempo_atribuido()
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        aninhado = medicao.tempo_atribuido() - atribuido
+        medicao.template_tempo += max(time.perf_counter() - inicio - aninhado, 0.0)
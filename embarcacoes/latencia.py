@@ -0,0 +1,135 @@
+"""
+Timeouts adaptativos e orçamento de retries para a API externa
+
+Os timeouts de cada endpoint são derivados da latência observada
+(p99 × fator, limitado por piso e teto) em vez de valores fixos, e os
+retries consomem um orçamento global para não multiplicarem a carga
+sobre um backend já sobrecarregado.
+"""
+import logging
+import random
+import threading
+from collections import deque
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CONFIG_TIMEOUT_PADRAO = {
+    'padrao': 5,     # timeout usado enquanto não há amostras suficientes
+    'piso': 2,
+    'teto': 15,
+    'fator': 2.0,    # multiplicador aplicado ao p99
+}
+
+
+def percentil(amostras, p):
+    """Percentil p (0-100) de uma sequência de números, ou None se vazia"""
+    if not amostras:
+        return None
+    ordenadas = sorted(amostras)
+    return ordenadas[min(len(ordenadas) - 1, int(round(p / 100 * (len(ordenadas) - 1))))]
+
+
+class JanelaLatencia:
+    """Últimas N latências de um endpoint, para cálculo de percentis"""
+
+    def __init__(self, tamanho=200):
+        self._amostras = deque(maxlen=tamanho)
+        self._lock = threading.Lock()
+
+    def registrar(self, duracao):
+        with self._lock:
+            self._amostras.append(duracao)
+
+    def __len__(self):
+        return len(self._amostras)
+
+    def percentil(self, p):
+        """Percentil p (0-100) das amostras, ou None se vazia"""
+        with self._lock:
+            amostras = list(self._amostras)
+        return percentil(amostras, p)
+
+
+class MonitorLatencia:
+    """Latência por endpoint e timeouts derivados dela"""
+
+    def __init__(self, config_endpoints, min_amostras=20):
+        self.min_amostras = min_amostras
+        self._config = {
+            nome: {**CONFIG_TIMEOUT_PADRAO, **config}
+            for nome, config in config_endpoints.items()
+        }
+        self._janelas = {nome: JanelaLatencia() for nome in self._config}
+
+    def registrar(self, endpoint, duracao):
+        self._janelas[endpoint].registrar(duracao)
+
+    def percentil(self, endpoint, p):
+        if len(self._janelas[endpoint]) < self.min_amostras:
+            return None
+        return self._janelas[endpoint].percentil(p)
+
+    def timeout(self, endpoint):
+        """Timeout atual do endpoint: p99 × fator entre piso e teto"""
+        config = self._config[endpoint]
+        p99 = self.percentil(endpoint, 99)
+        if p99 is None:
+            return config['padrao']
+        return min(config['teto'], max(config['piso'], p99 * config['fator']))
+
+    def resumo(self):
+        return {
+            nome: {
+                'amostras': len(self._janelas[nome]),
+                'p50': self.percentil(nome, 50),
+                'p95': self.percentil(nome, 95),
+                'p99': self.percentil(nome, 99),
+                'timeout': self.timeout(nome),
+            }
+            for nome in self._config
+        }
+
+
+class OrcamentoRetry:
+    """
+    Orçamento global de retries (token bucket)
+
+    Cada requisição original deposita 'proporcao' de ficha e cada retry ou
+    requisição duplicada (hedge) consome uma ficha inteira, limitando os
+    retries a ~proporcao das requisições mesmo durante uma queda.
+    """
+
+    def __init__(self, proporcao=0.2, minimo=3, maximo=10):
+        self.proporcao = proporcao
+        self.maximo = maximo
+        self._fichas = float(minimo)
+        self._lock = threading.Lock()
+
+    def depositar(self):
+        with self._lock:
+            self._fichas = min(self.maximo, self._fichas + self.proporcao)
+
+    def retirar(self):
+        """Consome uma ficha; retorna False se o orçamento acabou"""
+        with self._lock:
+            if self._fichas >= 1:
+                self._fichas -= 1
+                return True
+            return False
+
+
+def atraso_backoff(tentativa, base=0.2, maximo=2.0):
+    """Backoff exponencial com jitter completo para a tentativa N (0, 1, ...)"""
+    return random.uniform(0, min(maximo, base * (2 ** tentativa)))
+
+
+def criar_monitor_latencia():
+    """Monitor configurado com ARITANA_TIMEOUTS das settings"""
+    return MonitorLatencia(getattr(settings, 'ARITANA_TIMEOUTS', {}))
+
+
+def criar_orcamento_retry():
+    """Orçamento configurado com ARITANA_RETRY_BUDGET das settings"""
+    return OrcamentoRetry(**getattr(settings, 'ARITANA_RETRY_BUDGET', {}))
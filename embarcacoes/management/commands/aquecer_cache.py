@@ -0,0 +1,48 @@
+"""
+Comando Django que aquece os caches da frota, estatísticas e histórico
+
+Útil após deploy ou reinício, antes de liberar o tráfego: com cache
+compartilhado (Redis) os workers já encontram os payloads montados. Mostra o
+tempo de cada etapa (ver embarcacoes/aquecimento.py)
+"""
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from embarcacoes.aquecimento import aquecer
+
+
+class Command(BaseCommand):
+    help = 'Pré-carrega frota, estatísticas, dashboard e primeiras páginas do histórico no cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--paginas-historico', type=int, default=None,
+            help='Páginas do /api/historico/ a aquecer (padrão: ARITANA_AQUECIMENTO)',
+        )
+        parser.add_argument(
+            '--exit-code',
+            action='store_true',
+            help='Retorna exit code 1 se alguma etapa falhar (útil para scripts)',
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        etapas = aquecer(options['paginas_historico'])
+        total = time.perf_counter() - inicio
+
+        for etapa in etapas:
+            linha = f"  - {etapa['etapa']}: {etapa['segundos'] * 1000:.0f} ms"
+            if etapa['ok']:
+                self.stdout.write(linha)
+            else:
+                self.stdout.write(self.style.WARNING(f"{linha} [FALHOU] {etapa['erro'] or ''}".rstrip()))
+
+        falhas = sum(not etapa['ok'] for etapa in etapas)
+        if falhas:
+            self.stdout.write(self.style.ERROR(f'[ERRO] {falhas} de {len(etapas)} etapas falharam em {total:.2f}s'))
+            if options['exit_code']:
+                sys.exit(1)
+        else:
+            self.stdout.write(self.style.SUCCESS(f'[OK] Caches aquecidos em {total:.2f}s ({len(etapas)} etapas)'))
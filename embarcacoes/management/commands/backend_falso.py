@@ -0,0 +1,61 @@
+"""
+Comando Django que sobe um backend falso da API de inferência
+Aponte FASTAPI_YOLO_URL e ARITANA_API_URL para ele para testar carga e
+falhas do fluxo upload -> job -> resultado sem depender da API real
+"""
+from django.core.management.base import BaseCommand
+
+from embarcacoes.backend_falso import BackendFalso, criar_servidor
+
+
+class Command(BaseCommand):
+    help = 'Sobe um backend falso com /embarcacoes, /jobs/<id> e /ping para testes locais'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--porta', type=int, default=8001)
+        parser.add_argument('--frota', type=int, default=250, help='Embarcações iniciais (padrão: 250)')
+        parser.add_argument(
+            '--latencia', default='lognormal:0.08:0.5',
+            help='Latência das requisições GET: fixa:S | uniforme:A:B | normal:M:D | '
+                 'lognormal:MEDIANA:SIGMA | exponencial:M (padrão: lognormal:0.08:0.5)',
+        )
+        parser.add_argument('--latencia-upload', default='uniforme:0.5:2', help='Latência do POST de upload')
+        parser.add_argument('--tempo-inferencia', default='uniforme:2:8', help='Duração de cada job')
+        parser.add_argument('--workers', type=int, default=2, help='Jobs processados em paralelo (padrão: 2)')
+        parser.add_argument('--fila-maxima', type=int, default=50, help='Jobs na fila antes de recusar uploads')
+        parser.add_argument('--taxa-erro', type=float, default=0.0, help='Fração de respostas 503')
+        parser.add_argument('--taxa-queda', type=float, default=0.0, help='Fração de conexões derrubadas')
+        parser.add_argument('--taxa-falha-job', type=float, default=0.0, help='Fração de jobs que falham')
+        parser.add_argument('--semente', type=int, default=None, help='Semente para resultados reprodutíveis')
+
+    def handle(self, *args, **options):
+        backend = BackendFalso(
+            frota=options['frota'],
+            latencia=options['latencia'],
+            latencia_upload=options['latencia_upload'],
+            tempo_inferencia=options['tempo_inferencia'],
+            workers=options['workers'],
+            fila_maxima=options['fila_maxima'],
+            taxa_erro=options['taxa_erro'],
+            taxa_queda=options['taxa_queda'],
+            taxa_falha_job=options['taxa_falha_job'],
+            semente=options['semente'],
+        )
+        servidor = criar_servidor(options['host'], options['porta'], backend)
+
+        self.stdout.write(self.style.SUCCESS(f'[OK] Backend falso em {backend.url_base}'))
+        self.stdout.write(f"  - Frota: {options['frota']} | workers: {options['workers']} | fila: {options['fila_maxima']}")
+        self.stdout.write(f"  - Latência: {options['latencia']} | upload: {options['latencia_upload']}")
+        self.stdout.write(
+            f"  - Erros: {options['taxa_erro']:.0%} | quedas: {options['taxa_queda']:.0%} | "
+            f"jobs com falha: {options['taxa_falha_job']:.0%}"
+        )
+        self.stdout.write(f'  - Use: FASTAPI_YOLO_URL={backend.url_base} ARITANA_API_URL={backend.url_base}')
+
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write('Encerrando backend falso')
+        finally:
+            servidor.server_close()
@@ -0,0 +1,53 @@
+"""
+Comando Django para preencher classificação, confiança e URL processada
+das imagens já analisadas a partir de resultado_analise
+Útil após a migração 0006, que criou essas colunas
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from embarcacoes.models import ImagemEmbarcacao
+
+CAMPOS = ['classificacao', 'confiabilidade', 'imagem_processada_url', 'data_atualizacao']
+
+
+class Command(BaseCommand):
+    help = 'Preenche as colunas derivadas de resultado_analise em lotes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Quantidade de registros atualizados por lote (padrão: 500)',
+        )
+        parser.add_argument(
+            '--todos',
+            action='store_true',
+            help='Reprocessa também registros que já possuem classificação',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        imagens = ImagemEmbarcacao.objects.filter(resultado_analise__isnull=False)
+        if not options['todos']:
+            imagens = imagens.filter(classificacao='')
+        imagens = imagens.only('id', 'resultado_analise', *CAMPOS).order_by('id')
+
+        total = 0
+        lote = []
+        for imagem in imagens.iterator(chunk_size=batch_size):
+            imagem.aplicar_dados_resultado(imagem.resultado_analise)
+            imagem.data_atualizacao = timezone.now()  # bulk_update não aplica o auto_now
+            lote.append(imagem)
+            if len(lote) >= batch_size:
+                total += ImagemEmbarcacao.objects.bulk_update(lote, CAMPOS)
+                lote = []
+                self.stdout.write(f'  - {total} registros atualizados...')
+
+        if lote:
+            total += ImagemEmbarcacao.objects.bulk_update(lote, CAMPOS)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'[OK] {total} registros preenchidos a partir de resultado_analise')
+        )
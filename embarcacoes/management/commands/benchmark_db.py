@@ -0,0 +1,142 @@
+"""
+Comando Django para medir a vazão do banco sob a carga típica do ARITANA:
+polling de status de jobs, uploads e listagem de jobs ativos em paralelo
+Rode com DB_PROFILE=sqlite-basico, sqlite e postgres para comparar os perfis
+"""
+import random
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connection
+
+from embarcacoes.latencia import percentil
+from embarcacoes.models import Embarcacao, ImagemEmbarcacao, StatusAnalise
+
+NOME_BENCHMARK = '__benchmark_db__'
+
+
+class Command(BaseCommand):
+    help = 'Mede a vazão de polling, upload e leitura de jobs no banco configurado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duracao', type=float, default=10, help='Segundos de carga (padrão: 10)')
+        parser.add_argument('--pollers', type=int, default=8, help='Threads de polling de status (padrão: 8)')
+        parser.add_argument('--uploads', type=int, default=2, help='Threads de upload (padrão: 2)')
+        parser.add_argument('--leitores', type=int, default=2, help='Threads listando jobs ativos (padrão: 2)')
+        parser.add_argument('--jobs', type=int, default=200, help='Jobs ativos criados antes da carga (padrão: 200)')
+
+    def handle(self, *args, **options):
+        banco = settings.DATABASES['default']
+        self.stdout.write(
+            f"Perfil: {getattr(settings, 'DB_PROFILE', 'sqlite')} "
+            f"({connection.vendor}, CONN_MAX_AGE={banco.get('CONN_MAX_AGE', 0)})"
+        )
+
+        embarcacao = Embarcacao.objects.create(
+            nome=NOME_BENCHMARK, latitude=-1.45, longitude=-48.5, ativa=False
+        )
+        try:
+            job_ids = self._criar_jobs(embarcacao, options['jobs'])
+            resultados = self._executar_carga(embarcacao, job_ids, options)
+        finally:
+            # CASCADE remove também as imagens criadas durante a carga
+            Embarcacao.objects.filter(nome=NOME_BENCHMARK).delete()
+
+        self._exibir(resultados, options['duracao'])
+
+    def _criar_jobs(self, embarcacao, quantidade):
+        imagens = [
+            ImagemEmbarcacao(
+                embarcacao=embarcacao,
+                imagem='benchmark.jpg',
+                titulo=f'benchmark {i}',
+                job_id=f'bench-{uuid.uuid4().hex}',
+                status_analise=StatusAnalise.PROCESSANDO,
+            )
+            for i in range(quantidade)
+        ]
+        ImagemEmbarcacao.objects.bulk_create(imagens)
+        return [imagem.job_id for imagem in imagens]
+
+    def _executar_carga(self, embarcacao, job_ids, options):
+        operacoes = {
+            'polling': lambda: self._polling(random.choice(job_ids)),
+            'upload': lambda: self._upload(embarcacao),
+            'leitura': self._leitura,
+        }
+        resultados = {nome: {'latencias': [], 'erros': 0} for nome in operacoes}
+        lock = threading.Lock()
+        fim = time.monotonic() + options['duracao']
+
+        def trabalhador(nome):
+            try:
+                while time.monotonic() < fim:
+                    inicio = time.perf_counter()
+                    try:
+                        operacoes[nome]()
+                    except OperationalError:
+                        # "database is locked" no SQLite, timeouts no PostgreSQL
+                        with lock:
+                            resultados[nome]['erros'] += 1
+                        continue
+                    duracao = time.perf_counter() - inicio
+                    with lock:
+                        resultados[nome]['latencias'].append(duracao)
+            finally:
+                connection.close()
+
+        threads = (
+            [threading.Thread(target=trabalhador, args=('polling',)) for _ in range(options['pollers'])]
+            + [threading.Thread(target=trabalhador, args=('upload',)) for _ in range(options['uploads'])]
+            + [threading.Thread(target=trabalhador, args=('leitura',)) for _ in range(options['leitores'])]
+        )
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        close_old_connections()
+        return resultados
+
+    def _polling(self, job_id):
+        """Mesmo caminho de verificar_status_job: busca por job_id e atualiza o progresso"""
+        imagem = ImagemEmbarcacao.objects.get(job_id=job_id)
+        imagem.atualizar_status_processamento({
+            'status': 'processing',
+            'progress': random.randint(0, 99),
+            'message': 'Processando',
+        })
+
+    def _upload(self, embarcacao):
+        """Mesmo caminho de upload_imagem: cria o registro e inicia o processamento"""
+        imagem = ImagemEmbarcacao.objects.create(
+            embarcacao=embarcacao, imagem='benchmark.jpg', titulo='benchmark upload'
+        )
+        imagem.iniciar_processamento(f'bench-{uuid.uuid4().hex}')
+
+    def _leitura(self):
+        """Mesma consulta de listar_jobs_processamento"""
+        list(ImagemEmbarcacao.objects.jobs_ativos().values(
+            'id', 'job_id', 'titulo', 'status_analise', 'progresso',
+            'mensagem_status', 'data_upload'
+        )[:50])
+
+    def _exibir(self, resultados, duracao):
+        self.stdout.write('')
+        self.stdout.write(f"{'operação':<10} {'ops/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'erros':>6}")
+        for nome, dados in resultados.items():
+            latencias = dados['latencias']
+            self.stdout.write(
+                f"{nome:<10} {len(latencias) / duracao:>8.1f} "
+                f"{(percentil(latencias, 50) or 0) * 1000:>8.1f} "
+                f"{(percentil(latencias, 95) or 0) * 1000:>8.1f} "
+                f"{(percentil(latencias, 99) or 0) * 1000:>8.1f} "
+                f"{dados['erros']:>6}"
+            )
+
+        if any(dados['erros'] for dados in resultados.values()):
+            self.stdout.write(self.style.WARNING('[AVISO] Houve erros de bloqueio/timeout durante a carga'))
+        else:
+            self.stdout.write(self.style.SUCCESS('[OK] Carga concluída sem erros de bloqueio'))
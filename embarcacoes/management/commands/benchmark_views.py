@@ -0,0 +1,241 @@
+"""
+Comando Django com o benchmark ponta a ponta das views mais acessadas
+
+Para cada tamanho de frota, popula um banco de teste descartável e o cache
+(com prefixo de chaves próprio, apagado ao final) com dados falsos, mede
+latência, número de queries e pico
+de memória de cada view e grava um relatório JSON. Com --baseline, compara
+com um relatório anterior e falha se alguma view piorar além da tolerância
+"""
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from embarcacoes.api_client import CHAVE_CONTINGENCIA, api_client
+from embarcacoes.backend_falso import BackendFalso, criar_servidor
+from embarcacoes.cache_camadas import cache_quente, invalidar_caches
+from embarcacoes.frota import FrotaCompacta
+from embarcacoes.latencia import percentil
+from embarcacoes.models import Embarcacao, ImagemEmbarcacao, Regiao, StatusAnalise
+
+# nome -> (método, caminho)
+CENARIOS = {
+    'dashboard': ('GET', '/dashboard/'),
+    'historico': ('GET', '/historico/'),
+    'historico_ajax': ('GET', '/api/historico/'),
+    'historico_ajax_filtros': ('GET', '/api/historico/?tipo=ilegal&regiao=Icoaraci&busca=embarca'),
+    'historico_ajax_pagina_profunda': ('GET', '/api/historico/?page={ultima_pagina}'),
+    'dados_mapa_json': ('GET', '/api/mapa/'),
+    'exportar_csv': ('GET', '/api/exportar/'),
+    'listar_jobs_processamento': ('GET', '/api/jobs/'),
+    'upload': ('POST', '/upload/'),
+}
+
+# Métricas comparadas com a baseline e folga absoluta para ignorar ruído
+METRICAS_COMPARADAS = {'p95_ms': 5.0, 'queries': 0, 'pico_memoria_kb': 256}
+
+
+class Rollback(Exception):
+    """Desfaz os dados de benchmark ao sair da transação"""
+
+
+class Command(BaseCommand):
+    help = 'Mede latência, queries e memória das views principais com frotas de 100 a 100k'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamanhos', default='100,1000,10000,100000',
+            help='Tamanhos de frota separados por vírgula (padrão: 100,1000,10000,100000)',
+        )
+        parser.add_argument('--repeticoes', type=int, default=10, help='Medições por view (padrão: 10)')
+        parser.add_argument('--cenarios', default='', help='Lista de cenários (padrão: todos)')
+        parser.add_argument('--saida', default='benchmark_views.json', help='Arquivo do relatório JSON')
+        parser.add_argument('--baseline', help='Relatório anterior para detectar regressões')
+        parser.add_argument(
+            '--tolerancia', type=float, default=0.25,
+            help='Piora relativa aceita em relação à baseline (padrão: 0.25)',
+        )
+
+    def handle(self, *args, **options):
+        tamanhos = [int(t) for t in options['tamanhos'].split(',')]
+        cenarios = options['cenarios'].split(',') if options['cenarios'] else list(CENARIOS)
+
+        backend = BackendFalso(frota=0, workers=1, tempo_inferencia='fixa:0')
+        servidor = criar_servidor('127.0.0.1', 0, backend)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        url_original = api_client.base_url
+        api_client.base_url = backend.url_base
+
+        # Banco de teste descartável e chaves de cache com prefixo próprio: a frota
+        # falsa (inclusive a cópia de contingência) não substitui os dados reais
+        config_cache = dict(settings.CACHES['default'])
+        config_cache['KEY_PREFIX'] = f"{config_cache.get('KEY_PREFIX', '')}:benchmark-{uuid.uuid4().hex[:8]}"
+        nome_banco = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+        relatorio = {'gerado_em': timezone.now().isoformat(), 'repeticoes': options['repeticoes'], 'resultados': {}}
+        try:
+            with override_settings(
+                FASTAPI_YOLO_URL=backend.url_base,
+                MEDIA_ROOT=tempfile.mkdtemp(prefix='benchmark_views_'),
+                ALLOWED_HOSTS=['testserver'],
+                CACHES={'default': config_cache},
+            ):
+                try:
+                    for tamanho in tamanhos:
+                        self.stdout.write(f'Frota com {tamanho} embarcações:')
+                        relatorio['resultados'][str(tamanho)] = self._medir_tamanho(
+                            tamanho, cenarios, options['repeticoes']
+                        )
+                finally:
+                    # Esvazia o L1 e apaga só as chaves deste prefixo (o clear do Redis não usa FLUSHDB)
+                    invalidar_caches()
+                    cache.clear()
+        finally:
+            api_client.base_url = url_original
+            servidor.shutdown()
+            connection.creation.destroy_test_db(nome_banco, verbosity=0)
+
+        with open(options['saida'], 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"[OK] Relatório gravado em {options['saida']}"))
+
+        if options['baseline']:
+            self._comparar(relatorio, options['baseline'], options['tolerancia'])
+
+    def _medir_tamanho(self, tamanho, cenarios, repeticoes):
+        resultados = {}
+        try:
+            with transaction.atomic():
+                frota = self._popular(tamanho)
+                for nome in cenarios:
+                    resultados[nome] = self._medir(nome, frota, repeticoes)
+                    r = resultados[nome]
+                    self.stdout.write(
+                        f"  {nome:<32} p50 {r['p50_ms']:>8.1f}ms  p95 {r['p95_ms']:>8.1f}ms  "
+                        f"frio {r['frio_ms']:>8.1f}ms  {r['queries']:>4} queries  {r['pico_memoria_kb']:>8} KB"
+                    )
+                raise Rollback
+        except Rollback:
+            pass
+        return resultados
+
+    def _popular(self, tamanho):
+        """Imagens locais no banco e frota da API no cache, ambas com 'tamanho' itens"""
+        rng = random.Random(tamanho)
+        embarcacoes = Embarcacao.objects.bulk_create([
+            Embarcacao(
+                nome=f'Benchmark {i}', regiao=rng.choice(Regiao.values),
+                latitude=-1.45, longitude=-48.5,
+            )
+            for i in range(max(1, tamanho // 10))
+        ])
+        agora = timezone.now()
+        status = [StatusAnalise.ANALISADA] * 16 + [StatusAnalise.ERRO] * 3 + [StatusAnalise.PROCESSANDO]
+        imagens = []
+        for i in range(tamanho):
+            situacao = rng.choice(status)
+            analisada = situacao == StatusAnalise.ANALISADA
+            imagens.append(ImagemEmbarcacao(
+                embarcacao=embarcacoes[i % len(embarcacoes)],
+                imagem=f'benchmark/{i}.png',
+                titulo=f'Benchmark {i}',
+                data_upload=agora - timedelta(minutes=i),
+                status_analise=situacao,
+                job_id=uuid.uuid4().hex,
+                resource_id=i + 1,
+                progresso=100 if analisada else 50,
+                classificacao=rng.choice(['legal', 'ilegal']) if analisada else '',
+                resultado_analise={'id': i + 1, 'classificacao': 'legal'} if analisada else None,
+            ))
+        ImagemEmbarcacao.objects.bulk_create(imagens, batch_size=2000)
+
+        gerador = BackendFalso(frota=tamanho, workers=0, semente=tamanho)
+        frota = {'embarcacoes': FrotaCompacta(gerador.listar(0, tamanho))}
+        return frota
+
+    def _requisitar(self, cliente, nome, frota):
+        metodo, caminho = CENARIOS[nome]
+        if metodo == 'POST':
+            imagem = SimpleUploadedFile('benchmark.png', b'\x89PNG benchmark', content_type='image/png')
+            return cliente.post(caminho, {'imagem': imagem, 'titulo': 'benchmark'}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        ultima_pagina = max(1, len(frota['embarcacoes']) // 20)
+        return cliente.get(caminho.format(ultima_pagina=ultima_pagina))
+
+    def _preparar_cache(self, frota):
+        """Invalida os caches e deixa a frota no cache quente, como após o primeiro acesso"""
+        invalidar_caches()
+        cache_quente.set('frota', frota, 600)
+        cache.set(CHAVE_CONTINGENCIA, frota, 600)
+
+    def _medir(self, nome, frota, repeticoes):
+        cliente = Client()
+        self._preparar_cache(frota)
+
+        inicio = time.perf_counter()
+        self._requisitar(cliente, nome, frota)
+        frio = time.perf_counter() - inicio
+
+        latencias = []
+        for _ in range(repeticoes):
+            # Com DEBUG=True o log de queries (limitado a 9000) pode estar cheio após a carga
+            reset_queries()
+            with CaptureQueriesContext(connection) as queries:
+                inicio = time.perf_counter()
+                resposta = self._requisitar(cliente, nome, frota)
+                latencias.append(time.perf_counter() - inicio)
+
+        # Memória medida à parte: o tracemalloc deixa o código bem mais lento
+        tracemalloc.start()
+        self._requisitar(cliente, nome, frota)
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        return {
+            'status': resposta.status_code,
+            'frio_ms': round(frio * 1000, 2),
+            'p50_ms': round(percentil(latencias, 50) * 1000, 2),
+            'p95_ms': round(percentil(latencias, 95) * 1000, 2),
+            'max_ms': round(max(latencias) * 1000, 2),
+            'queries': len(queries),
+            'pico_memoria_kb': pico // 1024,
+        }
+
+    def _comparar(self, relatorio, arquivo_baseline, tolerancia):
+        with open(arquivo_baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+        regressoes = []
+        for tamanho, cenarios in relatorio['resultados'].items():
+            for nome, atual in cenarios.items():
+                anterior = baseline.get('resultados', {}).get(tamanho, {}).get(nome)
+                if not anterior:
+                    continue
+                for metrica, folga in METRICAS_COMPARADAS.items():
+                    limite = anterior[metrica] * (1 + tolerancia) + folga
+                    if atual[metrica] > limite:
+                        regressoes.append(
+                            f'{nome} (frota {tamanho}): {metrica} {anterior[metrica]} -> {atual[metrica]}'
+                        )
+
+        if regressoes:
+            self.stdout.write(self.style.ERROR(f'[ERRO] {len(regressoes)} regressão(ões) em relação a {arquivo_baseline}:'))
+            for regressao in regressoes:
+                self.stdout.write(f'  - {regressao}')
+            sys.exit(1)
+        self.stdout.write(self.style.SUCCESS(f'[OK] Nenhuma regressão em relação a {arquivo_baseline}'))
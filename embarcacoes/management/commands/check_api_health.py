@@ -30,6 +30,9 @@ class Command(BaseCommand):
             self.stdout.write('Verificando saúde da API FastAPI YOLO...')
         
         is_healthy = api_client.verificar_saude_api()
+        self._exibir_circuitos()
+        if verbose:
+            self._exibir_latencias()
         
         if is_healthy:
             self.stdout.write(
@@ -56,3 +59,34 @@ class Command(BaseCommand):
             if use_exit_code:
                 sys.exit(1)
 
+
+
+    def _exibir_circuitos(self):
+        """Mostra o estado dos circuit breakers de cada endpoint"""
+        self.stdout.write('Circuit breakers:')
+        for circuito in api_client.status_circuitos():
+            linha = (
+                f"  - {circuito['nome']}: {circuito['estado']} "
+                f"({circuito['chamadas']} chamadas, {circuito['erros']} erros, "
+                f"{circuito['lentas']} lentas na janela atual)"
+            )
+            if circuito['estado'] == 'aberto':
+                self.stdout.write(self.style.ERROR(f"{linha} - reabre em {circuito['reabre_em']}s"))
+            elif circuito['estado'] == 'semi_aberto':
+                self.stdout.write(self.style.WARNING(linha))
+            else:
+                self.stdout.write(linha)
+
+    def _exibir_latencias(self):
+        """Mostra percentis de latência e o timeout adaptativo de cada endpoint"""
+        self.stdout.write('Latências (deste processo):')
+        for nome, dados in api_client.status_latencias().items():
+            if dados['p99'] is None:
+                self.stdout.write(
+                    f"  - {nome}: {dados['amostras']} amostras, timeout padrão {dados['timeout']}s"
+                )
+                continue
+            self.stdout.write(
+                f"  - {nome}: p50={dados['p50']:.2f}s p95={dados['p95']:.2f}s "
+                f"p99={dados['p99']:.2f}s timeout={dados['timeout']:.1f}s"
+            )
@@ -0,0 +1,45 @@
+"""
+Comando Django para verificar os planos de execução das consultas mais usadas
+Falha se alguma delas voltar a fazer varredura completa da tabela ou ordenação
+em memória. As mesmas verificações rodam no 'manage.py test'
+(embarcacoes/tests/test_planos.py); o comando serve para inspecionar os planos
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from embarcacoes.planos_consulta import consultas_monitoradas, desabilitar_seqscan, problemas_do_plano
+
+
+class Command(BaseCommand):
+    help = 'Verifica via EXPLAIN se as consultas críticas continuam usando índices'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verbose',
+            action='store_true',
+            help='Exibe o plano completo de cada consulta',
+        )
+
+    def handle(self, *args, **options):
+        verbose = options['verbose']
+
+        desabilitar_seqscan()
+
+        falhas = 0
+        for nome, queryset, exige_ordenacao in consultas_monitoradas():
+            plano = queryset.explain()
+            problemas = problemas_do_plano(plano, exige_ordenacao)
+
+            if problemas:
+                falhas += 1
+                self.stdout.write(self.style.ERROR(f'[ERRO] {nome}'))
+                for problema in problemas:
+                    self.stdout.write(f'  - {problema}')
+            else:
+                self.stdout.write(self.style.SUCCESS(f'[OK] {nome}'))
+
+            if verbose:
+                for linha in plano.splitlines():
+                    self.stdout.write(f'    {linha}')
+
+        if falhas:
+            raise CommandError(f'{falhas} consulta(s) sem uso adequado de índices')
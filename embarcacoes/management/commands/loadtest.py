@@ -0,0 +1,249 @@
+"""
+Comando Django que gera carga realista contra um servidor do ARITANA em execução
+
+Simula, ao mesmo tempo, usuários enviando imagens, navegadores consultando o
+status de cada job ativo e leitores do dashboard/histórico, e relata vazão,
+percentis de latência, taxa de erros e tempo gasto no banco (lido do header
+Server-Timing, que inclui a espera por locks do SQLite). Serve para achar o
+ponto em que o pipeline síncrono satura
+"""
+import random
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from embarcacoes.backend_falso import PNG_1X1
+from embarcacoes.latencia import percentil
+
+LEITURAS = ['/dashboard/', '/historico/', '/api/historico/', '/api/historico/?page=3', '/api/mapa/', '/api/jobs/']
+STATUS_FINAIS = {'analisada', 'erro'}
+RE_TEMPO_DB = re.compile(r'(?:^|,\s*)db;dur=([\d.]+)')
+
+
+class Estatisticas:
+    """Latências, erros e tempo de banco por operação, compartilhados entre threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencias = defaultdict(list)
+        self.tempos_db = defaultdict(list)
+        self.erros = defaultdict(int)
+        self.jobs = {'concluidos': 0, 'falhos': 0, 'abandonados': 0, 'duracoes': []}
+
+    def registrar(self, operacao, duracao, response=None, erro=False):
+        with self._lock:
+            if erro:
+                self.erros[operacao] += 1
+                return
+            self.latencias[operacao].append(duracao)
+            tempo_db = RE_TEMPO_DB.search(response.headers.get('Server-Timing', ''))
+            if tempo_db:
+                self.tempos_db[operacao].append(float(tempo_db.group(1)))
+
+    def registrar_job(self, situacao, duracao=None):
+        with self._lock:
+            self.jobs[situacao] += 1
+            if duracao is not None:
+                self.jobs['duracoes'].append(duracao)
+
+
+class Command(BaseCommand):
+    help = 'Gera carga concorrente de uploads, polling de jobs e leituras contra um servidor em execução'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Servidor alvo (padrão: http://127.0.0.1:8000)')
+        parser.add_argument('--duracao', type=float, default=60, help='Segundos de carga (padrão: 60)')
+        parser.add_argument('--uploaders', type=int, default=2, help='Usuários enviando imagens (padrão: 2)')
+        parser.add_argument('--imagens', help='Diretório com imagens .jpg/.jpeg/.png (padrão: PNG sintético)')
+        parser.add_argument('--intervalo-upload', type=float, default=5, help='Pausa entre uploads de cada usuário (s)')
+        parser.add_argument('--pollers-por-job', type=int, default=1, help='Abas consultando cada job (padrão: 1)')
+        parser.add_argument('--intervalo-polling', type=float, default=3, help='Intervalo do polling de status (s)')
+        parser.add_argument('--leitores', type=int, default=4, help='Usuários navegando no dashboard/histórico')
+        parser.add_argument('--intervalo-leitura', type=float, default=1, help='Pausa entre leituras (s)')
+        parser.add_argument(
+            '--limite-espera-db', type=float, default=100,
+            help='Tempo de banco (ms) a partir do qual a requisição conta como espera por lock',
+        )
+
+    def handle(self, *args, **options):
+        self.url = options['url'].rstrip('/')
+        self.opcoes = options
+        self.imagens = self._carregar_imagens(options['imagens'])
+        self.estatisticas = Estatisticas()
+        self.fim = time.monotonic() + options['duracao']
+        self.threads_polling = []
+        self._threads_lock = threading.Lock()
+
+        try:
+            requests.get(f'{self.url}/api/jobs/', timeout=10)
+        except requests.exceptions.RequestException as e:
+            raise CommandError(f'Servidor {self.url} inacessível: {e}')
+
+        self.stdout.write(
+            f"Carga em {self.url} por {options['duracao']:.0f}s: {options['uploaders']} uploaders, "
+            f"{options['pollers_por_job']} poller(s) por job, {options['leitores']} leitores"
+        )
+        threads = (
+            [threading.Thread(target=self._uploader) for _ in range(options['uploaders'])]
+            + [threading.Thread(target=self._leitor) for _ in range(options['leitores'])]
+        )
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with self._threads_lock:
+            pollers = list(self.threads_polling)
+        for thread in pollers:
+            thread.join()
+
+        self._exibir(options['duracao'])
+
+    def _carregar_imagens(self, diretorio):
+        if not diretorio:
+            return [('loadtest.png', PNG_1X1)]
+        arquivos = [
+            caminho for caminho in sorted(Path(diretorio).iterdir())
+            if caminho.suffix.lower() in {'.jpg', '.jpeg', '.png'}
+        ]
+        if not arquivos:
+            raise CommandError(f'Nenhuma imagem .jpg/.jpeg/.png em {diretorio}')
+        return [(caminho.name, caminho.read_bytes()) for caminho in arquivos]
+
+    def _medir(self, sessao, operacao, metodo, caminho, sucesso=(200,), **kwargs):
+        """Executa a requisição e registra latência/erro; retorna a resposta ou None"""
+        kwargs.setdefault('timeout', 180)
+        inicio = time.perf_counter()
+        try:
+            response = sessao.request(metodo, f'{self.url}{caminho}', **kwargs)
+        except requests.exceptions.RequestException:
+            self.estatisticas.registrar(operacao, 0, erro=True)
+            return None
+        duracao = time.perf_counter() - inicio
+        if response.status_code not in sucesso:
+            self.estatisticas.registrar(operacao, duracao, erro=True)
+            return None
+        self.estatisticas.registrar(operacao, duracao, response)
+        return response
+
+    def _uploader(self):
+        sessao = requests.Session()
+        sessao.get(f'{self.url}/upload/', timeout=30)  # cookie CSRF, como o navegador
+        while time.monotonic() < self.fim:
+            nome, conteudo = random.choice(self.imagens)
+            titulo = f'loadtest-{uuid.uuid4().hex[:12]}'
+            inicio = time.monotonic()
+            response = self._medir(
+                sessao, 'upload', 'POST', '/upload/', sucesso=(302,),
+                files={'imagem': (nome, conteudo)},
+                data={
+                    'titulo': titulo,
+                    'regiao': 'Belém Centro',
+                    'csrfmiddlewaretoken': sessao.cookies.get('csrftoken', ''),
+                },
+                headers={'Referer': f'{self.url}/upload/'},
+                allow_redirects=False,
+            )
+            if response is not None:
+                job_id = self._localizar_job(sessao, titulo)
+                if job_id:
+                    self._iniciar_pollers(job_id, inicio)
+            time.sleep(self.opcoes['intervalo_upload'])
+
+    def _localizar_job(self, sessao, titulo):
+        """O upload redireciona sem devolver o job_id; o navegador o acha em /api/jobs/"""
+        for _ in range(5):
+            response = self._medir(sessao, 'listar_jobs', 'GET', '/api/jobs/')
+            if response is not None:
+                for job in response.json().get('jobs', []):
+                    if job.get('titulo') == titulo:
+                        return job['job_id']
+            time.sleep(0.5)
+        return None
+
+    def _iniciar_pollers(self, job_id, inicio):
+        fim_job = threading.Event()
+        novas = [
+            threading.Thread(target=self._poller, args=(job_id, inicio, fim_job, indice == 0))
+            for indice in range(self.opcoes['pollers_por_job'])
+        ]
+        with self._threads_lock:
+            self.threads_polling.extend(novas)
+        for thread in novas:
+            thread.start()
+
+    def _poller(self, job_id, inicio, fim_job, principal):
+        sessao = requests.Session()
+        while time.monotonic() < self.fim and not fim_job.is_set():
+            response = self._medir(sessao, 'status_job', 'GET', f'/api/jobs/{job_id}/status/')
+            dados = response.json() if response is not None else {}
+            if dados.get('status') in STATUS_FINAIS:
+                fim_job.set()
+                if principal:
+                    if dados['status'] == 'analisada':
+                        if dados.get('resource_id'):
+                            self._medir(sessao, 'resultado', 'GET', f"/api/resultado/{dados['resource_id']}/")
+                        self.estatisticas.registrar_job('concluidos', time.monotonic() - inicio)
+                    else:
+                        self.estatisticas.registrar_job('falhos')
+                return
+            time.sleep(self.opcoes['intervalo_polling'])
+        if principal and not fim_job.is_set():
+            self.estatisticas.registrar_job('abandonados')
+
+    def _leitor(self):
+        sessao = requests.Session()
+        while time.monotonic() < self.fim:
+            caminho = random.choice(LEITURAS)
+            self._medir(sessao, f'leitura {caminho}', 'GET', caminho)
+            time.sleep(self.opcoes['intervalo_leitura'])
+
+    def _exibir(self, duracao):
+        estatisticas = self.estatisticas
+        limite_db = self.opcoes['limite_espera_db']
+
+        self.stdout.write('')
+        self.stdout.write(
+            f"{'operação':<32} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'erros':>7} {'db p95':>8} {'esperas':>8}"
+        )
+        operacoes = sorted(set(estatisticas.latencias) | set(estatisticas.erros))
+        for operacao in operacoes:
+            latencias = [valor * 1000 for valor in estatisticas.latencias[operacao]]
+            erros = estatisticas.erros[operacao]
+            total = len(latencias) + erros
+            tempos_db = estatisticas.tempos_db[operacao]
+            esperas = sum(1 for tempo in tempos_db if tempo >= limite_db)
+            self.stdout.write(
+                f"{operacao:<32} {total / duracao:>7.2f} {percentil(latencias, 50) or 0:>8.1f} "
+                f"{percentil(latencias, 95) or 0:>8.1f} {percentil(latencias, 99) or 0:>8.1f} "
+                f"{erros / total:>7.1%} {percentil(tempos_db, 95) or 0:>8.1f} {esperas:>8}"
+            )
+
+        jobs = estatisticas.jobs
+        duracoes = jobs['duracoes']
+        self.stdout.write('')
+        self.stdout.write(
+            f"Jobs: {jobs['concluidos']} concluídos, {jobs['falhos']} com erro, "
+            f"{jobs['abandonados']} ainda em andamento ao fim da carga"
+        )
+        if duracoes:
+            self.stdout.write(
+                f"  - Upload até resultado: p50 {percentil(duracoes, 50):.1f}s, "
+                f"p95 {percentil(duracoes, 95):.1f}s"
+            )
+        self.stdout.write(
+            f"  - 'esperas' = requisições com mais de {limite_db:.0f}ms no banco "
+            f"(inclui espera por lock); requer ARITANA_SERVER_TIMING ativo"
+        )
+
+        total_erros = sum(estatisticas.erros.values())
+        if total_erros:
+            self.stdout.write(self.style.WARNING(f'[AVISO] {total_erros} requisições com erro'))
+        else:
+            self.stdout.write(self.style.SUCCESS('[OK] Carga concluída sem erros'))
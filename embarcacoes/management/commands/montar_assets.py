@@ -0,0 +1,43 @@
+"""
+Comando Django que monta os bundles de CSS/JS de ARITANA_ASSETS
+
+Concatena e minifica os arquivos de cada bundle em ARITANA_ASSETS['diretorio'].
+Deve rodar antes do collectstatic, que acrescenta o hash ao nome e gera as
+versões .gz/.br:
+
+    python manage.py montar_assets && python manage.py collectstatic --noinput
+"""
+import gzip
+from pathlib import Path
+
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+
+from embarcacoes.assets import arquivos_do_bundle, configuracao, montar_bundle
+
+
+class Command(BaseCommand):
+    help = 'Concatena e minifica os bundles de CSS/JS (rodar antes do collectstatic)'
+
+    def handle(self, *args, **options):
+        destino = Path(configuracao()['diretorio'])
+        bundles = configuracao().get('bundles', {})
+        if not bundles:
+            raise CommandError('ARITANA_ASSETS não define nenhum bundle')
+
+        for nome in bundles:
+            try:
+                conteudo = montar_bundle(nome).encode('utf-8')
+            except FileNotFoundError as e:
+                raise CommandError(str(e))
+            caminho = destino / nome
+            caminho.parent.mkdir(parents=True, exist_ok=True)
+            caminho.write_bytes(conteudo)
+
+            tamanho_origem = sum(Path(finders.find(origem)).stat().st_size for origem in arquivos_do_bundle(nome))
+            self.stdout.write(
+                f'  - {nome}: {len(arquivos_do_bundle(nome))} arquivo(s), {tamanho_origem / 1024:.0f} KB -> '
+                f'{len(conteudo) / 1024:.0f} KB minificado, {len(gzip.compress(conteudo)) / 1024:.0f} KB gzip'
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'[OK] {len(bundles)} bundles gravados em {destino}'))
@@ -0,0 +1,61 @@
+"""
+Comando Django para relatar o tempo gasto em cada etapa dos jobs de análise
+(envio ao backend, fila, inferência e busca do resultado) e a vazão por hora
+e por região. Útil para dimensionar a capacidade do backend
+"""
+import json
+
+from django.core.management.base import BaseCommand
+
+from embarcacoes.analise_jobs import relatorio_ciclo_jobs
+
+
+def _segundos(valor):
+    return '-' if valor is None else f'{valor:.1f}s'
+
+
+class Command(BaseCommand):
+    help = 'Percentis de latência por etapa e vazão por hora/região dos jobs de análise'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horas',
+            type=int,
+            default=24,
+            help='Janela analisada, em horas (padrão: 24)',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Exibe o relatório em JSON',
+        )
+
+    def handle(self, *args, **options):
+        relatorio = relatorio_ciclo_jobs(options['horas'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(relatorio, ensure_ascii=False, indent=2))
+            return
+
+        self.stdout.write(f"Jobs concluídos nas últimas {relatorio['horas']}h")
+        self.stdout.write('')
+        self.stdout.write(f"{'etapa':<16} {'n':>6} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}")
+        for etapa, p in relatorio['etapas'].items():
+            self.stdout.write(
+                f"{etapa:<16} {p['n']:>6} {_segundos(p['p50']):>9} {_segundos(p['p90']):>9} "
+                f"{_segundos(p['p99']):>9} {_segundos(p['max']):>9}"
+            )
+
+        self.stdout.write('')
+        self.stdout.write('Vazão por hora:')
+        for hora in relatorio['por_hora']:
+            self.stdout.write(f"  {hora['hora'][:16]}  {hora['concluidos']:>5} concluídos  {hora['erros']:>4} erros")
+
+        self.stdout.write('')
+        self.stdout.write('Por região:')
+        for regiao in relatorio['por_regiao']:
+            self.stdout.write(
+                f"  {regiao['regiao']:<16} {regiao['concluidos']:>5} concluídos  {regiao['erros']:>4} erros  "
+                f"{regiao['por_hora']:>6.2f}/h  p50 total {_segundos(regiao['total']['p50'])}  "
+                f"p90 total {_segundos(regiao['total']['p90'])}  p99 total {_segundos(regiao['total']['p99'])}"
+            )
@@ -0,0 +1,227 @@
+"""
+Métricas no formato texto do Prometheus
+
+Cada worker acumula contadores e histogramas em memória. Com CACHE_BACKEND=redis
+uma thread em segundo plano soma os deltas, a cada ARITANA_METRICAS['intervalo_envio']
+segundos, em um único hash do Redis (um HINCRBY por série, no mesmo pipeline), onde
+ficam agregados os valores de todos os workers. Com um cache que não é compartilhado
+(LocMemCache) os totais ficam só na memória do processo, sem disputar espaço com as
+demais chaves. O endpoint /metrics lê esses totais e acrescenta os gauges calculados
+na hora (jobs por status).
+"""
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django_redis.cache import RedisCache
+
+logger = logging.getLogger(__name__)
+
+CHAVE_HASH = 'metricas'
+ESCALA_SOMA = 1_000_000  # somas guardadas em microssegundos (HINCRBY só aceita inteiros)
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 180.0)
+
+DEFINICOES = {
+    'aritana_http_request_duration_seconds': ('histogram', 'Duração das requisições por view'),
+    'aritana_upstream_duration_seconds': ('histogram', 'Duração das chamadas à API externa por método do AritanaAPIClient'),
+    'aritana_cache_requests_total': ('counter', 'Leituras do cache em camadas por camada e resultado'),
+}
+
+_metodo_api = contextvars.ContextVar('metodo_api', default='outro')
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _rotulos(rotulos):
+    """Rótulos no formato canônico do Prometheus: a="1",b="2" (ordenados)"""
+    return ','.join(f'{nome}="{_escapar(valor)}"' for nome, valor in sorted(rotulos.items()))
+
+
+def _redis_compartilhado():
+    """
+    (cliente Redis, chave do hash) do cache padrão, ou None se ele não é compartilhado
+
+    Também retorna None enquanto o RedisComFallbackCache está em memória local.
+    """
+    backend = caches['default']
+    if not isinstance(backend, RedisCache) or getattr(backend, 'usando_fallback', False):
+        return None
+    return backend.client.get_client(write=True), backend.make_key(CHAVE_HASH)
+
+
+class RegistroMetricas:
+    """Contadores e histogramas com envio em segundo plano para o Redis compartilhado"""
+
+    def __init__(self, intervalo_envio=5):
+        self.intervalo_envio = intervalo_envio
+        # Deltas ainda não enviados; sem Redis, são os próprios totais do processo
+        self._pendentes = defaultdict(int)
+        self._lock = threading.Lock()
+        self._pid_envio = None
+
+    def incrementar(self, metrica, valor=1, **rotulos):
+        with self._lock:
+            self._pendentes[f'{metrica}|{_rotulos(rotulos)}'] += valor
+        self._garantir_envio_periodico()
+
+    def observar(self, metrica, duracao, **rotulos):
+        """Registra uma observação de histograma (em segundos)"""
+        serie = _rotulos(rotulos)
+        indice = bisect_left(BUCKETS, duracao)
+        le = BUCKETS[indice] if indice < len(BUCKETS) else '+Inf'
+        with self._lock:
+            self._pendentes[f'{metrica}_bucket|{serie}|{le}'] += 1
+            self._pendentes[f'{metrica}_count|{serie}'] += 1
+            self._pendentes[f'{metrica}_sum|{serie}'] += int(duracao * ESCALA_SOMA)
+        self._garantir_envio_periodico()
+
+    def _garantir_envio_periodico(self):
+        """Inicia a thread de envio neste processo (de novo após um fork do gunicorn)"""
+        pid = os.getpid()
+        if self._pid_envio == pid:
+            return
+        with self._lock:
+            if self._pid_envio == pid:
+                return
+            self._pid_envio = pid
+        threading.Thread(target=self._enviar_periodicamente, name='envio-metricas', daemon=True).start()
+
+    def _enviar_periodicamente(self):
+        while True:
+            time.sleep(self.intervalo_envio)
+            self.enviar()
+
+    def enviar(self):
+        """Soma os deltas pendentes deste worker no hash compartilhado, em um só pipeline"""
+        redis = _redis_compartilhado()
+        if redis is None:
+            return
+        cliente, chave = redis
+        with self._lock:
+            pendentes, self._pendentes = self._pendentes, defaultdict(int)
+        if not pendentes:
+            return
+
+        try:
+            pipeline = cliente.pipeline(transaction=False)
+            for serie, delta in pendentes.items():
+                pipeline.hincrby(chave, serie, delta)
+            pipeline.execute()
+        except Exception as e:
+            logger.warning("Não foi possível enviar métricas ao Redis: %s", e)
+            # Devolve os deltas para o próximo envio
+            with self._lock:
+                for serie, delta in pendentes.items():
+                    self._pendentes[serie] += delta
+
+    def valores(self):
+        """Totais agregados de todos os workers (ou deste processo, sem Redis): {serie: valor}"""
+        self.enviar()
+        totais = defaultdict(int)
+        redis = _redis_compartilhado()
+        if redis is not None:
+            cliente, chave = redis
+            try:
+                for serie, valor in cliente.hgetall(chave).items():
+                    totais[serie.decode()] += int(valor)
+            except Exception as e:
+                logger.warning("Não foi possível ler métricas do Redis: %s", e)
+        with self._lock:
+            for serie, delta in self._pendentes.items():
+                totais[serie] += delta
+        return dict(totais)
+
+
+def formatar_prometheus(valores, gauges=()):
+    """
+    Texto de exposição do Prometheus a partir dos totais agregados
+
+    gauges: iterável de (nome, ajuda, [(rotulos, valor), ...]) calculados na hora
+    """
+    contadores = defaultdict(dict)
+    histogramas = defaultdict(lambda: defaultdict(lambda: {'buckets': defaultdict(int), 'sum': 0, 'count': 0}))
+    for serie, valor in valores.items():
+        nome, rotulos, *le = serie.split('|')
+        if nome.endswith('_bucket'):
+            histogramas[nome[:-7]][rotulos]['buckets'][le[0]] += valor
+        elif nome.endswith('_count') and nome[:-6] in DEFINICOES:
+            histogramas[nome[:-6]][rotulos]['count'] = valor
+        elif nome.endswith('_sum') and nome[:-4] in DEFINICOES:
+            histogramas[nome[:-4]][rotulos]['sum'] = valor / ESCALA_SOMA
+        else:
+            contadores[nome][rotulos] = valor
+
+    linhas = []
+    for nome, (tipo, ajuda) in DEFINICOES.items():
+        if tipo == 'counter' and nome in contadores:
+            linhas += [f'# HELP {nome} {ajuda}', f'# TYPE {nome} counter']
+            linhas += [f'{nome}{{{rotulos}}} {valor}' for rotulos, valor in sorted(contadores[nome].items())]
+        elif tipo == 'histogram' and nome in histogramas:
+            linhas += [f'# HELP {nome} {ajuda}', f'# TYPE {nome} histogram']
+            for rotulos, dados in sorted(histogramas[nome].items()):
+                separador = ',' if rotulos else ''
+                acumulado = 0
+                for limite in [*BUCKETS, '+Inf']:
+                    acumulado += dados['buckets'].get(str(limite), 0)
+                    linhas.append(f'{nome}_bucket{{{rotulos}{separador}le="{limite}"}} {acumulado}')
+                linhas.append(f'{nome}_sum{{{rotulos}}} {dados["sum"]}')
+                linhas.append(f'{nome}_count{{{rotulos}}} {dados["count"]}')
+
+    for nome, ajuda, amostras in gauges:
+        linhas += [f'# HELP {nome} {ajuda}', f'# TYPE {nome} gauge']
+        linhas += [f'{nome}{{{_rotulos(rotulos)}}} {valor}' for rotulos, valor in amostras]
+
+    return '\n'.join(linhas) + '\n'
+
+
+def taxas_acerto_cache(valores):
+    """Gauge com a fração de hits por camada, derivada dos contadores agregados"""
+    por_camada = defaultdict(lambda: {'hit': 0, 'miss': 0})
+    for serie, valor in valores.items():
+        nome, rotulos, *_ = serie.split('|')
+        if nome != 'aritana_cache_requests_total':
+            continue
+        campos = dict(par.split('=', 1) for par in rotulos.split(','))
+        por_camada[campos['camada'].strip('"')][campos['resultado'].strip('"')] += valor
+
+    return (
+        'aritana_cache_hit_ratio',
+        'Fração de leituras atendidas por camada do cache',
+        [
+            ({'camada': camada}, round(c['hit'] / (c['hit'] + c['miss']), 4))
+            for camada, c in sorted(por_camada.items())
+            if c['hit'] + c['miss']
+        ],
+    )
+
+
+def medir_metodo_api(func):
+    """Rotula as chamadas HTTP feitas dentro do método com o nome dele"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _metodo_api.set(func.__name__)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _metodo_api.reset(token)
+    return wrapper
+
+
+def metodo_api_atual():
+    return _metodo_api.get()
+
+
+# Instância global usada pelo middleware, cliente da API e cache em camadas
+metricas = RegistroMetricas(
+    intervalo_envio=getattr(settings, 'ARITANA_METRICAS', {}).get('intervalo_envio', 5),
+)
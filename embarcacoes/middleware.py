@@ -0,0 +1,125 @@
+"""
+Middlewares do ARITANA
+"""
+import cProfile
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from .instrumentacao import encerrar_medicao, iniciar_medicao
+from .metricas import metricas
+from .perfilamento import ColetorQueries, montar_perfil, salvar_perfil
+
+logger = logging.getLogger('embarcacoes.requisicoes')
+
+
+class TempoRequisicaoMiddleware:
+    """
+    Mede cada requisição (total, banco, API externa, cache e templates)
+    e publica o resultado no header Server-Timing, em uma linha de log JSON
+    e no histograma de latência por view das métricas
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'ARITANA_SERVER_TIMING', True)
+
+    def __call__(self, request):
+        medicao, token = iniciar_medicao()
+        try:
+            with connection.execute_wrapper(medicao.medir_query):
+                response = self.get_response(request)
+        finally:
+            encerrar_medicao(token)
+
+        total = medicao.total()
+        if self.server_timing:
+            response['Server-Timing'] = medicao.server_timing(total)
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.url_name if match else None
+        metricas.observar(
+            'aritana_http_request_duration_seconds', total,
+            view=view or 'desconhecida', metodo=request.method, status=response.status_code,
+        )
+        # Serializado em JSON pela thread de log (ver registro_logs.FilaLogHandler)
+        logger.info('%s %s %s', request.method, request.path, response.status_code, extra={'dados': {
+            'evento': 'requisicao',
+            'metodo': request.method,
+            'caminho': request.path,
+            'view': view,
+            'status': response.status_code,
+            **medicao.resumo(total),
+        }})
+        return response
+
+
+class PerfilamentoMiddleware:
+    """
+    Roda o cProfile na requisição quando um staff pede (header
+    X-Aritana-Perfil ou ?perfil=1) ou quando ela cai na amostragem
+
+    Desligado (ARITANA_PERFIL['habilitado'] = False) o middleware nem é
+    carregado; ligado, as requisições não perfiladas custam só a checagem
+    do header/parâmetro e um sorteio quando há amostragem.
+    Deve vir depois do AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = {'habilitado': True, 'amostragem': 0.0, 'top': 40, 'max_queries': 50, 'retencao': 200}
+        self.config.update(getattr(settings, 'ARITANA_PERFIL', {}))
+        if not self.config['habilitado']:
+            raise MiddlewareNotUsed
+
+    def _motivo(self, request):
+        from .models import PerfilRequisicao
+
+        if request.headers.get('X-Aritana-Perfil') == '1':
+            motivo = PerfilRequisicao.Motivo.HEADER
+        elif request.GET.get('perfil') == '1':
+            motivo = PerfilRequisicao.Motivo.QUERY
+        else:
+            motivo = None
+        if motivo and getattr(request, 'user', None) is not None and request.user.is_staff:
+            return motivo
+        if self.config['amostragem'] and random.random() < self.config['amostragem']:
+            return PerfilRequisicao.Motivo.AMOSTRAGEM
+        return None
+
+    def __call__(self, request):
+        motivo = self._motivo(request)
+        if motivo is None:
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        coletor = ColetorQueries()
+        inicio = time.perf_counter()
+        with connection.execute_wrapper(coletor):
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        duracao = time.perf_counter() - inicio
+
+        match = getattr(request, 'resolver_match', None)
+        try:
+            perfil = salvar_perfil({
+                'metodo': request.method,
+                'caminho': request.get_full_path()[:500],
+                'view': (match.url_name or '') if match else '',
+                'status': response.status_code,
+                'motivo': motivo,
+                'duracao_ms': round(duracao * 1000, 1),
+                **montar_perfil(profiler, coletor, self.config),
+            }, self.config['retencao'])
+        except Exception as e:
+            logger.error("Falha ao gravar perfil de %s: %s", request.path, e)
+        else:
+            response['X-Aritana-Perfil'] = str(perfil.pk)
+        return response
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('embarcacoes', '0005_imagemembarcacao_result_url_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagemembarcacao',
+            name='classificacao',
+            field=models.CharField(blank=True, max_length=20, verbose_name='Classificação'),
+        ),
+        migrations.AddField(
+            model_name='imagemembarcacao',
+            name='imagem_processada_url',
+            field=models.URLField(blank=True, max_length=500, null=True, verbose_name='URL da Imagem Processada'),
+        ),
+        migrations.AddIndex(
+            model_name='imagemembarcacao',
+            index=models.Index(fields=['classificacao', 'data_upload'], name='embarcacoes_classif_75b6d6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='imagemembarcacao',
+            index=models.Index(fields=['confiabilidade'], name='embarcacoes_confiab_9e24b9_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('embarcacoes', '0006_imagemembarcacao_classificacao_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='imagemembarcacao',
+            name='embarcacoes_status__6092b0_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='imagemembarcacao',
+            name='embarcacoes_data_up_0598b2_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='imagemembarcacao',
+            name='embarcacoes_job_id_704bec_idx',
+        ),
+        migrations.AlterField(
+            model_name='imagemembarcacao',
+            name='embarcacao',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='imagens', to='embarcacoes.embarcacao', verbose_name='Embarcação'),
+        ),
+        migrations.AddIndex(
+            model_name='imagemembarcacao',
+            index=models.Index(condition=models.Q(('status_analise__in', ['pendente', 'processando'])), fields=['-data_upload', 'status_analise', 'job_id', 'progresso', 'titulo', 'mensagem_status'], name='imagem_jobs_ativos_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('embarcacoes', '0007_otimizar_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagemembarcacao',
+            name='data_conclusao',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Concluída/Falhou no Backend'),
+        ),
+        migrations.AddField(
+            model_name='imagemembarcacao',
+            name='data_encaminhamento',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Enviada ao Backend'),
+        ),
+        migrations.AddField(
+            model_name='imagemembarcacao',
+            name='data_inicio_backend',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Início no Backend'),
+        ),
+        migrations.AddField(
+            model_name='imagemembarcacao',
+            name='data_resultado',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Resultado Obtido'),
+        ),
+        migrations.AddIndex(
+            model_name='imagemembarcacao',
+            index=models.Index(fields=['data_conclusao'], name='embarcacoes_data_co_bb0f1c_idx'),
+        ),
+    ]
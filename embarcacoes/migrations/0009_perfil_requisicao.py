@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('embarcacoes', '0008_ciclo_vida_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PerfilRequisicao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('criado_em', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Criado em')),
+                ('metodo', models.CharField(max_length=10, verbose_name='Método')),
+                ('caminho', models.CharField(max_length=500, verbose_name='Caminho')),
+                ('view', models.CharField(blank=True, max_length=100, verbose_name='View')),
+                ('status', models.PositiveSmallIntegerField(verbose_name='Status HTTP')),
+                ('motivo', models.CharField(choices=[('header', 'Header X-Aritana-Perfil'), ('query', 'Parâmetro ?perfil=1'), ('amostragem', 'Amostragem')], max_length=15, verbose_name='Motivo')),
+                ('duracao_ms', models.FloatField(verbose_name='Duração (ms)')),
+                ('db_ms', models.FloatField(verbose_name='Tempo no Banco (ms)')),
+                ('db_queries', models.PositiveIntegerField(verbose_name='Queries')),
+                ('funcoes', models.JSONField(default=list, verbose_name='Funções Mais Custosas')),
+                ('queries', models.JSONField(default=list, verbose_name='Queries Mais Lentas')),
+                ('upstream', models.JSONField(default=dict, verbose_name='Chamadas à API Externa')),
+                ('relatorio', models.TextField(blank=True, verbose_name='Relatório pstats')),
+                ('dados', models.BinaryField(verbose_name='Dados do Perfil (.prof)')),
+            ],
+            options={
+                'verbose_name': 'Perfil de Requisição',
+                'verbose_name_plural': 'Perfis de Requisições',
+                'ordering': ['-criado_em'],
+                'indexes': [models.Index(fields=['criado_em'], name='embarcacoes_criado__62728c_idx')],
+            },
+        ),
+    ]
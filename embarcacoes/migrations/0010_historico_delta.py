@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-19 14:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('embarcacoes', '0009_perfil_requisicao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImagemRemovida',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('imagem_id', models.PositiveBigIntegerField(verbose_name='ID da Imagem')),
+                ('data_remocao', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Data da Remoção')),
+            ],
+            options={
+                'verbose_name': 'Imagem Removida',
+                'verbose_name_plural': 'Imagens Removidas',
+            },
+        ),
+        migrations.AddField(
+            model_name='imagemembarcacao',
+            name='data_atualizacao',
+            field=models.DateTimeField(auto_now=True, verbose_name='Última Atualização'),
+        ),
+        migrations.AddIndex(
+            model_name='imagemembarcacao',
+            index=models.Index(fields=['data_atualizacao'], name='embarcacoes_data_at_60bf71_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='imagemremovida',
+            index=models.Index(fields=['data_remocao'], name='embarcacoes_data_re_a6382e_idx'),
+        ),
+    ]
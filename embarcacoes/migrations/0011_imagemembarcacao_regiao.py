@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 14:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('embarcacoes', '0010_historico_delta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagemembarcacao',
+            name='regiao',
+            field=models.CharField(blank=True, max_length=100, verbose_name='Região'),
+        ),
+    ]
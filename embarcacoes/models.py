@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.expressions import RawSQL
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from decimal import Decimal
@@ -19,6 +20,27 @@ class StatusAnalise(models.TextChoices):
     ERRO = 'erro', 'Erro no Processamento'
 
 
+# Jobs em andamento; a ordem deve coincidir com a condição do índice parcial
+STATUS_ATIVOS = [StatusAnalise.PENDENTE, StatusAnalise.PROCESSANDO]
+
+# Compare-and-set do polling: status de origem aceitos para cada status de destino.
+# PROCESSANDO local é gravado no upload, com o backend ainda na fila (pending); um job
+# com erro só sai dele com o resultado (a API respondeu depois de o polling desistir)
+TRANSICOES_STATUS = {
+    StatusAnalise.PENDENTE: [StatusAnalise.PENDENTE, StatusAnalise.PROCESSANDO],
+    StatusAnalise.PROCESSANDO: [StatusAnalise.PENDENTE, StatusAnalise.PROCESSANDO],
+    StatusAnalise.ANALISADA: [StatusAnalise.PENDENTE, StatusAnalise.PROCESSANDO, StatusAnalise.ERRO],
+    StatusAnalise.ERRO: [StatusAnalise.PENDENTE, StatusAnalise.PROCESSANDO, StatusAnalise.ERRO],
+}
+
+# Campos lidos pelo endpoint de status de job
+CAMPOS_STATUS_JOB = [
+    'status_analise', 'progresso', 'mensagem_status', 'resource_id',
+    'erro_processamento', 'tentativas_consulta', 'resultado_analise',
+    'data_inicio_backend', 'data_conclusao', 'data_resultado',
+]
+
+
 class Regiao(models.TextChoices):
     BELEM_CENTRO = 'belem_centro', 'Belém Centro'
     ICOARACI = 'icoaraci', 'Icoaraci'
@@ -29,6 +51,21 @@ class Regiao(models.TextChoices):
     ANANINDEUA = 'ananindeua', 'Ananindeua'
 
 
+class EmbarcacaoQuerySet(models.QuerySet):
+    def com_contagem_imagens(self):
+        """
+        Anota total de imagens e contagem por status em uma única consulta agrupada
+
+        Cada embarcação recebe 'qtd_imagens' e 'qtd_imagens_<status>', lidos por
+        total_imagens e get_imagens_por_status sem consultas adicionais.
+        """
+        contagens = {
+            f'qtd_imagens_{status}': models.Count('imagens', filter=models.Q(imagens__status_analise=status))
+            for status, _ in StatusAnalise.choices
+        }
+        return self.annotate(qtd_imagens=models.Count('imagens'), **contagens)
+
+
 class Embarcacao(models.Model):
     nome = models.CharField('Nome da Embarcação', max_length=200)
     tipo = models.CharField(
@@ -66,6 +103,8 @@ class Embarcacao(models.Model):
     data_atualizacao = models.DateTimeField('Última Atualização', auto_now=True)
     ativa = models.BooleanField('Ativa', default=True)
     
+    objects = EmbarcacaoQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'Embarcação'
         verbose_name_plural = 'Embarcações'
@@ -101,22 +140,47 @@ class Embarcacao(models.Model):
     @property
     def total_imagens(self):
         """Retorna total de imagens da embarcação"""
+        if hasattr(self, 'qtd_imagens'):
+            return self.qtd_imagens
         return self.imagens.count()
     
     def get_imagens_por_status(self):
         """Retorna imagens agrupadas por status"""
+        if hasattr(self, 'qtd_imagens'):
+            return {
+                status: getattr(self, f'qtd_imagens_{status}')
+                for status, _ in StatusAnalise.choices
+            }
+        contagens = dict(
+            self.imagens.values_list('status_analise').annotate(total=models.Count('id')).order_by()
+        )
         return {
-            status: self.imagens.filter(status_analise=status).count()
+            status: contagens.get(status, 0)
             for status, _ in StatusAnalise.choices
         }
 
 
+class ImagemEmbarcacaoQuerySet(models.QuerySet):
+    def jobs_ativos(self):
+        """
+        Imagens com job pendente ou em processamento
+        
+        O filtro usa literais em vez de parâmetros para que o SQLite reconheça
+        a condição do índice parcial imagem_jobs_ativos_idx (com parâmetros
+        ele não consegue provar que a consulta está contida no índice).
+        """
+        valores = ', '.join(f"'{status}'" for status in STATUS_ATIVOS)
+        coluna = f'"{self.model._meta.db_table}"."status_analise"'
+        return self.filter(RawSQL(f'{coluna} IN ({valores})', [], output_field=models.BooleanField()))
+
+
 class ImagemEmbarcacao(models.Model):
     embarcacao = models.ForeignKey(
         Embarcacao,
         on_delete=models.CASCADE,
         related_name='imagens',
-        verbose_name='Embarcação'
+        verbose_name='Embarcação',
+        db_index=False,  # Coberto pelo índice (embarcacao, status_analise)
     )
     imagem = models.ImageField(
         'Imagem',
@@ -125,6 +189,9 @@ class ImagemEmbarcacao(models.Model):
     )
     titulo = models.CharField('Título', max_length=200, blank=True)
     descricao = models.TextField('Descrição', blank=True)
+    # Região informada no upload (texto livre do formulário); os uploads compartilham
+    # a embarcação padrão, então embarcacao.regiao não identifica a origem da imagem
+    regiao = models.CharField('Região', max_length=100, blank=True)
     data_upload = models.DateTimeField('Data do Upload', default=timezone.now)
     data_analise = models.DateTimeField('Data da Análise', blank=True, null=True)
     status_analise = models.CharField(
@@ -142,6 +209,9 @@ class ImagemEmbarcacao(models.Model):
         null=True,
         validators=[MinValueValidator(0), MaxValueValidator(100)]
     )
+    # Campos extraídos de resultado_analise em finalizar_processamento (filtráveis em SQL)
+    classificacao = models.CharField('Classificação', max_length=20, blank=True)
+    imagem_processada_url = models.URLField('URL da Imagem Processada', max_length=500, blank=True, null=True)
     # Campos para processamento assíncrono
     job_id = models.CharField('Job ID', max_length=100, blank=True, null=True, unique=True)
     status_url = models.URLField('Status URL', max_length=500, blank=True, null=True)  # URL para consultar status
@@ -151,18 +221,36 @@ class ImagemEmbarcacao(models.Model):
     resource_id = models.PositiveIntegerField('Resource ID', blank=True, null=True)
     erro_processamento = models.TextField('Erro no Processamento', blank=True)
     tentativas_consulta = models.PositiveIntegerField('Tentativas de Consulta', default=0)
+    # Ciclo de vida do job (aceito = data_upload). Os instantes vistos pelo polling
+    # têm a resolução do intervalo de consulta do front-end
+    data_encaminhamento = models.DateTimeField('Enviada ao Backend', blank=True, null=True)
+    data_inicio_backend = models.DateTimeField('Início no Backend', blank=True, null=True)
+    data_conclusao = models.DateTimeField('Concluída/Falhou no Backend', blank=True, null=True)
+    data_resultado = models.DateTimeField('Resultado Obtido', blank=True, null=True)
+    # Base do modo delta do histórico (?since=); os UPDATEs via queryset a gravam explicitamente
+    data_atualizacao = models.DateTimeField('Última Atualização', auto_now=True)
+    
+    objects = ImagemEmbarcacaoQuerySet.as_manager()
     
     class Meta:
         verbose_name = 'Imagem da Embarcação'
         verbose_name_plural = 'Imagens das Embarcações'
         ordering = ['-data_upload']
         indexes = [
-            models.Index(fields=['status_analise']),
-            models.Index(fields=['data_upload']),
-            models.Index(fields=['embarcacao', 'status_analise']),  # Índice composto
-            models.Index(fields=['data_upload', 'status_analise']),  # Índice composto temporal
-            models.Index(fields=['job_id']),  # Índice para busca por job_id
+            models.Index(fields=['embarcacao', 'status_analise']),  # Contagens por status (substitui o índice da FK)
+            models.Index(fields=['data_upload', 'status_analise']),  # Histórico ordenado por data
             models.Index(fields=['resource_id']),  # Índice para busca por resource_id
+            models.Index(fields=['classificacao', 'data_upload']),  # Filtro do histórico por classificação
+            models.Index(fields=['confiabilidade']),  # Ordenação por confiança
+            models.Index(fields=['data_conclusao']),  # Relatório de ciclo de vida dos jobs
+            models.Index(fields=['data_atualizacao']),  # Alterações desde o token do histórico
+            # Parcial e cobrindo as colunas de listar_jobs_processamento: contém só os
+            # jobs ativos e responde a consulta sem ler a tabela
+            models.Index(
+                fields=['-data_upload', 'status_analise', 'job_id', 'progresso', 'titulo', 'mensagem_status'],
+                condition=models.Q(status_analise__in=STATUS_ATIVOS),
+                name='imagem_jobs_ativos_idx',
+            ),
         ]
     
     def __str__(self):
@@ -213,48 +301,201 @@ class ImagemEmbarcacao(models.Model):
         self.status_analise = StatusAnalise.PROCESSANDO
         self.progresso = 0
         self.mensagem_status = "Processamento iniciado"
-        self.save()
+        self.data_encaminhamento = timezone.now()
+        self.save(update_fields=[
+            'job_id', 'status_url', 'result_url', 'status_analise', 'progresso', 'mensagem_status',
+            'data_encaminhamento', 'data_atualizacao',
+        ])
+    
+    def _filtro_atualizavel(self, status_destino):
+        """
+        Compare-and-set: só atualiza a partir dos status de origem aceitos para
+        o destino (TRANSICOES_STATUS), para que um poller atrasado ou duplicado
+        não regrida um job finalizado ou com erro. Sem status de destino (só
+        progresso/mensagem), apenas jobs em andamento
+        """
+        filtro = models.Q(status_analise__in=TRANSICOES_STATUS.get(status_destino, STATUS_ATIVOS))
+        if status_destino == StatusAnalise.ANALISADA:
+            # Concluído sem resultado: a próxima consulta grava o resultado
+            filtro |= models.Q(status_analise=StatusAnalise.ANALISADA, resultado_analise__isnull=True)
+        return ImagemEmbarcacao.objects.filter(pk=self.pk).filter(filtro)
+    
+    def _atualizar_se_mudou(self, novos_valores):
+        """
+        Grava apenas os campos alterados em um único UPDATE condicional
+        
+        Retorna True se houve escrita. Se outro poller já finalizou o job,
+        recarrega o estado atual do banco e retorna False.
+        """
+        alterados = {
+            campo: valor for campo, valor in novos_valores.items()
+            if getattr(self, campo) != valor
+        }
+        if not alterados:
+            return False
+        
+        filtro = self._filtro_atualizavel(novos_valores.get('status_analise'))
+        if not filtro.update(**alterados, data_atualizacao=timezone.now()):
+            self.refresh_from_db(fields=CAMPOS_STATUS_JOB)
+            return False
+        
+        for campo, valor in alterados.items():
+            setattr(self, campo, valor)
+        return True
     
-    def atualizar_status_processamento(self, status_data):
-        """Atualiza status do processamento assíncrono"""
+    def atualizar_status_processamento(self, status_data, resultado=None):
+        """
+        Atualiza status do processamento assíncrono
+        
+        Se 'resultado' for informado para um job concluído, o processamento é
+        finalizado na mesma escrita. Retorna True se algo mudou no banco.
+        """
         # Mapear campos da API (inglês) para campos locais (português)
-        self.progresso = status_data.get('progress', status_data.get('progresso', 0))
-        self.mensagem_status = status_data.get('message', status_data.get('mensagem', ''))
+        novos = {
+            'progresso': status_data.get('progress', status_data.get('progresso', 0)),
+            'mensagem_status': status_data.get('message', status_data.get('mensagem', '')),
+            'tentativas_consulta': 0,  # Resetar tentativas após resposta da API
+        }
         
         # Mapear status da API para StatusAnalise
         status = status_data.get('status', '').lower()
+        agora = timezone.now()
         
         if status in ['succeeded', 'completed', 'success']:
-            self.status_analise = StatusAnalise.ANALISADA
-            self.data_analise = timezone.now()
-            self.resource_id = status_data.get('resource_id')
+            novos['status_analise'] = StatusAnalise.ANALISADA
+            novos['resource_id'] = status_data.get('resource_id')
+            if self.status_analise != StatusAnalise.ANALISADA:
+                novos['data_analise'] = agora
+            if not self.data_conclusao:
+                novos['data_conclusao'] = agora
+            if resultado:
+                novos.update(self._valores_finalizacao(resultado))
         elif status in ['failed', 'error', 'erro']:
-            self.status_analise = StatusAnalise.ERRO
-            self.erro_processamento = status_data.get('message', 'Erro desconhecido')
+            novos['status_analise'] = StatusAnalise.ERRO
+            novos['erro_processamento'] = status_data.get('message', 'Erro desconhecido')
+            if not self.data_conclusao:
+                novos['data_conclusao'] = agora
         elif status in ['running', 'processing', 'processando']:
-            self.status_analise = StatusAnalise.PROCESSANDO
+            novos['status_analise'] = StatusAnalise.PROCESSANDO
+            if not self.data_inicio_backend:
+                novos['data_inicio_backend'] = agora
         elif status in ['pending', 'pendente', 'queued']:
-            self.status_analise = StatusAnalise.PENDENTE
+            novos['status_analise'] = StatusAnalise.PENDENTE
         
-        self.save()
+        return self._atualizar_se_mudou(novos)
+    
+    def registrar_falha_consulta(self, max_tentativas):
+        """
+        Incrementa tentativas_consulta e, ao atingir max_tentativas, marca o job
+        como erro, tudo em um único UPDATE. Retorna True se o job virou erro.
+        """
+        erro = f"A API não respondeu após {max_tentativas} tentativas. Job pode ter expirado ou falhado."
+        esgotou = models.Q(tentativas_consulta__gte=max_tentativas - 1)
+        atualizados = ImagemEmbarcacao.objects.filter(
+            pk=self.pk,
+            status_analise__in=[StatusAnalise.PENDENTE, StatusAnalise.PROCESSANDO],
+        ).update(
+            tentativas_consulta=models.F('tentativas_consulta') + 1,
+            status_analise=models.Case(
+                models.When(esgotou, then=models.Value(StatusAnalise.ERRO)),
+                default=models.F('status_analise'),
+                output_field=models.CharField(),
+            ),
+            erro_processamento=models.Case(
+                models.When(esgotou, then=models.Value(erro)),
+                default=models.F('erro_processamento'),
+                output_field=models.TextField(),
+            ),
+            data_conclusao=models.Case(
+                models.When(esgotou, then=models.Value(timezone.now())),
+                default=models.F('data_conclusao'),
+                output_field=models.DateTimeField(),
+            ),
+            data_atualizacao=timezone.now(),
+        )
+        status_anterior = self.status_analise
+        if atualizados:
+            self.refresh_from_db(fields=CAMPOS_STATUS_JOB)
+        return status_anterior != StatusAnalise.ERRO and self.status_analise == StatusAnalise.ERRO
+    
+    @staticmethod
+    def extrair_dados_resultado(resultado):
+        """
+        Extrai classificação, confiança (0-100) e URL processada do resultado da API
+        
+        A API pode devolver uma lista (usa-se o primeiro item) ou um objeto.
+        """
+        if isinstance(resultado, list):
+            resultado = resultado[0] if resultado else None
+        if not isinstance(resultado, dict):
+            return {'classificacao': '', 'confiabilidade': None, 'imagem_processada_url': None}
+        
+        try:
+            confianca = Decimal(str(resultado['confianca'])).quantize(Decimal('0.01'))
+            confianca = min(max(confianca, Decimal('0')), Decimal('100'))
+        except (KeyError, TypeError, ArithmeticError):
+            confianca = None
+        
+        return {
+            'classificacao': str(resultado.get('classificacao') or '').lower()[:20],
+            'confiabilidade': confianca,
+            'imagem_processada_url': (
+                resultado.get('imagem_processada') or resultado.get('imagem_processada_url') or None
+            ),
+        }
+    
+    def aplicar_dados_resultado(self, resultado):
+        """Preenche os campos desnormalizados a partir do resultado da API"""
+        for campo, valor in self.extrair_dados_resultado(resultado).items():
+            setattr(self, campo, valor)
+    
+    def _valores_finalizacao(self, resultado):
+        """Campos gravados ao concluir o processamento com sucesso"""
+        agora = timezone.now()
+        return {
+            'status_analise': StatusAnalise.ANALISADA,
+            'progresso': 100,
+            'resultado_analise': resultado,
+            'mensagem_status': "Processamento concluído com sucesso",
+            'data_conclusao': self.data_conclusao or agora,
+            'data_resultado': self.data_resultado or agora,
+            **self.extrair_dados_resultado(resultado),
+        }
     
     def finalizar_processamento(self, resultado, resource_id=None):
         """Finaliza o processamento com sucesso"""
-        self.status_analise = StatusAnalise.ANALISADA
-        self.data_analise = timezone.now()
-        self.progresso = 100
-        self.resultado_analise = resultado
+        novos = self._valores_finalizacao(resultado)
+        novos['data_analise'] = timezone.now()
         if resource_id:
-            self.resource_id = resource_id
-        self.mensagem_status = "Processamento concluído com sucesso"
-        self.save()
+            novos['resource_id'] = resource_id
+        return self._atualizar_se_mudou(novos)
     
     def marcar_erro_processamento(self, erro):
         """Marca erro no processamento"""
         self.status_analise = StatusAnalise.ERRO
         self.erro_processamento = str(erro)
         self.mensagem_status = "Erro no processamento"
-        self.save()
+        self.data_conclusao = self.data_conclusao or timezone.now()
+        self.save(update_fields=[
+            'status_analise', 'erro_processamento', 'mensagem_status', 'data_conclusao', 'data_atualizacao',
+        ])
+
+
+class ImagemRemovida(models.Model):
+    """Registro de uma ImagemEmbarcacao apagada, para o modo delta do histórico"""
+
+    imagem_id = models.PositiveBigIntegerField('ID da Imagem')
+    data_remocao = models.DateTimeField('Data da Remoção', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Imagem Removida'
+        verbose_name_plural = 'Imagens Removidas'
+        indexes = [
+            models.Index(fields=['data_remocao']),
+        ]
+
+    def __str__(self):
+        return f"Imagem #{self.imagem_id} removida em {self.data_remocao:%d/%m/%Y %H:%M}"
 
 
 class AnaliseRegional(models.Model):
@@ -283,4 +524,39 @@ class AnaliseRegional(models.Model):
     def percentual_legal(self):
         if self.total_embarcacoes > 0:
             return (self.embarcacoes_legais / self.total_embarcacoes) * 100
-        return 0
\ No newline at end of file
+        return 0
+
+
+class PerfilRequisicao(models.Model):
+    """Perfil do cProfile de uma requisição (ver embarcacoes/perfilamento.py)"""
+
+    class Motivo(models.TextChoices):
+        HEADER = 'header', 'Header X-Aritana-Perfil'
+        QUERY = 'query', 'Parâmetro ?perfil=1'
+        AMOSTRAGEM = 'amostragem', 'Amostragem'
+
+    criado_em = models.DateTimeField('Criado em', default=timezone.now)
+    metodo = models.CharField('Método', max_length=10)
+    caminho = models.CharField('Caminho', max_length=500)
+    view = models.CharField('View', max_length=100, blank=True)
+    status = models.PositiveSmallIntegerField('Status HTTP')
+    motivo = models.CharField('Motivo', max_length=15, choices=Motivo.choices)
+    duracao_ms = models.FloatField('Duração (ms)')
+    db_ms = models.FloatField('Tempo no Banco (ms)')
+    db_queries = models.PositiveIntegerField('Queries')
+    funcoes = models.JSONField('Funções Mais Custosas', default=list)
+    queries = models.JSONField('Queries Mais Lentas', default=list)
+    upstream = models.JSONField('Chamadas à API Externa', default=dict)
+    relatorio = models.TextField('Relatório pstats', blank=True)
+    dados = models.BinaryField('Dados do Perfil (.prof)')
+    
+    class Meta:
+        verbose_name = 'Perfil de Requisição'
+        verbose_name_plural = 'Perfis de Requisições'
+        ordering = ['-criado_em']
+        indexes = [
+            models.Index(fields=['criado_em']),
+        ]
+    
+    def __str__(self):
+        return f"{self.metodo} {self.caminho} - {self.duracao_ms:.0f}ms"
@@ -0,0 +1,99 @@
+"""
+Perfilamento sob demanda de requisições
+
+O PerfilamentoMiddleware roda o cProfile em volta da view quando:
+
+- um usuário staff envia o header 'X-Aritana-Perfil: 1' ou '?perfil=1'; ou
+- a requisição cai na amostragem (ARITANA_PERFIL['amostragem'], fração de 0 a 1).
+
+O perfil guarda as N funções com maior tempo acumulado, as queries SQL mais
+lentas e o tempo de cada chamada à API externa em um PerfilRequisicao,
+visível no admin (com download do .prof para snakeviz/pstats).
+"""
+import io
+import logging
+import marshal
+import pstats
+import time
+
+from .instrumentacao import medicao_atual
+
+logger = logging.getLogger(__name__)
+
+
+class ColetorQueries:
+    """Wrapper para connection.execute_wrapper() que guarda cada query e seu tempo"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((time.perf_counter() - inicio, sql))
+
+    def mais_lentas(self, limite):
+        ordenadas = sorted(self.queries, key=lambda q: q[0], reverse=True)[:limite]
+        return [{'ms': round(duracao * 1000, 2), 'sql': sql} for duracao, sql in ordenadas]
+
+
+def _nome_funcao(chave):
+    arquivo, linha, funcao = chave
+    if arquivo == '~':  # funções embutidas
+        return funcao
+    return f'{arquivo}:{linha}({funcao})'
+
+
+def funcoes_mais_custosas(estatisticas, limite):
+    """Top N de pstats.Stats por tempo acumulado, em formato serializável"""
+    linhas = sorted(estatisticas.stats.items(), key=lambda item: item[1][3], reverse=True)[:limite]
+    return [
+        {
+            'funcao': _nome_funcao(chave),
+            'chamadas': chamadas,
+            'proprio_ms': round(proprio * 1000, 2),
+            'acumulado_ms': round(acumulado * 1000, 2),
+        }
+        for chave, (_, chamadas, proprio, acumulado, _) in linhas
+    ]
+
+
+def montar_perfil(profiler, coletor, config):
+    """Campos do PerfilRequisicao a partir do profiler e das queries coletadas"""
+    estatisticas = pstats.Stats(profiler)
+    texto = io.StringIO()
+    pstats.Stats(profiler, stream=texto).sort_stats('cumulative').print_stats(config['top'])
+
+    medicao = medicao_atual()
+    upstream = {}
+    if medicao is not None:
+        upstream = {
+            nome: {'chamadas': chamadas, 'ms': round(duracao * 1000, 1)}
+            for nome, (chamadas, duracao) in medicao.upstream.items()
+        }
+
+    return {
+        'db_ms': round(sum(duracao for duracao, _ in coletor.queries) * 1000, 1),
+        'db_queries': len(coletor.queries),
+        'funcoes': funcoes_mais_custosas(estatisticas, config['top']),
+        'queries': coletor.mais_lentas(config['max_queries']),
+        'upstream': upstream,
+        'relatorio': texto.getvalue(),
+        'dados': marshal.dumps(estatisticas.stats),  # mesmo formato de Stats.dump_stats()
+    }
+
+
+def salvar_perfil(campos, retencao):
+    """Grava o perfil e descarta os mais antigos além da retenção"""
+    from .models import PerfilRequisicao
+
+    perfil = PerfilRequisicao.objects.create(**campos)
+    antigos = PerfilRequisicao.objects.order_by('-criado_em').values_list('pk', flat=True)[retencao:]
+    PerfilRequisicao.objects.filter(pk__in=list(antigos)).delete()
+    logger.info(
+        "Perfil #%s gravado para %s %s (%sms)",
+        perfil.pk, campos['metodo'], campos['caminho'], campos['duracao_ms'],
+    )
+    return perfil
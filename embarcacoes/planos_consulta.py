@@ -0,0 +1,80 @@
+"""
+Consultas críticas e verificação dos seus planos de execução (EXPLAIN)
+
+Usadas pelos testes (embarcacoes/tests/test_planos.py) e pelo comando
+check_query_plans: falham se alguma consulta voltar a fazer varredura
+completa da tabela ou ordenação em memória.
+"""
+from django.db import connection
+
+from .models import Embarcacao, ImagemEmbarcacao, StatusAnalise
+
+
+def desabilitar_seqscan():
+    """Em tabelas pequenas o PostgreSQL prefere Seq Scan; força avaliar os índices"""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+
+
+def consultas_monitoradas():
+    """(nome, queryset, exige_ordenacao_por_indice) das consultas críticas"""
+    return [
+        (
+            'listar_jobs_processamento',
+            ImagemEmbarcacao.objects.jobs_ativos().values(
+                'id', 'job_id', 'titulo', 'status_analise', 'progresso',
+                'mensagem_status', 'data_upload'
+            ),
+            True,
+        ),
+        (
+            'historico (uploads locais)',
+            ImagemEmbarcacao.objects.select_related('embarcacao').filter(
+                status_analise__in=[
+                    StatusAnalise.PENDENTE,
+                    StatusAnalise.PROCESSANDO,
+                    StatusAnalise.ANALISADA,
+                    StatusAnalise.ERRO,
+                ]
+            ).order_by('-data_upload'),
+            True,
+        ),
+        (
+            'historico por classificação',
+            ImagemEmbarcacao.objects.filter(classificacao='legal').order_by('-data_upload'),
+            True,
+        ),
+        (
+            'verificar_status_job',
+            ImagemEmbarcacao.objects.filter(job_id='job'),
+            False,
+        ),
+        (
+            'obter_resultado_processamento',
+            ImagemEmbarcacao.objects.filter(resource_id=1)[:1],
+            False,
+        ),
+        (
+            'contagem de imagens por embarcação',
+            Embarcacao.objects.com_contagem_imagens(),
+            False,
+        ),
+    ]
+
+
+def problemas_do_plano(plano, exige_ordenacao_por_indice):
+    """Lista os problemas encontrados no texto do plano (SQLite ou PostgreSQL)"""
+    problemas = []
+    tabela = ImagemEmbarcacao._meta.db_table
+    for linha in plano.splitlines():
+        linha_limpa = linha.strip()
+        # SQLite: "SCAN tabela" sem "USING ... INDEX"; PostgreSQL: "Seq Scan on tabela"
+        if (linha_limpa.startswith(f'SCAN {tabela}') and 'INDEX' not in linha_limpa) \
+                or f'Seq Scan on {tabela}' in linha_limpa:
+            problemas.append(f'varredura completa: {linha_limpa}')
+        if exige_ordenacao_por_indice and (
+            'USE TEMP B-TREE FOR ORDER BY' in linha_limpa or linha_limpa.startswith('Sort')
+        ):
+            problemas.append(f'ordenação sem índice: {linha_limpa}')
+    return problemas
@@ -0,0 +1,159 @@
+"""
+Logging estruturado e não bloqueante do ARITANA
+
+A thread da requisição só copia o registro para uma fila em memória
+(FilaLogHandler); uma thread de fundo (QueueListener) formata em JSON e
+escreve no arquivo e no console. Com a fila cheia o registro é descartado
+em vez de bloquear, e a contagem de descartes vai para o log.
+
+Payloads grandes devem ser logados com formatação preguiçosa e resumidos:
+
+    logger.info("Resposta da API: %s", resumir(resultado))
+
+Nada é formatado se o nível estiver desligado, e resumir() limita o custo
+a alguns itens/caracteres, qualquer que seja o tamanho do payload.
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import reprlib
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueListener
+
+_repr_resumido = reprlib.Repr()
+_repr_resumido.maxlevel = 3
+_repr_resumido.maxdict = 8
+_repr_resumido.maxlist = 5
+_repr_resumido.maxstring = 120
+_repr_resumido.maxother = 120
+
+
+class Resumo:
+    """Payload formatado só quando (e se) o registro for emitido"""
+
+    __slots__ = ('valor',)
+
+    def __init__(self, valor):
+        self.valor = valor
+
+    def __str__(self):
+        valor = self.valor
+        if isinstance(valor, dict):
+            return f'dict com {len(valor)} chave(s): {_repr_resumido.repr(valor)}'
+        if isinstance(valor, (list, tuple)):
+            return f'{len(valor)} item(ns): {_repr_resumido.repr(valor)}'
+        return _repr_resumido.repr(valor)
+
+
+def resumir(valor):
+    return Resumo(valor)
+
+
+class FormatadorJSON(logging.Formatter):
+    """Uma linha JSON por registro; campos de extra={'dados': {...}} entram no objeto"""
+
+    def __init__(self, max_mensagem=2000):
+        super().__init__()
+        self.max_mensagem = max_mensagem
+
+    def format(self, record):
+        mensagem = record.getMessage()
+        if len(mensagem) > self.max_mensagem:
+            mensagem = f'{mensagem[:self.max_mensagem]}... [+{len(mensagem) - self.max_mensagem} caracteres]'
+        registro = {
+            'instante': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'modulo': record.module,
+            'processo': record.process,
+            'thread': record.thread,
+            'mensagem': mensagem,
+        }
+        dados = getattr(record, 'dados', None)
+        if dados:
+            registro.update(dados)
+        if record.exc_text:
+            registro['excecao'] = record.exc_text
+        return json.dumps(registro, ensure_ascii=False, default=str)
+
+
+class FilaLogHandler(logging.Handler):
+    """
+    Handler que entrega os registros a uma thread de fundo
+
+    Configurável pelo dictConfig: 'arquivo' (opcional) e 'console' definem os
+    destinos, 'tamanho_fila' o limite de registros pendentes. Após um fork
+    (ex.: gunicorn com --preload) a thread é recriada no processo filho.
+    """
+
+    def __init__(self, arquivo=None, console=True, tamanho_fila=10000, max_mensagem=2000, level=logging.NOTSET):
+        super().__init__(level)
+        self.tamanho_fila = tamanho_fila
+        formatador = FormatadorJSON(max_mensagem)
+        self.destinos = []
+        if arquivo:
+            destino = logging.FileHandler(arquivo, encoding='utf-8')
+            destino.setFormatter(formatador)
+            self.destinos.append(destino)
+        if console:
+            destino = logging.StreamHandler(sys.stderr)
+            destino.setFormatter(formatador)
+            self.destinos.append(destino)
+        self.descartados = 0
+        self._lock_inicio = threading.Lock()
+        self._pid = None
+        self._iniciar()
+        atexit.register(self._parar)
+
+    def _iniciar(self):
+        with self._lock_inicio:
+            if self._pid == os.getpid():
+                return
+            self.fila = queue.Queue(self.tamanho_fila)
+            self.listener = QueueListener(self.fila, *self.destinos, respect_handler_level=True)
+            self.listener.start()
+            self._pid = os.getpid()
+
+    def _parar(self):
+        """Esvazia a fila antes de o processo terminar"""
+        if self._pid == os.getpid() and self.listener._thread is not None:
+            self.listener.stop()
+
+    def preparar(self, record):
+        """
+        Resolve a mensagem e a exceção na thread de origem: os argumentos
+        podem mudar depois, e tracebacks não atravessam a fila com segurança
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        record.stack_info = None
+        return record
+
+    def emit(self, record):
+        if self._pid != os.getpid():
+            self._iniciar()
+        try:
+            if self.descartados:
+                self._avisar_descartes()
+            self.fila.put_nowait(self.preparar(record))
+        except queue.Full:
+            self.descartados += 1
+        except Exception:
+            self.handleError(record)
+
+    def _avisar_descartes(self):
+        aviso = logging.LogRecord(
+            'embarcacoes.registro_logs', logging.WARNING, __file__, 0,
+            f'{self.descartados} registro(s) de log descartado(s) com a fila cheia', None, None,
+        )
+        self.fila.put_nowait(aviso)
+        self.descartados = 0
@@ -0,0 +1,103 @@
+"""
+Respostas JSON pré-serializadas
+
+Os endpoints JSON guardam no cache a resposta já codificada (bytes), a
+versão gzip e o ETag, em vez do dicionário: um acerto no cache custa uma
+cópia de bytes, sem percorrer e codificar a frota inteira de novo. Nos
+misses a codificação usa o orjson, bem mais rápido que o json da stdlib.
+"""
+import gzip
+import hashlib
+
+import orjson
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+
+from .frota import para_serializacao
+
+# Abaixo disso o gzip não compensa o cabeçalho e a CPU do cliente
+TAMANHO_MINIMO_GZIP = 1024
+
+_codificador_django = DjangoJSONEncoder()
+
+
+class RespostaSerializada:
+    """
+    Corpo JSON codificado, sua versão gzip (se compensar) e o ETag de cada
+    representação: a gzip tem sufixo próprio, para que caches intermediários
+    não entreguem o corpo comprimido a quem não pediu
+    """
+
+    __slots__ = ('corpo', 'corpo_gzip', 'etag')
+
+    def __init__(self, corpo):
+        self.corpo = corpo
+        self.corpo_gzip = gzip.compress(corpo, compresslevel=6, mtime=0) if len(corpo) >= TAMANHO_MINIMO_GZIP else None
+        self.etag = f'"{hashlib.sha256(corpo).hexdigest()[:32]}"'
+
+    @property
+    def etag_gzip(self):
+        # Derivado do ETag: entradas já gravadas no cache continuam válidas
+        return f'{self.etag[:-1]}-gzip"'
+
+
+def _aceita_gzip(accept_encoding):
+    """
+    Se o Accept-Encoding aceita gzip: 'gzip;q=0' recusa; sem gzip listado
+    vale o q de '*' (RFC 9110, 12.5.3)
+    """
+    qualidades = {}
+    for item in accept_encoding.split(','):
+        codificacao, *parametros = item.split(';')
+        q = 1.0
+        for parametro in parametros:
+            nome, _, valor = parametro.partition('=')
+            if nome.strip().lower() == 'q':
+                try:
+                    q = float(valor)
+                except ValueError:
+                    q = 0.0
+        qualidades[codificacao.strip().lower()] = q
+    for codificacao in ('gzip', 'x-gzip', '*'):
+        if codificacao in qualidades:
+            return qualidades[codificacao] > 0
+    return False
+
+
+def _padrao(valor):
+    convertido = para_serializacao(valor)
+    if convertido is not None:
+        return convertido
+    return _codificador_django.default(valor)
+
+
+def serializar(dados):
+    """
+    Codifica com o orjson; FrotaCompacta vira lista de dicts e Decimal, UUID,
+    lazy strings etc. caem no DjangoJSONEncoder
+    """
+    return RespostaSerializada(orjson.dumps(dados, default=_padrao, option=orjson.OPT_NON_STR_KEYS))
+
+
+def responder(request, serializada, cache_control=None):
+    """
+    HttpResponse com o corpo pré-serializado: 304 se o ETag bater, gzip
+    pronto se o cliente aceitar
+    """
+    usar_gzip = serializada.corpo_gzip and _aceita_gzip(request.headers.get('Accept-Encoding', ''))
+    etag = serializada.etag_gzip if usar_gzip else serializada.etag
+
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    elif usar_gzip:
+        response = HttpResponse(serializada.corpo_gzip, content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(serializada.corpo, content_type='application/json')
+
+    response['ETag'] = etag
+    response['Vary'] = 'Accept-Encoding'
+    if cache_control:
+        response['Cache-Control'] = cache_control
+    return response
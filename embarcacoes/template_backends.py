@@ -0,0 +1,22 @@
+"""
+Backend de templates do Django com medição do tempo de renderização
+"""
+from django.template.backends.django import DjangoTemplates, Template
+
+from .instrumentacao import medir_template
+
+
+class TemplateMedido(Template):
+    def render(self, context=None, request=None):
+        with medir_template():
+            return super().render(context, request)
+
+
+class DjangoTemplatesMedidos(DjangoTemplates):
+    """DjangoTemplates cujos templates registram o tempo de render na requisição"""
+
+    def from_string(self, template_code):
+        return TemplateMedido(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TemplateMedido(super().get_template(template_name).template, self)
@@ -0,0 +1,31 @@
+"""
+Tags {% assets_css %} e {% assets_js %}: o bundle em produção, os arquivos
+de origem em desenvolvimento (ver embarcacoes/assets.py)
+"""
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+from embarcacoes.assets import arquivos_do_bundle, usar_bundles
+
+register = template.Library()
+
+
+def _arquivos(nome):
+    return [nome] if usar_bundles() else arquivos_do_bundle(nome)
+
+
+@register.simple_tag
+def assets_css(nome, media='all'):
+    return format_html_join(
+        '\n    ', '<link href="{}" rel="stylesheet" media="{}">',
+        ((static(arquivo), media) for arquivo in _arquivos(nome)),
+    )
+
+
+@register.simple_tag
+def assets_js(nome):
+    return format_html_join(
+        '\n    ', '<script src="{}" defer></script>',
+        ((static(arquivo),) for arquivo in _arquivos(nome)),
+    )
@@ -0,0 +1,25 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+ETAPAS = [{'etapa': 'frota', 'segundos': 1.2, 'ok': False, 'erro': 'HTTPSConnectionPool(host=api.interna)'}]
+
+
+class ProntoTests(SimpleTestCase):
+    def _get(self, situacao, pronto):
+        estado = {'situacao': situacao, 'pronto': pronto, 'inicio': 1.0, 'fim': None, 'etapas': ETAPAS}
+        with mock.patch('embarcacoes.views.estado_aquecimento', return_value=estado):
+            return self.client.get('/pronto/')
+
+    def test_aquecendo_responde_503_sem_detalhes(self):
+        response = self._get('aquecendo', False)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '5')
+        self.assertEqual(response.json(), {'pronto': False, 'situacao': 'aquecendo'})
+
+    def test_pronto_nao_expoe_etapas_nem_erros(self):
+        response = self._get('pronto', True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'no-store')
+        self.assertEqual(response.json(), {'pronto': True, 'situacao': 'pronto'})
+        self.assertNotIn(b'api.interna', response.content)
@@ -0,0 +1,97 @@
+from unittest import mock
+
+import fakeredis
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from embarcacoes.cache_backends import RedisComFallbackCache
+from embarcacoes.cache_camadas import CacheDuasCamadas
+
+
+def config_fakeredis(servidor, **opcoes):
+    """CACHES['default'] como nas settings com CACHE_BACKEND=fakeredis, em um servidor isolado"""
+    return {
+        'BACKEND': 'embarcacoes.cache_backends.RedisComFallbackCache',
+        # O django-redis reaproveita o pool de conexões por URL: um host por servidor falso
+        'LOCATION': f'redis://fake-{id(servidor)}:6379/1',
+        'KEY_PREFIX': 'aritana:teste',
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            'CONNECTION_POOL_KWARGS': {'connection_class': fakeredis.FakeConnection, 'server': servidor},
+            **opcoes,
+        },
+    }
+
+
+class RedisComFallbackTests(SimpleTestCase):
+    def setUp(self):
+        self.servidor = fakeredis.FakeServer()
+        config = config_fakeredis(self.servidor, FALLBACK_RETRY_INTERVAL=30)
+        self.cache = RedisComFallbackCache(config['LOCATION'], config)
+        # O LocMemCache de fallback é compartilhado por nome entre instâncias
+        self.cache._fallback.clear()
+
+    def test_usa_redis_quando_disponivel(self):
+        self.cache.set('chave', 'valor')
+        self.assertFalse(self.cache.usando_fallback)
+        self.assertEqual(self.cache.get('chave'), 'valor')
+        self.assertIsNone(self.cache._fallback.get('chave'))
+
+    def test_recorre_a_memoria_local_com_redis_fora(self):
+        self.servidor.connected = False
+        self.cache.set('chave', 'local')
+        self.assertTrue(self.cache.usando_fallback)
+        self.assertEqual(self.cache.get('chave'), 'local')
+        self.assertTrue(self.cache.add('outra', 1))
+        self.assertEqual(self.cache.incr('outra'), 2)
+
+    def test_volta_ao_redis_depois_do_intervalo(self):
+        self.cache.set('chave', 'redis')
+        self.servidor.connected = False
+        self.assertIsNone(self.cache.get('chave'))
+        self.assertTrue(self.cache.usando_fallback)
+
+        self.servidor.connected = True
+        # Ainda dentro do intervalo: não tenta o Redis
+        self.assertIsNone(self.cache.get('chave'))
+        self.cache._redis_indisponivel_ate = 0
+        self.assertEqual(self.cache.get('chave'), 'redis')
+        self.assertFalse(self.cache.usando_fallback)
+
+
+class CacheDuasCamadasTests(SimpleTestCase):
+    """Duas instâncias fazem o papel de dois workers dividindo o mesmo Redis"""
+
+    def setUp(self):
+        patcher = override_settings(CACHES={'default': config_fakeredis(fakeredis.FakeServer())})
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+        self.worker_a = CacheDuasCamadas(ttl_l1=60)
+        self.worker_b = CacheDuasCamadas(ttl_l1=60)
+
+    def test_l2_compartilhado_e_l1_local(self):
+        self.worker_a.set('frota', ['barco'])
+        self.assertEqual(self.worker_b.get('frota'), ['barco'])  # L2
+        self.assertEqual(self.worker_b.get('frota'), ['barco'])  # L1
+        metricas = self.worker_b.metricas()
+        self.assertEqual(metricas['l2']['hits'], 1)
+        self.assertEqual(metricas['l1']['hits'], 1)
+
+    def test_invalidacao_descarta_l1_e_l2_dos_outros_workers(self):
+        self.worker_a.set('frota', ['antiga'])
+        self.assertEqual(self.worker_b.get('frota'), ['antiga'])
+
+        self.worker_a.invalidar()
+
+        # A entrada L1 do worker B ainda está no TTL, mas é da versão anterior
+        self.assertIsNone(self.worker_b.get('frota'))
+        self.worker_b.set('frota', ['nova'])
+        self.assertEqual(self.worker_a.get('frota'), ['nova'])
+
+    def test_versao_recriada_se_sumir_do_l2(self):
+        versao = self.worker_a.versao()
+        self.worker_a.set('frota', ['barco'])
+        cache.delete('cache_quente_versao')
+        with mock.patch('embarcacoes.cache_camadas.time.time_ns', return_value=versao + 1):
+            self.assertNotEqual(self.worker_b.versao(), versao)
+        self.assertIsNone(self.worker_b.get('frota'))
@@ -0,0 +1,60 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from embarcacoes.cache_camadas import invalidar_caches
+from embarcacoes.models import Embarcacao, ImagemEmbarcacao, StatusAnalise
+
+
+class NumeroDeQueriesTests(TestCase):
+    """As listagens fazem o mesmo número de queries com 1 ou N imagens (sem N+1)"""
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch('embarcacoes.views.api_client.get_dados_embarcacoes', return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'senha'))
+        self._criar_imagens(1)
+
+    def _criar_imagens(self, quantidade):
+        status = [StatusAnalise.PENDENTE, StatusAnalise.PROCESSANDO, StatusAnalise.ANALISADA, StatusAnalise.ERRO]
+        for i in range(quantidade):
+            # Uma embarcação por imagem: acessos à FK sem select_related apareceriam na contagem
+            embarcacao = Embarcacao.objects.create(
+                nome=f'Barco {i}', latitude=Decimal('-1.4'), longitude=Decimal('-48.5'),
+            )
+            ImagemEmbarcacao.objects.create(
+                embarcacao=embarcacao, imagem=f'embarcacoes/teste_{i}.jpg',
+                titulo=f'Imagem {i}', status_analise=status[i % len(status)], progresso=50,
+            )
+
+    def _get(self, url):
+        invalidar_caches()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def _assert_queries_constantes(self, url):
+        with CaptureQueriesContext(connection) as com_uma:
+            self._get(url)
+        self._criar_imagens(20)
+        with self.assertNumQueries(len(com_uma)):
+            self._get(url)
+
+    def test_historico(self):
+        self._assert_queries_constantes('/historico/')
+
+    def test_historico_ajax(self):
+        self._assert_queries_constantes('/api/historico/')
+
+    def test_admin_imagens(self):
+        self._assert_queries_constantes('/admin/embarcacoes/imagemembarcacao/')
+
+    def test_admin_embarcacoes(self):
+        self._assert_queries_constantes('/admin/embarcacoes/embarcacao/')
@@ -0,0 +1,93 @@
+import pickle
+from array import array
+
+from django.test import SimpleTestCase
+
+from embarcacoes.frota import AUSENTE, ColunaTexto, FrotaCompacta, RegistroFrota, para_serializacao
+
+REGISTROS = [
+    {'id': 3, 'regiao': 'icoaraci', 'latitude': -1.3, 'data_cadastro': '2026-01-03', 'classificacao': 'legal'},
+    {'id': 1, 'regiao': 'outeiro', 'latitude': -1.1, 'data_cadastro': '2026-01-01'},
+    {'id': 2, 'regiao': 'icoaraci', 'latitude': -1.2, 'data_cadastro': '2026-01-02', 'classificacao': None},
+]
+
+
+class ColunaTextoTests(SimpleTestCase):
+    def test_indices_e_fatias(self):
+        coluna = ColunaTexto(['ab', '', 'cde', 'f'])
+        self.assertEqual(len(coluna), 4)
+        self.assertEqual([coluna[0], coluna[1], coluna[-1]], ['ab', '', 'f'])
+        self.assertEqual(coluna[1:3], ['', 'cde'])
+        self.assertEqual(coluna[::2], ['ab', 'cde'])
+        self.assertEqual(list(coluna), coluna.tolist())
+
+
+class FrotaCompactaTests(SimpleTestCase):
+    def setUp(self):
+        self.frota = FrotaCompacta(REGISTROS)
+
+    def test_colunas_compactadas(self):
+        self.assertIsInstance(self.frota._colunas['id'], array)
+        self.assertIsInstance(self.frota._colunas['latitude'], array)
+        self.assertIsInstance(self.frota._colunas['data_cadastro'], ColunaTexto)
+        self.assertEqual(self.frota.coluna('latitude'), [-1.3, -1.1, -1.2])
+
+    def test_campo_ausente_diferente_de_none(self):
+        sem, com_none = self.frota[1], self.frota[2]
+        self.assertNotIn('classificacao', sem)
+        self.assertIsNone(sem.get('classificacao'))
+        with self.assertRaises(KeyError):
+            sem['classificacao']
+        self.assertIn('classificacao', com_none)
+        self.assertIsNone(com_none['classificacao'])
+        self.assertEqual(self.frota.coluna('classificacao', 'sem'), ['legal', 'sem', None])
+        self.assertEqual(self.frota.coluna('inexistente', 0), [0, 0, 0])
+
+    def test_registro_como_mapping(self):
+        self.assertIsInstance(self.frota[-1], RegistroFrota)
+        self.assertEqual(dict(self.frota[1]), REGISTROS[1])
+        with self.assertRaises(IndexError):
+            self.frota[3]
+
+    def test_filtrar(self):
+        icoaraci = self.frota.filtrar(r == 'icoaraci' for r in self.frota.coluna('regiao'))
+        self.assertEqual(icoaraci.coluna('id'), [3, 2])
+        self.assertEqual(len(self.frota.filtrar([False] * 3)), 0)
+
+    def test_ordenar_por(self):
+        self.assertEqual(self.frota.ordenar_por('data_cadastro').coluna('id'), [1, 2, 3])
+        self.assertEqual(self.frota.ordenar_por('id', reverso=True).coluna('id'), [3, 2, 1])
+        # Original intacta: as operações devolvem uma nova frota
+        self.assertEqual(self.frota.coluna('id'), [3, 1, 2])
+
+    def test_como_dicts_com_fatia(self):
+        self.assertEqual(self.frota.como_dicts(), REGISTROS)
+        self.assertEqual(self.frota.como_dicts(1, 2), [REGISTROS[1]])
+        self.assertEqual(self.frota.como_dicts(2, 50), [REGISTROS[2]])
+        self.assertEqual(self.frota.como_dicts(5), [])
+
+    def test_concatenacao_preenche_campos_de_uma_so(self):
+        locais = FrotaCompacta([{'id': 'local_9', 'origem': 'local', 'progresso': 40}])
+        juntas = locais + self.frota
+
+        self.assertEqual(len(juntas), 4)
+        self.assertEqual(juntas.coluna('id'), ['local_9', 3, 1, 2])
+        self.assertEqual(juntas.coluna('origem'), ['local', None, None, None])
+        self.assertEqual(juntas.como_dicts(1), REGISTROS)
+        self.assertEqual(juntas.como_dicts(0, 1), [{'id': 'local_9', 'origem': 'local', 'progresso': 40}])
+        self.assertEqual(len(FrotaCompacta() + self.frota), 3)
+
+    def test_com_colunas(self):
+        nova = self.frota.com_colunas(origem=['api'] * 3)
+        self.assertEqual(nova.coluna('origem'), ['api'] * 3)
+        self.assertNotIn('origem', self.frota[0])
+
+    def test_pickle_preserva_ausente(self):
+        restaurada = pickle.loads(pickle.dumps(self.frota + FrotaCompacta([{'id': 4}])))
+        self.assertEqual(restaurada.como_dicts(), REGISTROS + [{'id': 4}])
+        self.assertIs(restaurada._colunas['regiao'][3], AUSENTE)
+
+    def test_para_serializacao(self):
+        self.assertEqual(para_serializacao(self.frota), REGISTROS)
+        self.assertEqual(para_serializacao(self.frota[0]), REGISTROS[0])
+        self.assertIsNone(para_serializacao({'id': 1}))
@@ -0,0 +1,113 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from embarcacoes.cache_camadas import cache_quente, invalidar_caches
+from embarcacoes.historico_delta import MARGEM_TOKEN, gerar_token
+from embarcacoes.models import Embarcacao, ImagemEmbarcacao, ImagemRemovida, StatusAnalise
+
+
+class HistoricoDeltaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        patcher = mock.patch('embarcacoes.views.api_client.get_dados_embarcacoes', return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.embarcacao = Embarcacao.objects.create(nome='Barco', latitude=Decimal('-1.4'), longitude=Decimal('-48.5'))
+        self.imagem = self._criar_imagem('Primeira')
+
+    def _criar_imagem(self, titulo, **campos):
+        return ImagemEmbarcacao.objects.create(
+            embarcacao=self.embarcacao, imagem='embarcacoes/teste.jpg', titulo=titulo,
+            status_analise=StatusAnalise.PROCESSANDO, progresso=10, **campos,
+        )
+
+    def _token(self):
+        return self.client.get('/api/historico/').json()['token']
+
+    def _delta(self, token, **filtros):
+        return self.client.get('/api/historico/', {'since': token, **filtros}).json()
+
+    def _tocar(self, imagem, instante, **campos):
+        """Grava a imagem como alterada no instante dado (data_atualizacao é auto_now)"""
+        ImagemEmbarcacao.objects.filter(pk=imagem.pk).update(data_atualizacao=instante, **campos)
+
+    def test_alteracao_depois_do_token(self):
+        token = self._token()
+        self.imagem.atualizar_status_processamento({'status': 'processing', 'progress': 70})
+
+        delta = self._delta(token)
+
+        self.assertFalse(delta['completo'])
+        self.assertEqual([linha['id'] for linha in delta['alteradas']], [f'local_{self.imagem.pk}'])
+        self.assertEqual(delta['alteradas'][0]['progresso'], 70)
+        self.assertEqual(delta['removidas'], [])
+        self.assertNotEqual(delta['token'], token)
+
+    def test_versao_diferente_pede_recarga(self):
+        token = self._token()
+        invalidar_caches()
+
+        self.assertEqual(self._delta(token), {'delta': True, 'completo': True})
+        self.assertTrue(self._delta('lixo')['completo'])
+
+    @override_settings(HISTORICO_RETENCAO_REMOCOES=60)
+    def test_token_alem_da_retencao_pede_recarga(self):
+        antigo = gerar_token(cache_quente.versao(), timezone.now() - timedelta(minutes=2))
+        self.assertTrue(self._delta(antigo)['completo'])
+
+        recente = gerar_token(cache_quente.versao(), timezone.now() - timedelta(seconds=30))
+        self.assertFalse(self._delta(recente)['completo'])
+
+    def test_remocao_vira_tombstone(self):
+        token = self._token()
+        imagem_id = self.imagem.pk
+        self.imagem.delete()
+
+        self.assertTrue(ImagemRemovida.objects.filter(imagem_id=imagem_id).exists())
+        delta = self._delta(token)
+        self.assertFalse(delta['completo'])
+        self.assertEqual(delta['removidas'], [f'local_{imagem_id}'])
+
+    @override_settings(HISTORICO_RETENCAO_REMOCOES=60)
+    def test_tombstones_vencidos_descartados(self):
+        ImagemRemovida.objects.create(imagem_id=999, data_remocao=timezone.now() - timedelta(minutes=5))
+        imagem_id = self.imagem.pk
+        self.imagem.delete()
+        self.assertEqual(list(ImagemRemovida.objects.values_list('imagem_id', flat=True)), [imagem_id])
+
+    def test_linha_que_sai_do_filtro_vai_para_removidas(self):
+        outra = self._criar_imagem('Segunda')
+        token = self.client.get('/api/historico/', {'tipo': 'processando'}).json()['token']
+        self.imagem.marcar_erro_processamento('A API falhou')
+        outra.atualizar_status_processamento({'status': 'processing', 'progress': 30})
+
+        delta = self._delta(token, tipo='processando')
+
+        self.assertEqual([linha['id'] for linha in delta['alteradas']], [f'local_{outra.pk}'])
+        self.assertEqual(delta['removidas'], [f'local_{self.imagem.pk}'])
+
+    def test_resultado_da_api_tira_a_linha_local(self):
+        token = self._token()
+        self._tocar(self.imagem, timezone.now(), status_analise=StatusAnalise.ANALISADA, resource_id=7)
+
+        delta = self._delta(token)
+
+        self.assertEqual(delta['alteradas'], [])
+        self.assertEqual(delta['removidas'], [f'local_{self.imagem.pk}'])
+
+    def test_margem_de_dois_segundos_antes_do_token(self):
+        instante = timezone.now()
+        token = gerar_token(cache_quente.versao(), instante)
+        dentro = self._criar_imagem('Dentro da margem')
+        self._tocar(dentro, instante - MARGEM_TOKEN + timedelta(milliseconds=500))
+        self._tocar(self.imagem, instante - MARGEM_TOKEN - timedelta(milliseconds=500))
+
+        delta = self._delta(token)
+
+        self.assertEqual([linha['id'] for linha in delta['alteradas']], [f'local_{dentro.pk}'])
@@ -0,0 +1,60 @@
+from unittest import mock
+
+from django.template import engines
+from django.test import SimpleTestCase
+from django.utils.functional import SimpleLazyObject
+
+from embarcacoes.instrumentacao import encerrar_medicao, iniciar_medicao, registrar_upstream
+
+
+class RelogioFalso:
+    def __init__(self):
+        self.agora = 100.0
+
+    def perf_counter(self):
+        return self.agora
+
+
+class TempoTemplateTests(SimpleTestCase):
+    def setUp(self):
+        self.relogio = RelogioFalso()
+        patcher = mock.patch('embarcacoes.instrumentacao.time.perf_counter', self.relogio.perf_counter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.engine = engines.all()[0]  # DjangoTemplatesMedidos das settings
+        self.medicao, token = iniciar_medicao()
+        self.addCleanup(encerrar_medicao, token)
+
+    def _trabalho(self, segundos, valor=''):
+        """Valor preguiçoso que gasta 'segundos' quando o template o usa"""
+        def avaliar():
+            self.relogio.agora += segundos
+            return valor
+        return SimpleLazyObject(avaliar)
+
+    def _consulta_e_api(self):
+        def avaliar():
+            self.relogio.agora += 0.3
+            self.medicao.db_tempo += 0.3
+            self.relogio.agora += 0.5
+            registrar_upstream('embarcacoes', 0.5)
+            return 'frota'
+        return SimpleLazyObject(avaliar)
+
+    def test_valores_preguicosos_nao_contam_como_template(self):
+        template = self.engine.from_string('{{ frota }}{{ renderizacao }}')
+
+        template.render({'frota': self._consulta_e_api(), 'renderizacao': self._trabalho(0.2)})
+
+        self.assertAlmostEqual(self.medicao.template_tempo, 0.2)
+        self.assertAlmostEqual(self.medicao.db_tempo, 0.3)
+        self.assertAlmostEqual(self.medicao.upstream['embarcacoes'][1], 0.5)
+
+    def test_template_aninhado_contado_uma_vez(self):
+        interno = self.engine.from_string('{{ renderizacao }}')
+        externo = self.engine.from_string('{{ interno }}{{ renderizacao }}')
+        renderizar_interno = SimpleLazyObject(lambda: interno.render({'renderizacao': self._trabalho(0.1)}))
+
+        externo.render({'interno': renderizar_interno, 'renderizacao': self._trabalho(0.2)})
+
+        self.assertAlmostEqual(self.medicao.template_tempo, 0.3)
@@ -0,0 +1,138 @@
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from embarcacoes.analise_jobs import SEM_REGIAO, relatorio_ciclo_jobs
+from embarcacoes.api_client import api_client
+from embarcacoes.models import Embarcacao, ImagemEmbarcacao, StatusAnalise
+
+
+class JobsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        embarcacao = Embarcacao.objects.create(nome='Barco', latitude=Decimal('-1.4'), longitude=Decimal('-48.5'))
+        self.imagem = ImagemEmbarcacao.objects.create(
+            embarcacao=embarcacao, imagem='embarcacoes/teste.jpg', job_id='job-1',
+            status_analise=StatusAnalise.PROCESSANDO, progresso=40,
+        )
+
+
+class StatusJobCircuitoAbertoTests(JobsTestCase):
+    def test_circuito_aberto_nao_conta_tentativas(self):
+        api_client.circuitos['jobs'].abrir('teste')
+
+        with mock.patch.object(api_client.session, 'request') as requisicao:
+            for _ in range(40):
+                response = self.client.get('/api/jobs/job-1/status/')
+
+        requisicao.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], StatusAnalise.PROCESSANDO)
+        self.assertGreater(response.json()['tentar_novamente_em'], 0)
+        self.assertIn('Retry-After', response)
+
+        self.imagem.refresh_from_db()
+        self.assertEqual(self.imagem.status_analise, StatusAnalise.PROCESSANDO)
+        self.assertEqual(self.imagem.tentativas_consulta, 0)
+
+    def test_falha_da_api_conta_tentativa(self):
+        with mock.patch.object(api_client, 'verificar_status_job', return_value=None):
+            response = self.client.get('/api/jobs/job-1/status/')
+
+        self.assertNotIn('tentar_novamente_em', response.json())
+        self.imagem.refresh_from_db()
+        self.assertEqual(self.imagem.tentativas_consulta, 1)
+
+
+class TransicoesStatusTests(JobsTestCase):
+    def _marcar(self, status, **campos):
+        ImagemEmbarcacao.objects.filter(pk=self.imagem.pk).update(status_analise=status, **campos)
+        self.imagem.refresh_from_db()
+
+    def test_processando_atrasado_nao_tira_job_do_erro(self):
+        self._marcar(StatusAnalise.ERRO, erro_processamento='falhou')
+
+        mudou = self.imagem.atualizar_status_processamento({'status': 'processing', 'progress': 60})
+
+        self.assertFalse(mudou)
+        self.imagem.refresh_from_db()
+        self.assertEqual(self.imagem.status_analise, StatusAnalise.ERRO)
+        self.assertEqual(self.imagem.progresso, 40)
+
+    def test_processando_atrasado_nao_regride_job_analisado(self):
+        self._marcar(StatusAnalise.ANALISADA, resultado_analise={'classificacao': 'legal'})
+
+        self.assertFalse(self.imagem.atualizar_status_processamento({'status': 'processing'}))
+        self.imagem.refresh_from_db()
+        self.assertEqual(self.imagem.status_analise, StatusAnalise.ANALISADA)
+
+    def test_resultado_tardio_conclui_job_com_erro(self):
+        self._marcar(StatusAnalise.ERRO, erro_processamento='A API não respondeu')
+
+        mudou = self.imagem.atualizar_status_processamento(
+            {'status': 'succeeded', 'resource_id': 7}, resultado={'classificacao': 'ilegal', 'confianca': 91},
+        )
+
+        self.assertTrue(mudou)
+        self.imagem.refresh_from_db()
+        self.assertEqual(self.imagem.status_analise, StatusAnalise.ANALISADA)
+        self.assertEqual(self.imagem.classificacao, 'ilegal')
+
+    def test_fila_do_backend_atualiza_job_recem_enviado(self):
+        self.assertTrue(self.imagem.atualizar_status_processamento({'status': 'queued', 'message': 'Na fila'}))
+        self.imagem.refresh_from_db()
+        self.assertEqual(self.imagem.status_analise, StatusAnalise.PENDENTE)
+        self.assertTrue(self.imagem.atualizar_status_processamento({'status': 'running', 'progress': 50}))
+        self.imagem.refresh_from_db()
+        self.assertEqual(self.imagem.status_analise, StatusAnalise.PROCESSANDO)
+
+
+class RegiaoDoUploadTests(JobsTestCase):
+    def test_upload_grava_a_regiao_do_formulario(self):
+        arquivo = SimpleUploadedFile('barco.jpg', b'\xff\xd8\xff\xd9', content_type='image/jpeg')
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media), \
+                mock.patch.object(api_client, 'enviar_imagem_para_analise', return_value={'job_id': 'job-2'}):
+            self.client.post('/upload/', {'imagem': arquivo, 'regiao': 'Icoaraci'})
+
+        imagem = ImagemEmbarcacao.objects.get(job_id='job-2')
+        self.assertEqual(imagem.regiao, 'Icoaraci')
+        self.assertNotEqual(imagem.embarcacao.regiao, 'Icoaraci')
+
+
+class RelatorioCicloJobsTests(JobsTestCase):
+    def _job(self, regiao, segundos, status=StatusAnalise.ANALISADA):
+        agora = timezone.now()
+        return ImagemEmbarcacao.objects.create(
+            embarcacao=self.imagem.embarcacao, imagem='embarcacoes/teste.jpg', regiao=regiao,
+            status_analise=status, data_upload=agora - timedelta(seconds=segundos), data_conclusao=agora,
+        )
+
+    def test_vazao_e_percentis_por_regiao(self):
+        for segundos in (10, 20, 30):
+            self._job('Icoaraci', segundos)
+        self._job('Icoaraci', 5, StatusAnalise.ERRO)
+        self._job('Outeiro', 60)
+        self._job('', 40)
+
+        por_regiao = {r['regiao']: r for r in relatorio_ciclo_jobs(horas=2)['por_regiao']}
+
+        self.assertEqual(set(por_regiao), {'Icoaraci', 'Outeiro', SEM_REGIAO})
+        icoaraci = por_regiao['Icoaraci']
+        self.assertEqual((icoaraci['concluidos'], icoaraci['erros']), (3, 1))
+        self.assertEqual(icoaraci['por_hora'], 2.0)
+        self.assertEqual(icoaraci['total']['n'], 3)
+        self.assertAlmostEqual(icoaraci['total']['p50'], 20, places=0)
+        self.assertAlmostEqual(por_regiao['Outeiro']['total']['max'], 60, places=0)
+
+    def test_api_de_metricas_inclui_regioes(self):
+        self._job('Mosqueiro', 15)
+        with override_settings(ARITANA_METRICAS={'token': 'segredo', 'ips_permitidos': [], 'max_horas_jobs': 168}):
+            resposta = self.client.get('/api/metricas/jobs/', HTTP_AUTHORIZATION='Bearer segredo')
+        self.assertEqual([r['regiao'] for r in resposta.json()['por_regiao']], ['Mosqueiro'])
@@ -0,0 +1,59 @@
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase
+
+from embarcacoes.api_client import AritanaAPIClient
+from embarcacoes.latencia import percentil
+
+
+class RelogioFalso:
+    def __init__(self):
+        self.agora = 0.0
+
+    def monotonic(self):
+        return self.agora
+
+
+class TimeoutAdaptativoTests(SimpleTestCase):
+    def setUp(self):
+        self.cliente = AritanaAPIClient()
+        self.relogio = RelogioFalso()
+        # Circuito sempre fechado: o teste é só da janela de latência
+        patcher = mock.patch.object(self.cliente.circuitos['embarcacoes'], 'permitir', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('embarcacoes.api_client.time.monotonic', self.relogio.monotonic)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _estourar_timeout(self, method, url, timeout, **kwargs):
+        self.relogio.agora += timeout
+        raise requests.exceptions.ReadTimeout('lento')
+
+    def test_timeout_cresce_apos_timeouts_repetidos(self):
+        for _ in range(50):
+            self.cliente.latencias.registrar('embarcacoes', 0.1)
+        inicial = self.cliente.latencias.timeout('embarcacoes')
+        self.assertEqual(inicial, 2)  # piso
+
+        with mock.patch.object(self.cliente.session, 'request', side_effect=self._estourar_timeout):
+            for _ in range(20):
+                with self.assertRaises(requests.exceptions.Timeout):
+                    self.cliente._requisitar('embarcacoes', 'GET', 'http://backend/embarcacoes')
+
+        self.assertGreater(self.cliente.latencias.timeout('embarcacoes'), inicial)
+        self.assertEqual(self.cliente.latencias.timeout('embarcacoes'), 10)  # teto
+
+    def test_erro_sem_resposta_nem_timeout_nao_entra_na_janela(self):
+        with mock.patch.object(self.cliente.session, 'request', side_effect=requests.exceptions.ConnectionError):
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                self.cliente._requisitar('embarcacoes', 'GET', 'http://backend/embarcacoes')
+        self.assertEqual(len(self.cliente.latencias._janelas['embarcacoes']), 0)
+
+
+class PercentilTests(SimpleTestCase):
+    def test_percentil(self):
+        self.assertIsNone(percentil([], 50))
+        self.assertEqual(percentil([3, 1, 2], 50), 2)
+        self.assertEqual(percentil(range(1, 101), 99), 99)
@@ -0,0 +1,111 @@
+from unittest import mock
+
+import fakeredis
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from embarcacoes.metricas import CHAVE_HASH, RegistroMetricas, formatar_prometheus
+from embarcacoes.tests.test_cache import config_fakeredis
+
+METRICAS = {'intervalo_envio': 5, 'token': 'segredo', 'ips_permitidos': ['10.0.0.9'], 'max_horas_jobs': 168}
+URLS = ['/metrics/', '/api/metricas/cache/', '/api/metricas/jobs/']
+
+
+@override_settings(ARITANA_METRICAS=METRICAS)
+class AcessoMetricasTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_anonimo_recebe_403(self):
+        for url in URLS:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_usuario_comum_recebe_403(self):
+        self.client.force_login(User.objects.create_user('comum', password='senha'))
+        for url in URLS:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_staff_token_e_ip_permitidos(self):
+        acessos = {
+            'token': {'HTTP_AUTHORIZATION': 'Bearer segredo'},
+            'ip': {'REMOTE_ADDR': '10.0.0.9'},
+        }
+        for nome, extra in acessos.items():
+            for url in URLS:
+                with self.subTest(acesso=nome, url=url):
+                    self.assertEqual(self.client.get(url, **extra).status_code, 200)
+
+        self.assertEqual(self.client.get(URLS[0], HTTP_AUTHORIZATION='Bearer errado').status_code, 403)
+        self.client.force_login(User.objects.create_user('equipe', password='senha', is_staff=True))
+        for url in URLS:
+            with self.subTest(acesso='staff', url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(ARITANA_METRICAS={**METRICAS, 'token': ''})
+    def test_token_vazio_nao_libera(self):
+        self.assertEqual(self.client.get(URLS[0], HTTP_AUTHORIZATION='Bearer ').status_code, 403)
+
+    def test_janela_dos_jobs_limitada(self):
+        with mock.patch('embarcacoes.views.relatorio_ciclo_jobs', return_value={}) as relatorio:
+            self.client.get('/api/metricas/jobs/?horas=2160', HTTP_AUTHORIZATION='Bearer segredo')
+        relatorio.assert_called_once_with(168)
+
+
+class RegistroMetricasTests(SimpleTestCase):
+    def setUp(self):
+        # Sem a thread de envio: os testes chamam enviar() diretamente
+        patcher = mock.patch.object(RegistroMetricas, '_garantir_envio_periodico')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _observar(self, registro, *duracoes):
+        for duracao in duracoes:
+            registro.observar('aritana_http_request_duration_seconds', duracao, view='historico')
+
+    def test_sem_redis_os_totais_ficam_no_processo(self):
+        cache.clear()
+        registro = RegistroMetricas()
+        self._observar(registro, 0.003, 0.2, 0.2, 100)
+        registro.enviar()
+
+        self.assertEqual(caches['default']._cache, {})
+        texto = formatar_prometheus(registro.valores())
+        self.assertIn('aritana_http_request_duration_seconds_bucket{view="historico",le="0.005"} 1', texto)
+        self.assertIn('aritana_http_request_duration_seconds_bucket{view="historico",le="0.25"} 3', texto)
+        self.assertIn('aritana_http_request_duration_seconds_bucket{view="historico",le="+Inf"} 4', texto)
+        self.assertIn('aritana_http_request_duration_seconds_count{view="historico"} 4', texto)
+
+    def test_workers_agregados_em_um_hash(self):
+        servidor = fakeredis.FakeServer()
+        with override_settings(CACHES={'default': config_fakeredis(servidor)}):
+            worker_a, worker_b = RegistroMetricas(), RegistroMetricas()
+            self._observar(worker_a, 0.2)
+            self._observar(worker_b, 0.2, 3)
+            worker_b.incrementar('aritana_cache_requests_total', camada='l1', resultado='hit')
+            worker_a.enviar()
+            worker_b.enviar()
+
+            redis = fakeredis.FakeStrictRedis(server=servidor, db=1)
+            self.assertEqual(redis.keys(), [caches['default'].make_key(CHAVE_HASH).encode()])
+            valores = worker_a.valores()
+
+        self.assertEqual(valores['aritana_http_request_duration_seconds_count|view="historico"'], 3)
+        self.assertEqual(valores['aritana_http_request_duration_seconds_bucket|view="historico"|0.25'], 2)
+        self.assertEqual(valores['aritana_cache_requests_total|camada="l1",resultado="hit"'], 1)
+
+    def test_redis_fora_guarda_os_deltas_para_o_proximo_envio(self):
+        servidor = fakeredis.FakeServer()
+        with override_settings(CACHES={'default': config_fakeredis(servidor)}):
+            registro = RegistroMetricas()
+            self._observar(registro, 0.2)
+            servidor.connected = False
+            registro.enviar()
+            servidor.connected = True
+            registro.enviar()
+
+            self.assertFalse(registro._pendentes)
+            self.assertEqual(registro.valores()['aritana_http_request_duration_seconds_count|view="historico"'], 1)
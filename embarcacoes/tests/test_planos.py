@@ -0,0 +1,21 @@
+from django.test import TestCase
+
+from embarcacoes.planos_consulta import consultas_monitoradas, desabilitar_seqscan, problemas_do_plano
+
+
+class PlanosDeConsultaTests(TestCase):
+    """As consultas críticas usam índices: sem varredura completa nem ordenação em memória"""
+
+    def setUp(self):
+        desabilitar_seqscan()
+
+    def test_consultas_monitoradas_usam_indices(self):
+        for nome, queryset, exige_ordenacao in consultas_monitoradas():
+            with self.subTest(consulta=nome):
+                plano = queryset.explain()
+                self.assertEqual(problemas_do_plano(plano, exige_ordenacao), [], plano)
+
+    def test_detecta_varredura_e_ordenacao_sem_indice(self):
+        plano = 'SCAN embarcacoes_imagemembarcacao\nUSE TEMP B-TREE FOR ORDER BY'
+        self.assertEqual(len(problemas_do_plano(plano, True)), 2)
+        self.assertEqual(len(problemas_do_plano(plano, False)), 1)
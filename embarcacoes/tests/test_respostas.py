@@ -0,0 +1,45 @@
+import gzip
+
+from django.test import RequestFactory, SimpleTestCase
+
+from embarcacoes.respostas import responder, serializar
+
+
+class ResponderTests(SimpleTestCase):
+    def setUp(self):
+        self.fabrica = RequestFactory()
+        self.serializada = serializar({'embarcacoes': ['barco'] * 500})
+
+    def test_etag_diferente_por_codificacao(self):
+        identidade = responder(self.fabrica.get('/'), self.serializada)
+        comprimida = responder(self.fabrica.get('/', HTTP_ACCEPT_ENCODING='gzip, br'), self.serializada)
+
+        self.assertNotIn('Content-Encoding', identidade)
+        self.assertEqual(comprimida['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(comprimida.content), identidade.content)
+        self.assertNotEqual(identidade['ETag'], comprimida['ETag'])
+        self.assertEqual(identidade['Vary'], 'Accept-Encoding')
+        self.assertEqual(comprimida['Vary'], 'Accept-Encoding')
+
+    def test_304_so_para_o_etag_da_mesma_codificacao(self):
+        etag_gzip = self.serializada.etag_gzip
+        comprimida = self.fabrica.get('/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag_gzip)
+        self.assertEqual(responder(comprimida, self.serializada).status_code, 304)
+
+        identidade = self.fabrica.get('/', HTTP_IF_NONE_MATCH=etag_gzip)
+        self.assertEqual(responder(identidade, self.serializada).status_code, 200)
+
+    def test_respeita_q_do_accept_encoding(self):
+        casos = {
+            'gzip;q=0': False,
+            'gzip; q=0.0, br': False,
+            'br, *;q=0': False,
+            'GZIP;q=0.5': True,
+            'deflate, *': True,
+            'gzip;q=0, *': False,
+            'identity': False,
+        }
+        for accept_encoding, esperado in casos.items():
+            with self.subTest(accept_encoding=accept_encoding):
+                response = responder(self.fabrica.get('/', HTTP_ACCEPT_ENCODING=accept_encoding), self.serializada)
+                self.assertEqual(response.get('Content-Encoding') == 'gzip', esperado)
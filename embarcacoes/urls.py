@@ -19,6 +19,10 @@ urlpatterns = [
     path('api/cache/', views.dados_cache_json, name='dados_cache_json'),
     path('api/historico/', views.historico_ajax, name='historico_ajax'),
     path('api/exportar/', views.exportar_csv, name='exportar_csv'),
+    path('api/metricas/cache/', views.metricas_cache, name='metricas_cache'),
+    path('api/metricas/jobs/', views.metricas_jobs, name='metricas_jobs'),
+    path('metrics/', views.metricas_prometheus, name='metricas_prometheus'),
+    path('pronto/', views.pronto, name='pronto'),
     
     # APIs para processamento assíncrono
     path('api/jobs/<str:job_id>/status/', views.verificar_status_job, name='verificar_status_job'),
@@ -1,35 +1,40 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
 from django.db.models import Count, Q
 from django.core.cache import cache
 from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import SimpleLazyObject
 from datetime import datetime, timedelta
+import hmac
 import json
 import logging
 
 from .models import Embarcacao, ImagemEmbarcacao, AnaliseRegional, TipoEmbarcacao, StatusAnalise
+from .analise_jobs import relatorio_ciclo_jobs
 from .api_client import api_client
+from .aquecimento import estado_aquecimento
+from .cache_camadas import cache_quente, carregar_uma_vez, invalidar_caches
+from .circuit_breaker import CircuitoAberto
+from .frota import AUSENTE, FrotaCompacta
+from .historico_delta import alteracoes_desde, gerar_token, ler_token
+from .instrumentacao import registrar_cache
+from .metricas import formatar_prometheus, metricas, taxas_acerto_cache
+from .registro_logs import resumir
+from .respostas import responder, serializar
 
 logger = logging.getLogger(__name__)
 
+# Resultados finalizados não mudam; mantidos em cache por 30 dias
+TEMPO_CACHE_RESULTADO = 30 * 24 * 60 * 60
+
 
 def _obter_classificacao_local(imagem):
     """Deriva classificação para uploads locais conforme status/resultado."""
-    resultado = imagem.resultado_analise
-
-    if imagem.status_analise == StatusAnalise.ANALISADA and resultado:
-        if isinstance(resultado, list) and resultado:
-            primeiro = resultado[0]
-            classificacao = primeiro.get('classificacao') if isinstance(primeiro, dict) else None
-        elif isinstance(resultado, dict):
-            classificacao = resultado.get('classificacao')
-        else:
-            classificacao = None
-
-        if classificacao:
-            return str(classificacao).lower()
-        return 'analisada'
+    if imagem.status_analise == StatusAnalise.ANALISADA:
+        return imagem.classificacao or 'analisada'
 
     status_map = {
         StatusAnalise.PROCESSANDO: 'processando',
@@ -50,6 +55,22 @@ def _normalizar_url(request, url):
     return request.build_absolute_uri(url)
 
 
+# Status dos uploads locais que entram no histórico
+STATUS_HISTORICO_LOCAL = [
+    StatusAnalise.PENDENTE,
+    StatusAnalise.PROCESSANDO,
+    StatusAnalise.ANALISADA,
+    StatusAnalise.ERRO,
+]
+
+
+def _listar_como_upload_local(imagem):
+    """Upload aparece como linha própria; com resultado final ele já vem pela API"""
+    if imagem.status_analise not in STATUS_HISTORICO_LOCAL:
+        return False
+    return not (imagem.status_analise in [StatusAnalise.ANALISADA, StatusAnalise.APROVADA] and imagem.resource_id)
+
+
 def _formatar_upload_local(imagem, request):
     resultado = imagem.resultado_analise
     if isinstance(resultado, list) and resultado:
@@ -58,20 +79,19 @@ def _formatar_upload_local(imagem, request):
     elif not isinstance(resultado, dict):
         resultado = {}
 
-    imagem_processada_url = resultado.get('imagem_processada') or resultado.get('imagem_processada_url')
-
     return {
         'id': f'local_{imagem.id}',
         'origem': 'local',
         'localidade': imagem.titulo or imagem.embarcacao.nome or 'Upload Local',
         'classificacao': _obter_classificacao_local(imagem),
+        'confianca': float(imagem.confiabilidade) if imagem.confiabilidade is not None else None,
         'regiao': imagem.embarcacao.regiao,
         'data_cadastro': imagem.data_upload.isoformat(),
         'data_foto': imagem.data_analise.isoformat() if imagem.data_analise else None,
         'latitude': float(imagem.embarcacao.latitude) if imagem.embarcacao.latitude else None,
         'longitude': float(imagem.embarcacao.longitude) if imagem.embarcacao.longitude else None,
         'imagem_url': _normalizar_url(request, imagem.imagem.url) if imagem.imagem else None,
-        'imagem_processada_url': _normalizar_url(request, imagem_processada_url),
+        'imagem_processada_url': _normalizar_url(request, imagem.imagem_processada_url),
         'job_id': imagem.job_id,
         'progresso': imagem.progresso,
         'status_local': imagem.get_status_analise_display(),
@@ -122,17 +142,18 @@ def _processar_upload_imagem(request):
             }
         )
 
+        if not regiao or regiao.strip() == '':
+            regiao = 'Norte'
+
         imagem_obj = ImagemEmbarcacao.objects.create(
             embarcacao=embarcacao_padrao,
             imagem=imagem,
             titulo=titulo,
             descricao=descricao,
+            regiao=regiao.strip()[:100],
             status_analise=StatusAnalise.PENDENTE
         )
 
-        if not regiao or regiao.strip() == '':
-            regiao = 'Norte'
-
         if not localidade or localidade.strip() == '':
             localidade = regiao
 
@@ -173,7 +194,7 @@ def _processar_upload_imagem(request):
             data_foto=data_foto
         )
 
-        logger.info("Resultado do envio: %s", resultado)
+        logger.info("Resultado do envio: %s", resumir(resultado))
 
         if resultado and 'job_id' in resultado:
             imagem_obj.iniciar_processamento(
@@ -203,42 +224,63 @@ def _processar_upload_imagem(request):
         return {'success': False}
 
 
-def dashboard(request):
-    """View principal do dashboard ARITANA"""
-    
+def _renderizar_pagina(request, template, template_conteudo, context):
+    """
+    Página completa ou, com o header 'X-Aritana-Fragmento: 1' (navegação do
+    base.html), só o conteúdo, sem renderizar o base.html
+    """
+    if request.headers.get('X-Aritana-Fragmento') == '1':
+        response = render(request, template_conteudo, context)
+    else:
+        response = render(request, template, context)
+    patch_vary_headers(response, ['X-Aritana-Fragmento'])
+    return response
+
+
+def _estatisticas_dashboard():
+    """Contagens do dashboard; calculadas só se o fragmento não estiver no cache"""
     # Buscar dados da API externa
     dados_api = api_client.get_dados_embarcacoes()
-    estatisticas_api = api_client.get_estatisticas_regionais()
+    api_client.get_estatisticas_regionais()  # aquece o cache dos gráficos, pedidos logo em seguida
     
     # Estatísticas da API ou valores padrão
     if dados_api and 'embarcacoes' in dados_api:
-        embarcacoes = dados_api['embarcacoes']
-        total_embarcacoes = len(embarcacoes)
-        embarcacoes_legais = len([e for e in embarcacoes if e.get('classificacao', '').lower() == 'legal'])
-        embarcacoes_ilegais = len([e for e in embarcacoes if e.get('classificacao', '').lower() == 'ilegal'])
+        frota = dados_api['embarcacoes']
+        total_embarcacoes = len(frota)
+        classificacoes = [c.lower() for c in frota.coluna('classificacao', '')]
+        embarcacoes_legais = classificacoes.count('legal')
+        embarcacoes_ilegais = classificacoes.count('ilegal')
         # Removido fiscalizações - não existe na API externa
     else:
         total_embarcacoes = 0
         embarcacoes_legais = 0
         embarcacoes_ilegais = 0
-        fiscalizacoes = 0
     
-    context = {
+    return {
         'total_embarcacoes': total_embarcacoes,
         'embarcacoes_legais': embarcacoes_legais,
         'embarcacoes_ilegais': embarcacoes_ilegais,
-        # Formulário de upload removido - usando apenas API
         'api_connected': dados_api is not None,
     }
+
+
+def dashboard(request):
+    """View principal do dashboard ARITANA"""
+    context = {
+        # Chave do fragmento em cache de partials/dashboard_main.html
+        'versao_dados': cache_quente.versao(),
+        'estatisticas': SimpleLazyObject(_estatisticas_dashboard),
+        # Formulário de upload removido - usando apenas API
+    }
     
-    return render(request, 'embarcacoes/dashboard.html', context)
+    return _renderizar_pagina(request, 'embarcacoes/dashboard.html', 'embarcacoes/dashboard_content.html', context)
 
 def upload_imagem(request):
     """View para upload de imagens com processamento assíncrono"""
     if request.method == 'POST':
         resultado = _processar_upload_imagem(request)
         if resultado.get('success'):
-                    cache.clear()
+                    invalidar_caches()
                     return redirect('historico')
     
     # Se GET ou se houve erro, mostrar página de upload
@@ -252,7 +294,7 @@ def upload_teste_grande(request):
         resultado = _processar_upload_imagem(request)
         contexto.update(resultado)
         if resultado.get('success'):
-            cache.clear()
+            invalidar_caches()
     imagens = ImagemEmbarcacao.objects.select_related('embarcacao').order_by('-data_upload')[:15]
     contexto['historico_imagens'] = imagens
     return render(request, 'embarcacoes/upload_teste_grande.html', contexto)
@@ -266,61 +308,69 @@ def verificar_status_job(request, job_id):
         # Buscar imagem pelo job_id
         imagem = ImagemEmbarcacao.objects.get(job_id=job_id)
         
-        # Incrementar contador de tentativas
-        imagem.tentativas_consulta += 1
-        imagem.save()
+        # Job já finalizado com resultado: nada a consultar nem a gravar
+        if imagem.status_analise == StatusAnalise.ANALISADA and imagem.resultado_analise is not None:
+            return _resposta_status_job(job_id, imagem)
         
         # Verificar status na API FastAPI usando status_url se disponível
-        status_data = api_client.verificar_status_job(job_id, status_url=imagem.status_url)
+        try:
+            status_data = api_client.verificar_status_job(job_id, status_url=imagem.status_url)
+        except CircuitoAberto as e:
+            # Backend não consultado: não conta como tentativa; o cliente espera o circuito reabrir
+            logger.warning("%s", e)
+            reabre_em = max(1, api_client.circuitos['jobs'].status()['reabre_em'])
+            response = _resposta_status_job(job_id, imagem, tentar_novamente_em=reabre_em)
+            response['Retry-After'] = str(reabre_em)
+            return response
         
         if status_data:
-            # Atualizar status local
-            imagem.atualizar_status_processamento(status_data)
+            # Se processamento concluído, buscar resultado final para gravar tudo em um UPDATE
+            resultado = None
+            resource_id = status_data.get('resource_id')
+            if status_data.get('status') == 'succeeded' and resource_id:
+                resultado = api_client.obter_resultado_processamento(resource_id)
             
-            # Resetar tentativas após sucesso
-            imagem.tentativas_consulta = 0
-            imagem.save()
+            # Atualizar status local (sem escrita se nada mudou)
+            mudou = imagem.atualizar_status_processamento(status_data, resultado=resultado)
             
-            # Se processamento concluído, buscar resultado final
-            if status_data.get('status') == 'succeeded' and status_data.get('resource_id'):
-                resultado = api_client.obter_resultado_processamento(status_data['resource_id'])
-                if resultado:
-                    imagem.finalizar_processamento(resultado, status_data['resource_id'])
-                    cache.clear()
-            elif imagem.status_analise == StatusAnalise.ERRO:
-                cache.clear()
+            if resultado:
+                cache.set(f"resultado_processamento_{resource_id}", resultado, TEMPO_CACHE_RESULTADO)
+            if mudou and (resultado or imagem.status_analise == StatusAnalise.ERRO):
+                invalidar_caches()
         else:
             # API não retornou dados (erro 500 ou timeout)
-            if imagem.tentativas_consulta >= MAX_TENTATIVAS:
-                # Marcar como erro após muitas tentativas
-                logger.error(f"Job {job_id} falhou após {MAX_TENTATIVAS} tentativas")
-                imagem.status_analise = StatusAnalise.ERRO
-                imagem.erro_processamento = f"A API não respondeu após {MAX_TENTATIVAS} tentativas. Job pode ter expirado ou falhado."
-                imagem.save()
-                cache.clear()
+            if imagem.registrar_falha_consulta(MAX_TENTATIVAS):
+                # Marcado como erro após muitas tentativas
+                logger.error("Job %s falhou após %d tentativas", job_id, MAX_TENTATIVAS)
+                invalidar_caches()
         
-        return JsonResponse({
-            'job_id': job_id,
-            'status': imagem.status_analise,
-            'progresso': imagem.progresso,
-            'mensagem': imagem.mensagem_status,
-            'resource_id': imagem.resource_id,
-            'erro': imagem.erro_processamento if imagem.status_analise == StatusAnalise.ERRO else None
-        })
+        return _resposta_status_job(job_id, imagem)
         
     except ImagemEmbarcacao.DoesNotExist:
         return JsonResponse({'error': 'Job não encontrado'}, status=404)
     except Exception as e:
-        logger.error(f"Erro ao verificar status do job {job_id}: {str(e)}")
+        logger.error("Erro ao verificar status do job %s: %s", job_id, e)
         return JsonResponse({'error': 'Erro interno'}, status=500)
 
 
+def _resposta_status_job(job_id, imagem, tentar_novamente_em=None):
+    dados = {
+        'job_id': job_id,
+        'status': imagem.status_analise,
+        'progresso': imagem.progresso,
+        'mensagem': imagem.mensagem_status,
+        'resource_id': imagem.resource_id,
+        'erro': imagem.erro_processamento if imagem.status_analise == StatusAnalise.ERRO else None
+    }
+    if tentar_novamente_em:
+        dados['tentar_novamente_em'] = tentar_novamente_em
+    return JsonResponse(dados)
+
+
 def listar_jobs_processamento(request):
     """API para listar jobs em processamento"""
     try:
-        jobs_processando = ImagemEmbarcacao.objects.filter(
-            status_analise__in=[StatusAnalise.PROCESSANDO, StatusAnalise.PENDENTE]
-        ).values(
+        jobs_processando = ImagemEmbarcacao.objects.jobs_ativos().values(
             'id', 'job_id', 'titulo', 'status_analise', 'progresso', 
             'mensagem_status', 'data_upload'
         )
@@ -331,20 +381,49 @@ def listar_jobs_processamento(request):
         })
         
     except Exception as e:
-        logger.error(f"Erro ao listar jobs: {str(e)}")
+        logger.error("Erro ao listar jobs: %s", e)
         return JsonResponse({'error': 'Erro interno'}, status=500)
 
 
+def _resultado_finalizado(resource_id, imagem_local):
+    """
+    Resultado final de um processamento; nunca muda depois de concluído
+
+    Ordem de busca: cache de longa duração, registro local preenchido por
+    finalizar_processamento e, por último, a API externa (com single-flight).
+    """
+    cache_key = f'resultado_processamento_{resource_id}'
+    resultado = cache.get(cache_key)
+    registrar_cache(bool(resultado))
+    if resultado:
+        return resultado
+
+    if imagem_local and imagem_local.status_analise == StatusAnalise.ANALISADA:
+        resultado = imagem_local.resultado_analise
+        if isinstance(resultado, list):
+            resultado = resultado[0] if resultado else None
+        if not isinstance(resultado, dict):
+            resultado = None
+
+    if not resultado:
+        resultado = carregar_uma_vez(
+            cache_key,
+            lambda: api_client.obter_resultado_processamento(resource_id)
+        )
+
+    if resultado:
+        cache.set(cache_key, resultado, TEMPO_CACHE_RESULTADO)
+    return resultado
+
+
 def obter_resultado_processamento(request, resource_id):
     """API para obter resultado do processamento por resource_id"""
     try:
-        # Buscar resultado na API externa
-        resultado = api_client.obter_resultado_processamento(resource_id)
+        # Buscar a imagem local (se existir) e o resultado já finalizado
+        imagem_local = ImagemEmbarcacao.objects.filter(resource_id=resource_id).first()
+        resultado = _resultado_finalizado(resource_id, imagem_local)
         
         if resultado:
-            # Buscar também a imagem local se existir
-            imagem_local = ImagemEmbarcacao.objects.filter(resource_id=resource_id).first()
-            
             # Preparar resposta
             response_data = {
                 'id': resultado.get('id'),
@@ -365,45 +444,55 @@ def obter_resultado_processamento(request, resource_id):
             if imagem_local and imagem_local.imagem:
                 response_data['imagem_url'] = request.build_absolute_uri(imagem_local.imagem.url)
             
-            return JsonResponse(response_data)
+            return _resposta_imutavel(request, response_data)
         else:
             return JsonResponse({'error': 'Resultado não encontrado'}, status=404)
             
     except Exception as e:
-        logger.error(f"Erro ao obter resultado {resource_id}: {str(e)}")
+        logger.error("Erro ao obter resultado %s: %s", resource_id, e)
         return JsonResponse({'error': 'Erro interno'}, status=500)
 
 
+def _resposta_imutavel(request, response_data):
+    """Resposta JSON com ETag forte e cache permanente no navegador"""
+    return responder(request, serializar(response_data), 'public, max-age=31536000, immutable')
+
+
 def dados_mapa_json(request):
     """API para fornecer dados do mapa em JSON"""
+    serializada = cache_quente.get('resposta_dados_mapa')
+    if serializada:
+        return responder(request, serializada)
+    
     # Buscar dados apenas da API externa
     dados_externos = api_client.get_dados_embarcacoes()
     
     if dados_externos and 'embarcacoes' in dados_externos:
-        return JsonResponse(dados_externos)
+        # TTL curto: os dados podem ser a cópia de contingência
+        serializada = serializar(dados_externos)
+        cache_quente.set('resposta_dados_mapa', serializada, 60)
+        return responder(request, serializada)
     else:
         # Retornar lista vazia se API não disponível
         return JsonResponse({'embarcacoes': []})
 
 def dados_cache_json(request):
     """API otimizada para cache de navegação - retorna dados completos com cache"""
-    from django.core.cache import cache
-    
     # Verificar cache primeiro
-    cache_key = 'dados_cache_json'
-    cached_data = cache.get(cache_key)
+    cache_key = 'resposta_dados_cache'
+    cached_data = cache_quente.get(cache_key)
     
     if cached_data:
         logger.info("Retornando dados do cache")
-        return JsonResponse(cached_data)
+        return responder(request, cached_data)
     
     # Buscar dados da API externa
     dados_embarcacoes = api_client.get_dados_embarcacoes()
     dados_estatisticas = api_client.get_estatisticas_regionais()
     
     # Ordenar embarcações por data (mais recentes primeiro)
-    embarcacoes = dados_embarcacoes.get('embarcacoes', []) if dados_embarcacoes else []
-    embarcacoes = sorted(embarcacoes, key=lambda x: x.get('data_cadastro', ''), reverse=True)
+    embarcacoes = dados_embarcacoes['embarcacoes'] if dados_embarcacoes else FrotaCompacta()
+    embarcacoes = embarcacoes.ordenar_por('data_cadastro', reverso=True)
     
     response_data = {
         'embarcacoes': embarcacoes,
@@ -415,20 +504,28 @@ def dados_cache_json(request):
         'total': len(embarcacoes)
     }
     
-    # Cachear por 10 minutos
-    cache.set(cache_key, response_data, 600)
+    # Cachear por 10 minutos, já serializado
+    serializada = serializar(response_data)
+    cache_quente.set(cache_key, serializada, 600)
     logger.info("Retornando estatísticas do cache")
     
-    return JsonResponse(response_data)
+    return responder(request, serializada)
 
 
 def dados_graficos_json(request):
     """API para fornecer dados dos gráficos em JSON"""
+    serializada = cache_quente.get('resposta_dados_graficos')
+    if serializada:
+        return responder(request, serializada)
+    
     # Buscar dados apenas da API externa
     estatisticas_externas = api_client.get_estatisticas_regionais()
     
     if estatisticas_externas:
-        return JsonResponse(estatisticas_externas)
+        # Mesmo TTL das estatísticas em get_estatisticas_regionais
+        serializada = serializar(estatisticas_externas)
+        cache_quente.set('resposta_dados_graficos', serializada, 300)
+        return responder(request, serializada)
     else:
         # Retornar dados vazios se API não disponível
         return JsonResponse({
@@ -444,94 +541,109 @@ def dados_graficos_json(request):
         })
 
 
+def _mesclar_historico(request, frota_api):
+    """
+    Uploads locais + frota da API enriquecida com o progresso local, do mais
+    recente para o mais antigo. Trabalha nas colunas da FrotaCompacta, sem
+    copiar cada registro da API
+    """
+    # Buscar também uploads locais que ainda não estão na API
+    uploads_locais = []
+    locais_por_resource = {}
+    try:
+        imagens_locais = ImagemEmbarcacao.objects.select_related('embarcacao').filter(
+            status_analise__in=STATUS_HISTORICO_LOCAL
+        ).order_by('-data_upload')
+        
+        for img in imagens_locais:
+            dados_local = _formatar_upload_local(img, request)
+            resource_id = dados_local.get('resource_id')
+            if resource_id:
+                locais_por_resource[resource_id] = dados_local
+            if _listar_como_upload_local(img):
+                uploads_locais.append(dados_local)
+    except Exception as e:
+        logger.error("Erro ao buscar uploads locais: %s", e)
+    
+    # Mesclar dados da API com uploads locais (AUSENTE = campo que a API não mandou)
+    ids = frota_api.coluna('id')
+    resource_ids = frota_api.coluna('resource_id')
+    classificacoes = frota_api.coluna('classificacao')
+    progresso = frota_api.coluna('progresso', AUSENTE)
+    mensagem_status = frota_api.coluna('mensagem_status', AUSENTE)
+    status_local = frota_api.coluna('status_local', AUSENTE)
+    job_id = frota_api.coluna('job_id', AUSENTE)
+    resultado_api = frota_api.coluna('resultado_api', AUSENTE)
+    for i in range(len(frota_api)):
+        local_info = locais_por_resource.get(str(ids[i] or resource_ids[i] or ''))
+        if local_info:
+            progresso[i] = local_info.get('progresso', 100)
+            mensagem_status[i] = local_info.get('mensagem_status', '')
+            status_local[i] = local_info.get('status_local', '')
+            job_id[i] = local_info.get('job_id')
+            resultado_api[i] = local_info.get('resultado_api') or (None if resultado_api[i] is AUSENTE else resultado_api[i])
+        else:
+            if progresso[i] is AUSENTE:
+                progresso[i] = 100 if classificacoes[i] else 0
+            if mensagem_status[i] is AUSENTE:
+                mensagem_status[i] = ''
+            if status_local[i] is AUSENTE:
+                status_local[i] = 'Analisada' if classificacoes[i] else ''
+    
+    frota_api = frota_api.com_colunas(
+        origem=['api'] * len(frota_api),
+        progresso=progresso,
+        mensagem_status=mensagem_status,
+        status_local=status_local,
+        job_id=job_id,
+        resultado_api=resultado_api,
+    )
+    embarcacoes = FrotaCompacta(uploads_locais) + frota_api
+    
+    # Ordenar por data de cadastro (mais recentes primeiro)
+    return embarcacoes.ordenar_por('data_cadastro', reverso=True)
+
+
 def historico(request):
     """View para página de histórico de análises com paginação otimizada"""
     from django.core.paginator import Paginator
-    from django.core.cache import cache
     import time
     
     start_time = time.time()
     
     # Verificar cache primeiro
-    cache_key = 'historico_data'
-    cached_data = cache.get(cache_key)
+    cache_key = 'historico_frota'
+    cached_data = cache_quente.get(cache_key)
     
     if cached_data:
         # Usar dados do cache
         embarcacoes = cached_data['embarcacoes']
         api_connected = cached_data['api_connected']
         total_count = cached_data['total_count']
-        logger.info(f"Dados do histórico carregados do cache em {time.time() - start_time:.2f}s")
+        logger.info("Dados do histórico carregados do cache em %.2fs", time.time() - start_time)
     else:
         # Buscar dados da API externa
         dados_api = api_client.get_dados_embarcacoes()
         
         if dados_api and 'embarcacoes' in dados_api:
-            embarcacoes_api = dados_api['embarcacoes']
+            frota_api = dados_api['embarcacoes']
             api_connected = True
         else:
-            embarcacoes_api = []
+            frota_api = FrotaCompacta()
             api_connected = False
         
-        # Buscar também uploads locais que ainda não estão na API
-        uploads_locais = []
-        locais_por_resource = {}
-        try:
-            imagens_locais = ImagemEmbarcacao.objects.select_related('embarcacao').filter(
-                status_analise__in=[
-                    StatusAnalise.PENDENTE,
-                    StatusAnalise.PROCESSANDO,
-                    StatusAnalise.ANALISADA,
-                    StatusAnalise.ERRO,
-                ]
-            ).order_by('-data_upload')
-            
-            for img in imagens_locais:
-                dados_local = _formatar_upload_local(img, request)
-                resource_id = dados_local.get('resource_id')
-                if resource_id:
-                    locais_por_resource[resource_id] = dados_local
-                if img.status_analise in [StatusAnalise.ANALISADA, StatusAnalise.APROVADA] and resource_id:
-                    # Resultado final já disponível via API - evitar duplicidade
-                    continue
-                uploads_locais.append(dados_local)
-        except Exception as e:
-            logger.error(f"Erro ao buscar uploads locais: {e}")
-        
-        # Mesclar dados da API com uploads locais
-        embarcacoes_api_enriquecidas = []
-        for embarcacao in embarcacoes_api:
-            api_item = dict(embarcacao)
-            api_item['origem'] = 'api'
-            resource_key = str(api_item.get('id') or api_item.get('resource_id') or '')
-            local_info = locais_por_resource.get(resource_key)
-            if local_info:
-                api_item['progresso'] = local_info.get('progresso', 100)
-                api_item['mensagem_status'] = local_info.get('mensagem_status', '')
-                api_item['status_local'] = local_info.get('status_local', '')
-                api_item['job_id'] = local_info.get('job_id')
-                api_item['resultado_api'] = local_info.get('resultado_api') or api_item.get('resultado_api')
-            else:
-                api_item.setdefault('progresso', 100 if api_item.get('classificacao') else 0)
-                api_item.setdefault('mensagem_status', '')
-                api_item.setdefault('status_local', 'Analisada' if api_item.get('classificacao') else '')
-            embarcacoes_api_enriquecidas.append(api_item)
-
-        embarcacoes = uploads_locais + embarcacoes_api_enriquecidas
-        
-        # Ordenar por data de cadastro (mais recentes primeiro)
-        embarcacoes = sorted(embarcacoes, key=lambda x: x.get('data_cadastro', ''), reverse=True)
+        embarcacoes = _mesclar_historico(request, frota_api)
         
         total_count = len(embarcacoes)
         
         # Cachear dados por 10 minutos
-        cache.set(cache_key, {
+        cache_quente.set(cache_key, {
             'embarcacoes': embarcacoes,
             'api_connected': api_connected,
             'total_count': total_count
         }, 600)
         
-        logger.info(f"Dados do histórico carregados da API em {time.time() - start_time:.2f}s")
+        logger.info("Dados do histórico carregados da API em %.2fs", time.time() - start_time)
     
     # Implementar paginação otimizada
     paginator = Paginator(embarcacoes, 20)  # 20 itens por página
@@ -544,10 +656,9 @@ def historico(request):
         'api_connected': api_connected,
         'total_count': total_count,
         'load_time': round(time.time() - start_time, 2),
-        'timestamp': int(time.time()),  # Para quebrar cache do navegador
     }
     
-    return render(request, 'embarcacoes/historico.html', context)
+    return _renderizar_pagina(request, 'embarcacoes/historico.html', 'embarcacoes/historico_content.html', context)
 
 
 def historico_ajax(request):
@@ -565,108 +676,48 @@ def historico_ajax(request):
     filtro_regiao = request.GET.get('regiao', '')
     filtro_busca = request.GET.get('busca', '').lower()
     
+    versao = cache_quente.versao()
+    since = request.GET.get('since')
+    if since:
+        return _historico_delta(request, versao, since, filtro_tipo, filtro_regiao, filtro_busca)
+    
     # Verificar cache primeiro
-    cache_key = f'historico_ajax_{page}_{page_size}_{filtro_tipo}_{filtro_regiao}_{filtro_busca}'
+    cache_key = f'historico_ajax_json_{versao}_{page}_{page_size}_{filtro_tipo}_{filtro_regiao}_{filtro_busca}'
     cached_data = cache.get(cache_key)
+    registrar_cache(bool(cached_data))
     
     if cached_data:
-        logger.info(f"Dados AJAX carregados do cache em {time.time() - start_time:.2f}s")
-        response = JsonResponse(cached_data)
-        # Impedir cache no navegador para sempre pegar dados frescos
-        response["Cache-Control"] = "no-cache, no-store, must-revalidate"
-        response["Pragma"] = "no-cache"
-        response["Expires"] = "0"
-        return response
+        logger.info("Dados AJAX carregados do cache em %.2fs", time.time() - start_time)
+        return _resposta_historico(request, cached_data)
+    
+    # Token gerado antes da leitura: o que mudar durante a montagem entra no próximo delta
+    token = gerar_token(versao, timezone.now())
     
     # Buscar dados da API externa
     dados_api = api_client.get_dados_embarcacoes()
     
     if dados_api and 'embarcacoes' in dados_api:
-        embarcacoes_api = dados_api['embarcacoes']
+        frota_api = dados_api['embarcacoes']
     else:
-        embarcacoes_api = []
+        frota_api = FrotaCompacta()
     
-    # Buscar também uploads locais que ainda não estão na API
-    uploads_locais = []
-    locais_por_resource = {}
-    try:
-        imagens_locais = ImagemEmbarcacao.objects.select_related('embarcacao').filter(
-            status_analise__in=[
-                StatusAnalise.PENDENTE,
-                StatusAnalise.PROCESSANDO,
-                StatusAnalise.ANALISADA,
-                StatusAnalise.ERRO,
-            ]
-        ).order_by('-data_upload')
-        
-        for img in imagens_locais:
-            dados_local = _formatar_upload_local(img, request)
-            resource_id = dados_local.get('resource_id')
-            if resource_id:
-                locais_por_resource[resource_id] = dados_local
-            if img.status_analise in [StatusAnalise.ANALISADA, StatusAnalise.APROVADA] and resource_id:
-                continue
-            uploads_locais.append(dados_local)
-    except Exception as e:
-        logger.error(f"Erro ao buscar uploads locais: {e}")
-    
-    # Mesclar dados da API com uploads locais
-    embarcacoes_api_enriquecidas = []
-    for embarcacao in embarcacoes_api:
-        api_item = dict(embarcacao)
-        api_item['origem'] = 'api'
-        resource_key = str(api_item.get('id') or api_item.get('resource_id') or '')
-        local_info = locais_por_resource.get(resource_key)
-        if local_info:
-            api_item['progresso'] = local_info.get('progresso', 100)
-            api_item['mensagem_status'] = local_info.get('mensagem_status', '')
-            api_item['status_local'] = local_info.get('status_local', '')
-            api_item['job_id'] = local_info.get('job_id')
-            api_item['resultado_api'] = local_info.get('resultado_api') or api_item.get('resultado_api')
-        else:
-            api_item.setdefault('progresso', 100 if api_item.get('classificacao') else 0)
-            api_item.setdefault('mensagem_status', '')
-            api_item.setdefault('status_local', 'Analisada' if api_item.get('classificacao') else '')
-        embarcacoes_api_enriquecidas.append(api_item)
-
-    embarcacoes = uploads_locais + embarcacoes_api_enriquecidas
-    
-    # Ordenar por data de cadastro (mais recentes primeiro)
-    embarcacoes = sorted(embarcacoes, key=lambda x: x.get('data_cadastro', ''), reverse=True)
-    
-    # Aplicar filtros
-    if filtro_tipo:
-        embarcacoes = [e for e in embarcacoes if e.get('classificacao', '').lower() == filtro_tipo]
-    
-    if filtro_regiao:
-        embarcacoes = [e for e in embarcacoes if e.get('regiao') and e.get('regiao').lower() == filtro_regiao.lower()]
-    
-    if filtro_busca:
-        def match_busca(embarcacao):
-            # Buscar em múltiplos campos
-            localidade = str(embarcacao.get('localidade', '')).lower()
-            titulo = str(embarcacao.get('titulo', '')).lower()
-            descricao = str(embarcacao.get('descricao', '')).lower()
-            id_str = str(embarcacao.get('id', '')).lower()
-            
-            return (filtro_busca in localidade or 
-                   filtro_busca in titulo or 
-                   filtro_busca in descricao or 
-                   filtro_busca in id_str)
-        
-        embarcacoes = [e for e in embarcacoes if match_busca(e)]
+    embarcacoes = _filtrar_historico(
+        _mesclar_historico(request, frota_api), filtro_tipo, filtro_regiao, filtro_busca,
+    )
     
     # Implementar paginação
     paginator = Paginator(embarcacoes, page_size)
     page_obj = paginator.get_page(page)
+    inicio_pagina = (page_obj.number - 1) * page_size
     
     # Calcular estatísticas totais
-    total_legais = len([e for e in embarcacoes if e.get('classificacao', '').lower() == 'legal'])
-    total_ilegais = len([e for e in embarcacoes if e.get('classificacao', '').lower() == 'ilegal'])
+    classificacoes = [(c or '').lower() for c in embarcacoes.coluna('classificacao', '')]
+    total_legais = classificacoes.count('legal')
+    total_ilegais = classificacoes.count('ilegal')
     
     # Preparar dados para resposta
     response_data = {
-        'embarcacoes': page_obj.object_list,
+        'embarcacoes': embarcacoes.como_dicts(inicio_pagina, inicio_pagina + page_size),
         'total_count': len(embarcacoes),
         'total_legais': total_legais,
         'total_ilegais': total_ilegais,
@@ -679,15 +730,76 @@ def historico_ajax(request):
         'next_page': page_obj.next_page_number() if page_obj.has_next() else None,
         'start_index': page_obj.start_index(),
         'end_index': page_obj.end_index(),
+        'token': token,
         'load_time': round(time.time() - start_time, 2)
     }
     
-    # Cachear por 5 minutos
-    cache.set(cache_key, response_data, 300)
+    # Cachear por 5 minutos, já serializado
+    serializada = serializar(response_data)
+    cache.set(cache_key, serializada, 300)
+    return _resposta_historico(request, serializada)
+
+
+def _filtrar_historico(embarcacoes, filtro_tipo, filtro_regiao, filtro_busca):
+    """Filtros do histórico aplicados sobre as colunas, sem montar os registros"""
+    if filtro_tipo:
+        embarcacoes = embarcacoes.filtrar(
+            (c or '').lower() == filtro_tipo for c in embarcacoes.coluna('classificacao', '')
+        )
+    
+    if filtro_regiao:
+        filtro_regiao = filtro_regiao.lower()
+        embarcacoes = embarcacoes.filtrar(
+            bool(r) and r.lower() == filtro_regiao for r in embarcacoes.coluna('regiao')
+        )
+    
+    if filtro_busca:
+        # Buscar em múltiplos campos
+        campos = zip(*(embarcacoes.coluna(campo, '') for campo in ('localidade', 'titulo', 'descricao', 'id')))
+        embarcacoes = embarcacoes.filtrar(
+            any(filtro_busca in str(valor).lower() for valor in valores) for valores in campos
+        )
+    
+    return embarcacoes
+
+
+def _historico_delta(request, versao, since, filtro_tipo, filtro_regiao, filtro_busca):
+    """
+    Uploads locais alterados/removidos desde o token, já com os filtros da
+    página; 'completo' pede a recarga da página quando o delta não basta
+    """
+    instante = ler_token(since, versao)
+    if instante is None:
+        return _resposta_historico(request, serializar({'delta': True, 'completo': True}))
+    
+    token = gerar_token(versao, timezone.now())
+    imagens, removidas = alteracoes_desde(instante)
+    
+    # Alterações que deixaram de ser linha local ou saíram do filtro também são remoções
+    removidas = [f'local_{imagem_id}' for imagem_id in removidas]
+    listadas = []
+    for imagem in imagens:
+        if _listar_como_upload_local(imagem):
+            listadas.append(_formatar_upload_local(imagem, request))
+        else:
+            removidas.append(f'local_{imagem.id}')
     
-    # Depois de gerar os dados (cache miss)
-    response = JsonResponse(response_data)
-    response["Cache-Control"] = "no-cache, no-store, must-revalidate"
+    alteradas = _filtrar_historico(FrotaCompacta(listadas), filtro_tipo, filtro_regiao, filtro_busca)
+    ids_alterados = set(alteradas.coluna('id'))
+    removidas.extend(dados['id'] for dados in listadas if dados['id'] not in ids_alterados)
+    
+    return _resposta_historico(request, serializar({
+        'delta': True,
+        'completo': False,
+        'token': token,
+        'alteradas': alteradas.como_dicts(),
+        'removidas': removidas,
+    }))
+
+
+def _resposta_historico(request, serializada):
+    # O navegador sempre revalida (dados frescos), mas pode receber 304 pelo ETag
+    response = responder(request, serializada, 'no-cache, must-revalidate')
     response["Pragma"] = "no-cache"
     response["Expires"] = "0"
     return response
@@ -710,15 +822,84 @@ def exportar_csv(request):
     writer = csv.writer(response)
     writer.writerow(['ID', 'Nome', 'Tipo', 'Região', 'Latitude', 'Longitude', 'Data Registro'])
     
-    for embarcacao in dados_api['embarcacoes']:
-        writer.writerow([
-            embarcacao.get('id', ''),
-            embarcacao.get('nome', ''),
-            embarcacao.get('tipo', ''),
-            embarcacao.get('regiao', ''),
-            embarcacao.get('latitude', ''),
-            embarcacao.get('longitude', ''),
-            embarcacao.get('data_registro', '')
-        ])
+    frota = dados_api['embarcacoes']
+    writer.writerows(zip(*(
+        frota.coluna(campo, '')
+        for campo in ('id', 'nome', 'tipo', 'regiao', 'latitude', 'longitude', 'data_registro')
+    )))
     
     return response
+
+
+def _acesso_metricas(request):
+    """Staff logado, token do scraper (Authorization: Bearer) ou IP da lista de permitidos"""
+    if request.user.is_staff:
+        return True
+    config = getattr(settings, 'ARITANA_METRICAS', {})
+    token = config.get('token')
+    autorizacao = request.META.get('HTTP_AUTHORIZATION', '')
+    if token and autorizacao.startswith('Bearer ') and hmac.compare_digest(
+        autorizacao[len('Bearer '):].encode(), token.encode()
+    ):
+        return True
+    return request.META.get('REMOTE_ADDR') in config.get('ips_permitidos', ())
+
+
+def _acesso_negado():
+    response = JsonResponse({'error': 'Acesso restrito'}, status=403)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+def metricas_cache(request):
+    """API com contadores de hit/miss/bytes do cache em camadas deste worker"""
+    if not _acesso_metricas(request):
+        return _acesso_negado()
+    return JsonResponse(cache_quente.metricas())
+
+
+def metricas_jobs(request):
+    """API com percentis por etapa e vazão por hora/região dos jobs (?horas=24, até 7 dias)"""
+    if not _acesso_metricas(request):
+        return _acesso_negado()
+    max_horas = getattr(settings, 'ARITANA_METRICAS', {}).get('max_horas_jobs', 24 * 7)
+    try:
+        horas = min(max(int(request.GET.get('horas', 24)), 1), max_horas)
+    except ValueError:
+        horas = 24
+    return JsonResponse(relatorio_ciclo_jobs(horas))
+
+
+def metricas_prometheus(request):
+    """Métricas agregadas de todos os workers no formato texto do Prometheus"""
+    if not _acesso_metricas(request):
+        return _acesso_negado()
+    valores = metricas.valores()
+    por_status = dict(
+        ImagemEmbarcacao.objects.values_list('status_analise').annotate(total=Count('id')).order_by()
+    )
+    jobs = (
+        'aritana_jobs',
+        'Imagens por status de análise',
+        [({'status': status}, por_status.get(status, 0)) for status in StatusAnalise.values],
+    )
+    return HttpResponse(
+        formatar_prometheus(valores, gauges=[jobs, taxas_acerto_cache(valores)]),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+def pronto(request):
+    """
+    Readiness para o balanceador: 503 enquanto este worker aquece os caches.
+    Público, então só responde a situação; as etapas e erros ficam no log
+    """
+    estado = estado_aquecimento()
+    response = JsonResponse(
+        {'pronto': estado['pronto'], 'situacao': estado['situacao']},
+        status=200 if estado['pronto'] else 503,
+    )
+    response['Cache-Control'] = 'no-store'
+    if not estado['pronto']:
+        response['Retry-After'] = '5'
+    return response
@@ -56,6 +56,7 @@ def upload_imagem(request):
                     imagem=imagem,
                     titulo=titulo,
                     descricao=descricao,
+                    regiao=regiao.strip()[:100],
                     status_analise=StatusAnalise.PENDENTE
                 )
                 
@@ -88,7 +89,7 @@ def upload_imagem(request):
                     messages.error(request, 'Erro ao enviar imagem para análise. Tente novamente.')
                     
             except Exception as e:
-                logger.error(f"Erro no upload da imagem: {str(e)}")
+                logger.error("Erro no upload da imagem: %s", e)
                 messages.error(request, f'Erro interno: {str(e)}')
         else:
             messages.error(request, 'Nenhuma imagem foi selecionada.')
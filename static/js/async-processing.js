@@ -83,6 +83,10 @@ class AsyncImageProcessor {
         const jobs = Array.from(this.activeJobs.values());
         
         for (const job of jobs) {
+            // Circuito do backend aberto: o servidor pediu para esperar
+            if (job.proximaConsulta && Date.now() < job.proximaConsulta) {
+                continue;
+            }
             try {
                 await this.checkJobStatus(job.id);
             } catch (error) {
@@ -116,6 +120,7 @@ class AsyncImageProcessor {
             job.message = data.mensagem || '';
             job.lastCheck = Date.now();
             job.retryCount = 0; // Reset retry count on success
+            job.proximaConsulta = data.tentar_novamente_em ? Date.now() + data.tentar_novamente_em * 1000 : 0;
 
             // Executar callbacks
             this.executeCallbacks(jobId, data);
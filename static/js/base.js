@@ -0,0 +1,229 @@
+// Scripts do base.html: carregamento sob demanda do Leaflet/Chart.js e navegação
+
+// Carregar Leaflet apenas quando necessário - versão melhorada com fallbacks
+function loadLeaflet() {
+    return new Promise((resolve, reject) => {
+        if (typeof L !== 'undefined') {
+            console.log('✅ Leaflet já está carregado');
+            resolve();
+            return;
+        }
+
+        console.log('🔄 Carregando Leaflet...');
+
+        // Verificar se o CSS já foi carregado
+        let existingCSS = document.querySelector('link[href*="leaflet.css"]');
+        if (!existingCSS) {
+            const link = document.createElement('link');
+            link.rel = 'stylesheet';
+            link.href = 'https://unpkg.com/leaflet@1.9.4/dist/leaflet.css';
+            link.crossOrigin = 'anonymous';
+            link.onerror = function() {
+                console.warn('⚠️ Erro ao carregar CSS do Leaflet, tentando fallback...');
+                // Tentar fallback
+                const fallbackLink = document.createElement('link');
+                fallbackLink.rel = 'stylesheet';
+                fallbackLink.href = 'https://cdn.jsdelivr.net/npm/leaflet@1.9.4/dist/leaflet.css';
+                fallbackLink.crossOrigin = 'anonymous';
+                document.head.appendChild(fallbackLink);
+            };
+            document.head.appendChild(link);
+            existingCSS = link;
+        }
+
+        // Verificar se o script já existe
+        const existingScript = document.querySelector('script[src*="leaflet.js"]');
+        if (existingScript) {
+            console.log('📜 Script Leaflet já existe, aguardando carregamento...');
+            if (typeof L !== 'undefined') {
+                resolve();
+                return;
+            }
+            existingScript.addEventListener('load', () => {
+                console.log('✅ Leaflet carregado via script existente');
+                setTimeout(resolve, 200);
+            });
+            existingScript.addEventListener('error', (error) => {
+                console.error('❌ Erro no script Leaflet existente:', error);
+                reject(error);
+            });
+            return;
+        }
+
+        // Criar novo script
+        const script = document.createElement('script');
+        script.src = 'https://unpkg.com/leaflet@1.9.4/dist/leaflet.js';
+        script.crossOrigin = 'anonymous';
+        script.async = true;
+
+        // Timeout para evitar espera infinita
+        const timeout = setTimeout(() => {
+            if (typeof L === 'undefined') {
+                console.error('❌ Timeout ao carregar Leaflet');
+                reject(new Error('Timeout ao carregar Leaflet'));
+            }
+        }, 10000);
+
+        script.onload = function() {
+            clearTimeout(timeout);
+            console.log('✅ Leaflet JS carregado com sucesso');
+            // Verificar se L está disponível
+            if (typeof L !== 'undefined') {
+            // Aguardar um pouco para garantir que o CSS também foi processado
+                setTimeout(resolve, 200);
+            } else {
+                console.error('❌ Leaflet carregado mas objeto L não está disponível');
+                reject(new Error('Leaflet carregado mas objeto L não está disponível'));
+            }
+        };
+
+        script.onerror = function(error) {
+            clearTimeout(timeout);
+            console.error('❌ Erro ao carregar Leaflet:', error);
+            // Tentar fallback
+            console.log('🔄 Tentando fallback para CDN alternativo...');
+            const fallbackScript = document.createElement('script');
+            fallbackScript.src = 'https://cdn.jsdelivr.net/npm/leaflet@1.9.4/dist/leaflet.js';
+            fallbackScript.crossOrigin = 'anonymous';
+            fallbackScript.async = true;
+            fallbackScript.onload = function() {
+                if (typeof L !== 'undefined') {
+                    console.log('✅ Leaflet carregado via fallback');
+                    setTimeout(resolve, 200);
+                } else {
+                    console.error('❌ Fallback carregou mas L não está disponível');
+                    reject(new Error('Fallback também falhou'));
+                }
+            };
+            fallbackScript.onerror = function(error) {
+                console.error('❌ Erro no fallback:', error);
+                reject(new Error('Todos os CDNs falharam'));
+            };
+            document.head.appendChild(fallbackScript);
+        };
+
+        document.head.appendChild(script);
+    });
+}
+
+// Carregar Chart.js apenas quando necessário
+function loadChartJS() {
+    return new Promise((resolve, reject) => {
+        if (typeof Chart !== 'undefined') {
+            resolve();
+            return;
+        }
+
+        const script = document.createElement('script');
+        script.src = 'https://cdn.jsdelivr.net/npm/chart.js';
+        script.onload = function() {
+            console.log('Chart.js carregado');
+            resolve();
+        };
+        script.onerror = reject;
+        document.head.appendChild(script);
+    });
+}
+
+// Expor funções globalmente
+window.loadLeaflet = loadLeaflet;
+window.loadChartJS = loadChartJS;
+
+// Função de navegação desabilitada - usar navegação normal do navegador
+window.navigateToPage = function(pageName, pageNumber = 1) {
+    console.log(`navigateToPage desabilitado - usando navegação normal`);
+    // Não fazer nada - deixar navegação normal do navegador funcionar
+    return false;
+};
+
+// Função para carregar conteúdo da página via AJAX
+function loadPageContent(pageName, pageNumber = 1) {
+    const contentContainer = document.querySelector('#main-content');
+    if (!contentContainer) return;
+
+    // Mostrar loading
+    contentContainer.innerHTML = `
+        <div class="d-flex align-items-center justify-content-center" style="height: 400px;">
+            <div class="text-center">
+                <div class="spinner-border text-success mb-3" role="status">
+                    <span class="visually-hidden">Carregando...</span>
+                </div>
+                <p class="text-muted">Carregando ${pageName}...</p>
+            </div>
+        </div>
+    `;
+
+    // Carregar só o conteúdo: o servidor responde com o fragmento, sem o base.html
+    fetch(pageName === 'dashboard' ? '/dashboard/' : '/historico/', {
+        headers: { 'X-Aritana-Fragmento': '1' }
+    })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            return response.text();
+        })
+        .then(html => {
+            contentContainer.innerHTML = html;
+
+            // Reinicializar scripts da página
+            setTimeout(() => {
+                if (pageName === 'dashboard' && window.safeReinitializeDashboard) {
+                    window.safeReinitializeDashboard();
+                } else if (pageName === 'historico' && window.initializeHistorico) {
+                    window.initializeHistorico();
+                }
+            }, 100);
+        })
+        .catch(error => {
+            console.error('Erro ao carregar página:', error);
+            contentContainer.innerHTML = `
+                <div class="alert alert-danger">
+                    <h5>Erro ao carregar página</h5>
+                    <p>Não foi possível carregar o conteúdo. <a href="${pageName === 'dashboard' ? '/' : '/historico/'}" class="alert-link">Tentar novamente</a></p>
+                </div>
+            `;
+        });
+}
+
+// Interceptar navegação do browser
+window.addEventListener('popstate', function(event) {
+    if (event.state && event.state.page) {
+        loadPageContent(event.state.page);
+    }
+});
+
+// Função para atualizar link ativo
+function updateActiveNavLink(pageName) {
+    // Remove classe active de todos os links
+    document.querySelectorAll('.header-nav-link').forEach(link => {
+        link.classList.remove('active');
+    });
+
+    // Adiciona classe active ao link atual
+    const activeLink = document.querySelector(`[href*="${pageName}"]`) || 
+                      document.querySelector(`[onclick*="${pageName}"]`);
+    if (activeLink) {
+        activeLink.classList.add('active');
+    }
+}
+
+// Marcar link ativo baseado na URL atual
+document.addEventListener('DOMContentLoaded', function() {
+    const currentPath = window.location.pathname;
+    const links = document.querySelectorAll('.header-nav-link');
+
+    links.forEach(link => {
+        link.classList.remove('active');
+        const href = link.getAttribute('href');
+
+        // Marcar Dashboard como ativo
+        if ((currentPath === '/' || currentPath.includes('dashboard')) && href.includes('dashboard')) {
+            link.classList.add('active');
+        }
+        // Marcar Histórico como ativo
+        else if (currentPath.includes('historico') && href.includes('historico')) {
+            link.classList.add('active');
+        }
+    });
+});
@@ -21,6 +21,10 @@ let hasActiveJobs = false;
 const AUTO_REFRESH_INTERVAL_ACTIVE = 10000; // 10 segundos quando há jobs ativos
 const AUTO_REFRESH_INTERVAL_IDLE = 30000; // 30 segundos quando não há jobs
 
+// Token da última resposta do histórico; o auto-refresh pede só o que mudou depois dele
+let historicoToken = null;
+let deltaEmAndamento = false;
+
 /**
  * Formata data para o horário de Brasília (UTC-3)
  * @param {string} dataStr - Data em formato ISO (UTC)
@@ -173,6 +177,10 @@ function carregarDadosHistorico(page = 1, forceRefresh = false) {
 }
 
 function processarDados(data) {
+    if (data.token) {
+        historicoToken = data.token;
+    }
+    
     // Atualizar tabela
     atualizarTabela(data.embarcacoes);
     
@@ -304,100 +312,108 @@ function atualizarTabela(embarcacoes) {
     const fragment = document.createDocumentFragment();
     
     embarcacoes.forEach(embarcacao => {
-        const row = document.createElement('tr');
-        row.className = 'embarcacao-row';
-        const classificacaoLower = embarcacao.classificacao ? embarcacao.classificacao.toLowerCase() : '';
-        row.setAttribute('data-tipo', classificacaoLower);
-        row.setAttribute('data-regiao', embarcacao.regiao || '');
-        row.setAttribute('data-nome', embarcacao.localidade ? embarcacao.localidade.toLowerCase() : '');
-        row.setAttribute('data-id', embarcacao.id || '');
-        row.setAttribute('data-latitude', embarcacao.latitude || '');
-        row.setAttribute('data-longitude', embarcacao.longitude || '');
-        const imagemPreferencial = embarcacao.imagem_processada_url || embarcacao.imagem_url;
-        row.setAttribute('data-imagem', imagemPreferencial || '');
-        row.setAttribute('data-imagem-local', embarcacao.imagem_url || '');
-        row.setAttribute('data-imagem-api', embarcacao.imagem_processada_url || (embarcacao.resultado_api && embarcacao.resultado_api.imagem_url) || '');
-        row.setAttribute('data-data-cadastro', embarcacao.data_cadastro || '');
-        row.setAttribute('data-data-foto', embarcacao.data_foto || '');
-        row.setAttribute('data-status-local', embarcacao.status_local || '');
-        row.setAttribute('data-mensagem-status', embarcacao.mensagem_status || '');
-        row.setAttribute('data-progresso', embarcacao.progresso || '');
-        row.setAttribute('data-classificacao', classificacaoLower);
-        row.setAttribute('data-origem', embarcacao.origem || 'api');
-        if (embarcacao.resultado_api && typeof embarcacao.resultado_api === 'object') {
-            row.setAttribute('data-api-classificacao', embarcacao.resultado_api.classificacao || '');
-            row.setAttribute('data-api-regiao', embarcacao.resultado_api.regiao || '');
-            row.setAttribute('data-api-localidade', embarcacao.resultado_api.localidade || '');
-            row.setAttribute('data-api-descricao', embarcacao.resultado_api.descricao || '');
-            row.setAttribute('data-api-titulo', embarcacao.resultado_api.titulo || '');
-            row.setAttribute('data-api-imagem', embarcacao.resultado_api.imagem_url || '');
-        } else {
-            row.setAttribute('data-api-classificacao', '');
-            row.setAttribute('data-api-regiao', '');
-            row.setAttribute('data-api-localidade', '');
-            row.setAttribute('data-api-descricao', '');
-            row.setAttribute('data-api-titulo', '');
-            row.setAttribute('data-api-imagem', '');
-        }
-        row.setAttribute('data-resource-id', embarcacao.resource_id || '');
-        row.setAttribute('data-mensagem-api', embarcacao.mensagem_status || '');
-        row.setAttribute('data-job-id', embarcacao.job_id || '');
-        
-        row.innerHTML = `
-            <td>
-                <span class="fw-bold" style="color: #6b7280;">#${embarcacao.id || 'N/A'}</span>
-            </td>
-            <td>
-                <strong style="color: #1f2937;">${embarcacao.localidade || 'N/A'}</strong>
-            </td>
-            <td>
-                ${gerarBadgeStatus(embarcacao)}
-            </td>
-            <td>
-                <span class="badge bg-secondary" style="background-color: #6b7280 !important;">
-                    ${embarcacao.regiao || 'N/A'}
-                </span>
-            </td>
-            <td>
-                <div style="min-width: 180px;">
-                    <div style="font-size: 0.875rem; color: #374151;">
-                        <strong>Cadastro:</strong> ${embarcacao.data_cadastro ? formatarDataBrasil(embarcacao.data_cadastro) : 'N/A'}
-                    </div>
-                    ${embarcacao.data_foto ? `
-                        <div style="font-size: 0.875rem; color: #6b7280; margin-top: 4px;">
-                            <strong>Foto:</strong> ${formatarDataBrasil(embarcacao.data_foto)}
-                        </div>
-                    ` : ''}
-                </div>
-            </td>
-            <td class="text-center">
-                <div class="btn-group btn-group-sm" role="group">
-                    <button class="btn btn-sm btn-ver-detalhes" 
-                            data-embarcacao-id="${embarcacao.id || ''}"
-                            title="Ver detalhes"
-                            style="background: #1f2937; border: 1px solid #1f2937; color: #ffffff;">
-                        <i class="fas fa-eye"></i>
-                    </button>
-                    <button class="btn btn-sm btn-ver-mapa" 
-                            data-latitude="${embarcacao.latitude || ''}"
-                            data-longitude="${embarcacao.longitude || ''}"
-                            data-localidade="${(embarcacao.localidade || 'N/A').replace(/"/g, '&quot;').replace(/'/g, '&#39;')}"
-                            title="Ver no mapa"
-                            style="background: #f3f4f6; border: 1px solid #d1d5db; color: #374151;">
-                        <i class="fas fa-map-marker-alt"></i>
-                    </button>
-                </div>
-            </td>
-        `;
-        
-        fragment.appendChild(row);
+        fragment.appendChild(criarLinhaEmbarcacao(embarcacao));
     });
     
     tbody.innerHTML = '';
     tbody.appendChild(fragment);
     
     // Adicionar event listeners para os botões
-    tbody.querySelectorAll('.btn-ver-detalhes').forEach(btn => {
+    tbody.querySelectorAll('tr.embarcacao-row').forEach(vincularBotoesLinha);
+}
+
+function criarLinhaEmbarcacao(embarcacao) {
+    const row = document.createElement('tr');
+    row.className = 'embarcacao-row';
+    const classificacaoLower = embarcacao.classificacao ? embarcacao.classificacao.toLowerCase() : '';
+    row.setAttribute('data-tipo', classificacaoLower);
+    row.setAttribute('data-regiao', embarcacao.regiao || '');
+    row.setAttribute('data-nome', embarcacao.localidade ? embarcacao.localidade.toLowerCase() : '');
+    row.setAttribute('data-id', embarcacao.id || '');
+    row.setAttribute('data-latitude', embarcacao.latitude || '');
+    row.setAttribute('data-longitude', embarcacao.longitude || '');
+    const imagemPreferencial = embarcacao.imagem_processada_url || embarcacao.imagem_url;
+    row.setAttribute('data-imagem', imagemPreferencial || '');
+    row.setAttribute('data-imagem-local', embarcacao.imagem_url || '');
+    row.setAttribute('data-imagem-api', embarcacao.imagem_processada_url || (embarcacao.resultado_api && embarcacao.resultado_api.imagem_url) || '');
+    row.setAttribute('data-data-cadastro', embarcacao.data_cadastro || '');
+    row.setAttribute('data-data-foto', embarcacao.data_foto || '');
+    row.setAttribute('data-status-local', embarcacao.status_local || '');
+    row.setAttribute('data-mensagem-status', embarcacao.mensagem_status || '');
+    row.setAttribute('data-progresso', embarcacao.progresso || '');
+    row.setAttribute('data-classificacao', classificacaoLower);
+    row.setAttribute('data-origem', embarcacao.origem || 'api');
+    if (embarcacao.resultado_api && typeof embarcacao.resultado_api === 'object') {
+        row.setAttribute('data-api-classificacao', embarcacao.resultado_api.classificacao || '');
+        row.setAttribute('data-api-regiao', embarcacao.resultado_api.regiao || '');
+        row.setAttribute('data-api-localidade', embarcacao.resultado_api.localidade || '');
+        row.setAttribute('data-api-descricao', embarcacao.resultado_api.descricao || '');
+        row.setAttribute('data-api-titulo', embarcacao.resultado_api.titulo || '');
+        row.setAttribute('data-api-imagem', embarcacao.resultado_api.imagem_url || '');
+    } else {
+        row.setAttribute('data-api-classificacao', '');
+        row.setAttribute('data-api-regiao', '');
+        row.setAttribute('data-api-localidade', '');
+        row.setAttribute('data-api-descricao', '');
+        row.setAttribute('data-api-titulo', '');
+        row.setAttribute('data-api-imagem', '');
+    }
+    row.setAttribute('data-resource-id', embarcacao.resource_id || '');
+    row.setAttribute('data-mensagem-api', embarcacao.mensagem_status || '');
+    row.setAttribute('data-job-id', embarcacao.job_id || '');
+    
+    row.innerHTML = `
+        <td>
+            <span class="fw-bold" style="color: #6b7280;">#${embarcacao.id || 'N/A'}</span>
+        </td>
+        <td>
+            <strong style="color: #1f2937;">${embarcacao.localidade || 'N/A'}</strong>
+        </td>
+        <td>
+            ${gerarBadgeStatus(embarcacao)}
+        </td>
+        <td>
+            <span class="badge bg-secondary" style="background-color: #6b7280 !important;">
+                ${embarcacao.regiao || 'N/A'}
+            </span>
+        </td>
+        <td>
+            <div style="min-width: 180px;">
+                <div style="font-size: 0.875rem; color: #374151;">
+                    <strong>Cadastro:</strong> ${embarcacao.data_cadastro ? formatarDataBrasil(embarcacao.data_cadastro) : 'N/A'}
+                </div>
+                ${embarcacao.data_foto ? `
+                    <div style="font-size: 0.875rem; color: #6b7280; margin-top: 4px;">
+                        <strong>Foto:</strong> ${formatarDataBrasil(embarcacao.data_foto)}
+                    </div>
+                ` : ''}
+            </div>
+        </td>
+        <td class="text-center">
+            <div class="btn-group btn-group-sm" role="group">
+                <button class="btn btn-sm btn-ver-detalhes" 
+                        data-embarcacao-id="${embarcacao.id || ''}"
+                        title="Ver detalhes"
+                        style="background: #1f2937; border: 1px solid #1f2937; color: #ffffff;">
+                    <i class="fas fa-eye"></i>
+                </button>
+                <button class="btn btn-sm btn-ver-mapa" 
+                        data-latitude="${embarcacao.latitude || ''}"
+                        data-longitude="${embarcacao.longitude || ''}"
+                        data-localidade="${(embarcacao.localidade || 'N/A').replace(/"/g, '&quot;').replace(/'/g, '&#39;')}"
+                        title="Ver no mapa"
+                        style="background: #f3f4f6; border: 1px solid #d1d5db; color: #374151;">
+                    <i class="fas fa-map-marker-alt"></i>
+                </button>
+            </div>
+        </td>
+    `;
+    
+    return row;
+}
+
+function vincularBotoesLinha(row) {
+    row.querySelectorAll('.btn-ver-detalhes').forEach(btn => {
         btn.addEventListener('click', function() {
             const id = this.getAttribute('data-embarcacao-id');
             if (id && typeof window.verDetalhes === 'function') {
@@ -406,7 +422,7 @@ function atualizarTabela(embarcacoes) {
         });
     });
     
-    tbody.querySelectorAll('.btn-ver-mapa').forEach(btn => {
+    row.querySelectorAll('.btn-ver-mapa').forEach(btn => {
         btn.addEventListener('click', function() {
             const lat = this.getAttribute('data-latitude');
             const lng = this.getAttribute('data-longitude');
@@ -418,6 +434,86 @@ function atualizarTabela(embarcacoes) {
     });
 }
 
+/**
+ * Atualiza a página atual só com o que mudou desde o último token
+ * (?since=); recarrega a página inteira se o servidor pedir
+ */
+function atualizarHistoricoDelta() {
+    if (!historicoToken) {
+        carregarDadosHistorico(currentPage, true);
+        return;
+    }
+    if (isLoading || deltaEmAndamento) return;
+    
+    deltaEmAndamento = true;
+    const params = new URLSearchParams({
+        since: historicoToken,
+        tipo: currentFilters.tipo,
+        regiao: currentFilters.regiao,
+        busca: currentFilters.busca
+    });
+    
+    fetch(`/api/historico/?${params}`)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+            }
+            return response.json();
+        })
+        .then(data => {
+            deltaEmAndamento = false;
+            if (data.completo) {
+                carregarDadosHistorico(currentPage, true);
+                return;
+            }
+            historicoToken = data.token;
+            if (data.alteradas.length || data.removidas.length) {
+                aplicarDelta(data);
+            }
+        })
+        .catch(error => {
+            deltaEmAndamento = false;
+            console.error('Erro ao atualizar histórico:', error);
+        });
+}
+
+function aplicarDelta(data) {
+    const tbody = document.querySelector('#tabela-embarcacoes tbody');
+    if (!tbody) return;
+    
+    // A página mudou; as cópias locais das outras páginas também podem ter mudado
+    localCache.clear();
+    
+    const linhaPorId = id => tbody.querySelector(`tr.embarcacao-row[data-id="${CSS.escape(String(id))}"]`);
+    
+    data.removidas.forEach(id => {
+        const row = linhaPorId(id);
+        if (row) row.remove();
+    });
+    
+    data.alteradas.forEach(embarcacao => {
+        const nova = criarLinhaEmbarcacao(embarcacao);
+        const atual = linhaPorId(embarcacao.id);
+        if (atual) {
+            atual.replaceWith(nova);
+        } else if (currentPage === 1 && ehMaisRecenteQuePagina(tbody, embarcacao)) {
+            // Upload novo: entra no topo da primeira página
+            const vazia = tbody.querySelector('tr:not(.embarcacao-row)');
+            if (vazia) vazia.remove();
+            tbody.prepend(nova);
+        } else {
+            return;
+        }
+        vincularBotoesLinha(nova);
+    });
+}
+
+function ehMaisRecenteQuePagina(tbody, embarcacao) {
+    const primeira = tbody.querySelector('tr.embarcacao-row');
+    if (!primeira) return true;
+    return (embarcacao.data_cadastro || '') >= (primeira.getAttribute('data-data-cadastro') || '');
+}
+
 function atualizarPaginacao(data) {
     const paginationContainer = document.querySelector('.pagination');
     const pageInfo = document.querySelector('#page-info');
@@ -1120,8 +1216,8 @@ function iniciarMonitoramentoJobs() {
                             asyncProcessor.addJob(job.job_id, {
                                 onProgress: (statusData) => {
                                     console.log(`Job ${job.job_id}: ${statusData.progresso}%`);
-                                    // Recarregar tabela para mostrar progresso atualizado
-                                    carregarDadosHistorico(currentPage, true);
+                                    // Atualizar só as linhas alteradas para mostrar o progresso
+                                    atualizarHistoricoDelta();
                                 },
                                 onSuccess: () => {
                                     console.log(`Job ${job.job_id} concluído!`);
@@ -1132,8 +1228,8 @@ function iniciarMonitoramentoJobs() {
                                             window.setHasActiveJobs(hasJobs);
                                         }
                                     });
-                                    // Recarregar tabela
-                                    carregarDadosHistorico(currentPage, true);
+                                    // Atualizar linhas alteradas (recarga completa se o servidor pedir)
+                                    atualizarHistoricoDelta();
                                 },
                                 onError: (error) => {
                                     console.error(`Job ${job.job_id} falhou:`, error);
@@ -1144,8 +1240,8 @@ function iniciarMonitoramentoJobs() {
                                             window.setHasActiveJobs(hasJobs);
                                         }
                                     });
-                                    // Recarregar tabela
-                                    carregarDadosHistorico(currentPage, true);
+                                    // Atualizar linhas alteradas (recarga completa se o servidor pedir)
+                                    atualizarHistoricoDelta();
                                 }
                             });
                         }
@@ -1201,9 +1297,9 @@ function iniciarAtualizacaoAutomatica() {
         verificarJobsAtivos().then(hasJobs => {
             hasActiveJobs = hasJobs;
             
-            // Atualizar lista forçando refresh
+            // Buscar só o que mudou desde a última resposta
             console.log('🔄 Atualização automática da lista...');
-            carregarDadosHistorico(currentPage, true);
+            atualizarHistoricoDelta();
         });
     }
     
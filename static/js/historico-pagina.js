@@ -0,0 +1,35 @@
+// Verificação de consistência da tabela do histórico após o carregamento
+
+// Forçar limpeza do cache e recarregar dados
+document.addEventListener('DOMContentLoaded', function() {
+    // Limpar cache do localStorage
+    if (typeof localCache !== 'undefined') {
+        localCache.clear();
+    }
+    console.log('Cache limpo - recarregando dados...');
+
+    // Verificar se as funções estão disponíveis
+    setTimeout(function() {
+        console.log('🔍 Verificando funções disponíveis:');
+        console.log('  - verDetalhes:', typeof window.verDetalhes);
+        console.log('  - verImagem:', typeof window.verImagem);
+        console.log('  - verNoMapa:', typeof window.verNoMapa);
+        console.log('  - bootstrap:', typeof bootstrap);
+        console.log('  - Modal #modalDetalhes existe:', !!document.getElementById('modalDetalhes'));
+
+        // Verificar se a tabela tem 7 colunas
+        const headerCells = document.querySelectorAll('#tabela-embarcacoes thead th');
+        const bodyCells = document.querySelectorAll('#tabela-embarcacoes tbody tr:first-child td');
+
+        console.log(`Cabeçalhos: ${headerCells.length} colunas`);
+        console.log(`Dados: ${bodyCells.length} colunas`);
+
+        if (headerCells.length === 7 && bodyCells.length !== 7) {
+            console.warn('⚠️ Número de colunas não bate! Forçando recarga...');
+            if (typeof localCache !== 'undefined') {
+                localCache.clear();
+            }
+            location.reload(true);
+        }
+    }, 2000);
+});
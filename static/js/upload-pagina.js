@@ -0,0 +1,255 @@
+// Scripts da página de upload de imagem
+
+// Configurações específicas da página de upload
+document.addEventListener('DOMContentLoaded', function() {
+    // Aguardar um pouco para garantir que o async-processing.js foi carregado
+    setTimeout(function() {
+        // Verificar se o sistema de processamento assíncrono está disponível
+        if (window.asyncProcessor && window.imageUploader) {
+            console.log('Sistema de processamento assíncrono carregado na página de upload');
+
+            // Inicializar o uploader se ainda não foi inicializado
+            if (!window.imageUploader.uploadArea) {
+                window.imageUploader.init(
+                    'uploadArea',
+                    'imageInput',
+                    'imagePreview',
+                    'progressContainer',
+                    'statusMessage',
+                    'uploadBtn'
+                );
+                console.log('ImageUploader inicializado');
+            }
+
+            // Adicionar listener para jobs existentes na página
+            const existingJobs = document.querySelectorAll('[data-job-id]');
+            existingJobs.forEach(element => {
+                const jobId = element.getAttribute('data-job-id');
+                if (jobId) {
+                    window.asyncProcessor.addJob(jobId, {
+                        onProgress: (data, job) => {
+                            console.log(`Job ${jobId} progress: ${data.progresso}%`);
+                        },
+                        onSuccess: (data, job) => {
+                            console.log(`Job ${jobId} completed successfully`);
+                            // Atualizar UI se necessário
+                        },
+                        onError: (error, job) => {
+                            console.error(`Job ${jobId} failed:`, error);
+                        }
+                    });
+                }
+            });
+        } else {
+            console.warn('Sistema de processamento assíncrono não disponível');
+        }
+
+        // Função para remover imagem (compatibilidade com template)
+        window.removeImage = function() {
+            if (window.imageUploader) {
+                window.imageUploader.removeImage();
+            }
+        };
+
+        // Inicializar tooltips do Bootstrap
+        const tooltipTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"]'));
+        tooltipTriggerList.map(function (tooltipTriggerEl) {
+            return new bootstrap.Tooltip(tooltipTriggerEl);
+        });
+
+        // Controlar exibição do campo "Outra Localidade"
+        const regiaoSelect = document.getElementById('regiao');
+        const localidadeOutraContainer = document.getElementById('localidadeOutraContainer');
+        const localidadeInput = document.getElementById('localidade');
+
+        if (regiaoSelect) {
+            regiaoSelect.addEventListener('change', function() {
+                const regiao = this.value;
+
+                // Mostrar campo de localidade apenas se selecionar "Outra"
+                if (regiao === 'Outra') {
+                    localidadeOutraContainer.style.display = 'block';
+                    if (localidadeInput) {
+                        localidadeInput.required = true;
+                    }
+                } else {
+                    localidadeOutraContainer.style.display = 'none';
+                    if (localidadeInput) {
+                        localidadeInput.required = false;
+                        localidadeInput.value = '';
+                    }
+                }
+
+                validarFormulario();
+            });
+        }
+
+        if (localidadeInput) {
+            localidadeInput.addEventListener('input', validarFormulario);
+        }
+
+        // Validar formulário para habilitar/desabilitar botão
+        function validarFormulario() {
+            const uploadBtn = document.getElementById('uploadBtn');
+            const imageInput = document.getElementById('imageInput');
+            const regiao = document.getElementById('regiao');
+            const localidade = document.getElementById('localidade');
+
+            if (!uploadBtn || !imageInput || !regiao) return;
+
+            // Verificar se imagem está selecionada E região selecionada
+            const imagemSelecionada = imageInput.files && imageInput.files.length > 0;
+            const regiaoPreenchida = regiao.value && regiao.value.trim() !== '';
+
+            // Se região for "Outra", verificar se localidade está preenchida
+            let localidadeValida = true;
+            if (regiao.value === 'Outra' && localidade) {
+                localidadeValida = localidade.value && localidade.value.trim() !== '';
+            }
+
+            const formularioValido = imagemSelecionada && regiaoPreenchida && localidadeValida;
+
+            uploadBtn.disabled = !formularioValido;
+
+            console.log('Validação:', {
+                imagem: imagemSelecionada,
+                regiao: regiaoPreenchida,
+                localidadeValida: localidadeValida,
+                valido: formularioValido
+            });
+        }
+
+        // Validar quando imagem for selecionada
+        const imageInput = document.getElementById('imageInput');
+        if (imageInput) {
+            imageInput.addEventListener('change', validarFormulario);
+        }
+
+        // Também validar quando evento customizado for disparado
+        window.addEventListener('imageSelected', validarFormulario);
+
+        // Validar no carregamento inicial (região e localidade já estão preenchidos)
+        setTimeout(validarFormulario, 200);
+
+        // Se há um job_id na página (window.ARITANA_JOB_ID), iniciar monitoramento automático
+        const currentJobId = window.ARITANA_JOB_ID;
+        if (window.asyncProcessor && currentJobId) {
+            console.log(`Iniciando monitoramento do job: ${currentJobId}`);
+
+            window.asyncProcessor.addJob(currentJobId, {
+                onProgress: (data, job) => {
+                    const progressBar = document.getElementById('progressBar');
+                    const statusMessage = document.getElementById('statusMessage');
+                    const progressText = document.getElementById('progress-text');
+
+                    if (progressBar) progressBar.style.width = (data.progresso || 0) + '%';
+                    if (statusMessage) statusMessage.textContent = data.mensagem || 'Processando...';
+                    if (progressText) progressText.textContent = (data.progresso || 0) + '%';
+
+                    console.log(`Job ${currentJobId} progress: ${data.progresso}%`);
+                },
+                onSuccess: (data, job) => {
+                    const statusMessage = document.getElementById('statusMessage');
+                    const progressText = document.getElementById('progress-text');
+
+                    if (statusMessage) {
+                        statusMessage.className = 'status-message status-success';
+                        statusMessage.textContent = 'Processamento concluído com sucesso!';
+                    }
+                    if (progressText) progressText.textContent = '100%';
+
+                    console.log(`Job ${currentJobId} completed successfully`, data);
+
+                    // Buscar resultado e exibir
+                    if (data.resource_id) {
+                        fetch(`/api/resultado/${data.resource_id}/`)
+                            .then(response => response.json())
+                            .then(resultado => {
+                                console.log('Resultado:', resultado);
+                                exibirResultado(resultado);
+                            })
+                            .catch(error => {
+                                console.error('Erro ao buscar resultado:', error);
+                                // Redirecionar para histórico se falhar
+                                setTimeout(() => {
+                                    window.location.href = '/historico/';
+                                }, 2000);
+                            });
+                    } else {
+                        // Redirecionar para histórico se não houver resource_id
+                        setTimeout(() => {
+                            window.location.href = '/historico/';
+                        }, 2000);
+                    }
+                },
+                onError: (error, job) => {
+                    const statusMessage = document.getElementById('statusMessage');
+
+                    if (statusMessage) {
+                        statusMessage.className = 'status-message status-error';
+                        statusMessage.textContent = 'Erro no processamento: ' + error.message;
+                    }
+
+                    console.error(`Job ${currentJobId} failed:`, error);
+                }
+            });
+        }
+    }, 100); // Aguardar 100ms para garantir que o async-processing.js foi carregado
+});
+
+// Função para exibir resultado do processamento
+function exibirResultado(resultado) {
+    const resultArea = document.getElementById('resultArea');
+    const infoCard = document.getElementById('infoCard');
+    const progressContainer = document.getElementById('progressContainer');
+    const resultOriginalImg = document.getElementById('resultOriginalImg');
+    const resultProcessedImg = document.getElementById('resultProcessedImg');
+    const resultDetails = document.getElementById('resultDetails');
+
+    // Ocultar card de info e progresso
+    if (infoCard) infoCard.style.display = 'none';
+    if (progressContainer) progressContainer.style.display = 'none';
+
+    // Exibir imagens
+    if (resultOriginalImg && resultado.imagem_url) {
+        resultOriginalImg.src = resultado.imagem_url;
+    }
+
+    if (resultProcessedImg && resultado.imagem_processada_url) {
+        resultProcessedImg.src = resultado.imagem_processada_url;
+    }
+
+    // Exibir detalhes
+    if (resultDetails) {
+        const classificacao = resultado.classificacao || 'N/A';
+        const confianca = resultado.confianca ? Math.round(resultado.confianca) + '%' : 'N/A';
+        const badgeClass = classificacao.toLowerCase() === 'legal' ? 'bg-success' : 'bg-danger';
+
+        resultDetails.innerHTML = `
+            <div class="row">
+                <div class="col-md-4">
+                    <strong style="color: #6b7280;">Classificação:</strong><br>
+                    <span class="badge ${badgeClass} mt-1" style="font-size: 1rem; padding: 0.5rem 1rem;">
+                        ${classificacao}
+                    </span>
+                </div>
+                <div class="col-md-4">
+                    <strong style="color: #6b7280;">Confiança:</strong><br>
+                    <span style="color: #1f2937; font-size: 1.25rem; font-weight: 600;">${confianca}</span>
+                </div>
+                <div class="col-md-4">
+                    <strong style="color: #6b7280;">Região:</strong><br>
+                    <span style="color: #1f2937;">${resultado.regiao || 'N/A'}</span>
+                </div>
+            </div>
+            ${resultado.titulo ? `<div class="mt-2"><strong style="color: #6b7280;">Título:</strong> ${resultado.titulo}</div>` : ''}
+            ${resultado.descricao ? `<div class="mt-1"><strong style="color: #6b7280;">Descrição:</strong> ${resultado.descricao}</div>` : ''}
+        `;
+    }
+
+    // Exibir área de resultado com animação
+    if (resultArea) {
+        resultArea.style.display = 'block';
+        resultArea.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
+    }
+}